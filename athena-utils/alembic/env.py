@@ -29,6 +29,7 @@ import athena_models.chat  # noqa: F401,E402
 import athena_models.doc  # noqa: F401,E402
 import athena_models.store  # noqa: F401,E402
 import athena_models.digital_wellbeing  # noqa: F401,E402
+import athena_models.contracts  # noqa: F401,E402
 
 target_metadata = Base.metadata
 
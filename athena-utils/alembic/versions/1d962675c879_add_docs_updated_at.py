@@ -0,0 +1,68 @@
+"""add_docs_updated_at
+
+Revision ID: 1d962675c879
+Revises: c854190516ff
+Create Date: 2026-10-17 13:05:42.117530
+"""
+
+from __future__ import annotations
+
+from alembic import op  # noqa: F401
+import sqlalchemy as sa  # noqa: F401
+
+
+# revision identifiers, used by Alembic.
+revision = "1d962675c879"
+down_revision = 'c854190516ff'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Watermark for incremental jobs (memory consolidation). now() is not volatile, so
+    # existing rows get the migration time without a table rewrite.
+    op.add_column(
+        "docs",
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        schema="rag",
+    )
+
+    # rag.docs is written with raw SQL (langchain_postgres, mem0 upserts), so the ORM's
+    # onupdate never fires; a trigger keeps updated_at honest for every writer.
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION rag.docs_touch_updated_at() RETURNS trigger AS $$
+        BEGIN
+            NEW.updated_at = now();
+            RETURN NEW;
+        END;
+        $$ LANGUAGE plpgsql
+        """
+    )
+    op.execute(
+        "CREATE TRIGGER docs_touch_updated_at BEFORE UPDATE ON rag.docs "
+        "FOR EACH ROW EXECUTE FUNCTION rag.docs_touch_updated_at()"
+    )
+
+    # Only memories carry a user_id; archived messages never need consolidating.
+    # Built concurrently; rag.docs is live.
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "docs_memory_updated_at_idx",
+            "docs",
+            ["updated_at"],
+            schema="rag",
+            postgresql_where=sa.text("langchain_metadata ? 'user_id'"),
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "docs_memory_updated_at_idx", table_name="docs", schema="rag", postgresql_concurrently=True, if_exists=True
+        )
+    op.execute("DROP TRIGGER IF EXISTS docs_touch_updated_at ON rag.docs")
+    op.execute("DROP FUNCTION IF EXISTS rag.docs_touch_updated_at()")
+    op.drop_column("docs", "updated_at", schema="rag")
@@ -0,0 +1,54 @@
+"""add_docs_metadata_indexes
+
+Revision ID: 230565121e80
+Revises: cd8abc3b0ab7
+Create Date: 2026-10-17 11:48:05.902377
+"""
+
+from __future__ import annotations
+
+from alembic import op  # noqa: F401
+import sqlalchemy as sa  # noqa: F401
+
+
+# revision identifiers, used by Alembic.
+revision = "230565121e80"
+down_revision = 'cd8abc3b0ab7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Built concurrently; rag.docs is live
+    with op.get_context().autocommit_block():
+        # Containment filters (langchain_metadata @> '{"category": ...}') pushed into vector search
+        op.create_index(
+            "docs_metadata_gin",
+            "docs",
+            ["langchain_metadata"],
+            schema="rag",
+            postgresql_using="gin",
+            postgresql_ops={"langchain_metadata": "jsonb_path_ops"},
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+        # Per-user filter: lets the planner pre-filter a small user's rows instead of walking
+        # the whole HNSW graph. Partial, since archived messages carry no user_id.
+        op.create_index(
+            "docs_metadata_user_id_idx",
+            "docs",
+            [sa.text("(langchain_metadata->>'user_id')")],
+            schema="rag",
+            postgresql_where=sa.text("langchain_metadata ? 'user_id'"),
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "docs_metadata_user_id_idx", table_name="docs", schema="rag", postgresql_concurrently=True, if_exists=True
+        )
+        op.drop_index("docs_metadata_gin", table_name="docs", schema="rag", postgresql_concurrently=True, if_exists=True)
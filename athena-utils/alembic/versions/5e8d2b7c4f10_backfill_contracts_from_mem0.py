@@ -0,0 +1,148 @@
+"""backfill_contracts_from_mem0
+
+Revision ID: 5e8d2b7c4f10
+Revises: 9b3e61d0a4c7
+Create Date: 2026-10-17 16:05:37.218406
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+from datetime import datetime
+
+from alembic import op  # noqa: F401
+import sqlalchemy as sa  # noqa: F401
+
+
+# revision identifiers, used by Alembic.
+revision = "5e8d2b7c4f10"
+down_revision = '9b3e61d0a4c7'
+branch_labels = None
+depends_on = None
+
+logger = logging.getLogger("alembic.runtime.migration")
+
+# Commitments, episodes and boundaries used to be mem0 memories ("COMMITMENT: {json}" etc.).
+# Nothing reads those any more, so copy them into the contract tables. The memories are left
+# in place; re-running is harmless (ON CONFLICT on the (user_id, id) keys).
+_LEGACY = sa.text(
+    "SELECT langchain_metadata->>'user_id' AS user_id, content FROM rag.docs "
+    "WHERE langchain_metadata ? 'user_id' AND content ~ '(COMMITMENT|EPISODE|BOUNDARY):' "
+    "UNION ALL "
+    "SELECT langchain_metadata->>'user_id', content FROM rag.docs_cold "
+    "WHERE langchain_metadata ? 'user_id' AND content ~ '(COMMITMENT|EPISODE|BOUNDARY):'"
+)
+
+_INSERT = {
+    "COMMITMENT": sa.text(
+        "INSERT INTO commitment (user_id, id, party, goal_id, promise, kpi, due, status, grace, created_at, updated_at) "
+        "VALUES (:user_id, :id, :party, :goal_id, :promise, CAST(:kpi AS jsonb), :due, :status, CAST(:grace AS jsonb), "
+        "COALESCE(CAST(:created_at AS timestamptz), now()), now()) "
+        "ON CONFLICT (user_id, id) DO NOTHING"
+    ),
+    "EPISODE": sa.text(
+        "INSERT INTO interpersonal_episode (user_id, id, target, intensity, valence, arousal, control, uncertainty, "
+        "narrative, commitment_ids, timestamp, resolved) "
+        "VALUES (:user_id, :id, :target, :intensity, :valence, :arousal, :control, :uncertainty, :narrative, "
+        "CAST(:commitment_ids AS jsonb), COALESCE(CAST(:timestamp AS timestamptz), now()), :resolved) "
+        "ON CONFLICT (user_id, id) DO NOTHING"
+    ),
+    "BOUNDARY": sa.text(
+        "INSERT INTO boundary (user_id, id, description, context, active, created_at) "
+        "VALUES (:user_id, :id, :description, :context, :active, COALESCE(CAST(:created_at AS timestamptz), now())) "
+        "ON CONFLICT (user_id, id) DO NOTHING"
+    ),
+}
+
+
+def _parse(content: str):
+    """(kind, payload) for a legacy memory, or None if it isn't one or its JSON is broken."""
+    for kind in _INSERT:
+        marker = content.find(f"{kind}:")
+        if marker < 0:
+            continue
+        start = content.find("{", marker)
+        if start < 0:
+            return None
+        try:
+            payload, _ = json.JSONDecoder().raw_decode(content[start:])
+        except ValueError:
+            return None
+        return (kind, payload) if isinstance(payload, dict) and payload.get("id") else None
+    return None
+
+
+def _ts(value):
+    """The stored ISO timestamp, or None (the insert falls back to now()) if it doesn't parse."""
+    try:
+        return datetime.fromisoformat(str(value)).isoformat() if value else None
+    except ValueError:
+        return None
+
+
+def _params(kind: str, user_id: str, data: dict):
+    """Insert parameters, or None when the row would violate the tables' check constraints."""
+    if kind == "COMMITMENT":
+        if data.get("party") not in ("user", "athena"):
+            return None
+        status = data.get("status", "active")
+        if status not in ("active", "paused", "completed", "broken"):
+            return None
+        return {
+            "user_id": user_id,
+            "id": str(data["id"]),
+            "party": data["party"],
+            "goal_id": str(data.get("goal_id", "")),
+            "promise": str(data.get("promise", "")),
+            "kpi": json.dumps(data.get("kpi") or {}),
+            "due": str(data.get("due", "rolling")),
+            "status": status,
+            "grace": json.dumps(data.get("grace") or {}),
+            "created_at": _ts(data.get("created_at")),
+        }
+    if kind == "EPISODE":
+        if data.get("target") not in ("self", "user", "external"):
+            return None
+        try:
+            dims = {name: float(data[name]) for name in ("intensity", "valence", "arousal", "control", "uncertainty")}
+        except (KeyError, TypeError, ValueError):
+            return None
+        return {
+            "user_id": user_id,
+            "id": str(data["id"]),
+            "target": data["target"],
+            **dims,
+            "narrative": str(data.get("narrative", "")),
+            "commitment_ids": json.dumps(data.get("commitment_ids") or []),
+            "timestamp": _ts(data.get("timestamp")),
+            "resolved": bool(data.get("resolved", False)),
+        }
+    return {
+        "user_id": user_id,
+        "id": str(data["id"]),
+        "description": str(data.get("description", "")),
+        "context": str(data.get("context", "general")),
+        "active": bool(data.get("active", True)),
+        "created_at": _ts(data.get("created_at")),
+    }
+
+
+def upgrade() -> None:
+    conn = op.get_bind()
+    counts = {kind: 0 for kind in _INSERT}
+    for user_id, content in conn.execute(_LEGACY):
+        parsed = _parse(content or "")
+        if parsed is None:
+            continue
+        kind, data = parsed
+        params = _params(kind, user_id, data)
+        if params is None:
+            continue
+        counts[kind] += conn.execute(_INSERT[kind], params).rowcount
+    logger.info(f"Backfilled contracts from mem0: {counts}")
+
+
+def downgrade() -> None:
+    # Backfilled rows can't be told apart from new ones, and the mem0 originals are untouched
+    pass
@@ -0,0 +1,33 @@
+"""add_docs_updated_at_index
+
+Revision ID: 9b3e61d0a4c7
+Revises: f52cb8ef2231
+Create Date: 2026-10-17 16:21:09.384215
+"""
+
+from __future__ import annotations
+
+from alembic import op  # noqa: F401
+import sqlalchemy as sa  # noqa: F401
+
+
+# revision identifiers, used by Alembic.
+revision = "9b3e61d0a4c7"
+down_revision = 'f52cb8ef2231'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Change feed for the host-local ANN replica, which mirrors every row (not just memories).
+    # Built concurrently; rag.docs is live.
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "docs_updated_at_idx", "docs", ["updated_at"], schema="rag",
+            postgresql_concurrently=True, if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index("docs_updated_at_idx", table_name="docs", schema="rag", postgresql_concurrently=True, if_exists=True)
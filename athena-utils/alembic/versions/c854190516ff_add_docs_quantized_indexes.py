@@ -0,0 +1,33 @@
+"""add_docs_quantized_indexes
+
+Revision ID: c854190516ff
+Revises: 230565121e80
+Create Date: 2026-10-17 12:31:19.448613
+"""
+
+from __future__ import annotations
+
+from alembic import op  # noqa: F401
+import sqlalchemy as sa  # noqa: F401
+
+
+# revision identifiers, used by Alembic.
+revision = "c854190516ff"
+down_revision = '230565121e80'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # The compact indexes for the quantized first pass (docs_emb_halfvec_l2_hnsw,
+    # docs_emb_bit_hamming_hnsw) are opt-in: each is one more HNSW graph every rag.docs insert
+    # has to maintain. Operators build the one they use with `scripts/manage_vector_indexes.py
+    # rebuild rag.docs:halfvec` (or rag.docs:binary) before setting VECTOR_QUANTIZATION, and
+    # can drop the float32 one afterwards.
+    pass
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS rag.docs_emb_bit_hamming_hnsw")
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS rag.docs_emb_halfvec_l2_hnsw")
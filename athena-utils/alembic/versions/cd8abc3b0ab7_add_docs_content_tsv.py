@@ -0,0 +1,54 @@
+"""add_docs_content_tsv
+
+Revision ID: cd8abc3b0ab7
+Revises: ce5db1846401
+Create Date: 2026-10-17 11:02:37.514208
+"""
+
+from __future__ import annotations
+
+from alembic import op  # noqa: F401
+import sqlalchemy as sa  # noqa: F401
+from sqlalchemy.dialects.postgresql import TSVECTOR
+
+
+# revision identifiers, used by Alembic.
+revision = "cd8abc3b0ab7"
+down_revision = 'ce5db1846401'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Generated tsvector for the full-text half of hybrid retrieval. Being generated,
+    # it stays in sync with every writer (PGVectorStore, mem0, archiving) for free.
+    # Adding a STORED generated column rewrites rag.docs under an ACCESS EXCLUSIVE lock:
+    # reads and writes wait for the length of the rewrite, so run this off-peak.
+    op.add_column(
+        "docs",
+        sa.Column(
+            "content_tsv",
+            TSVECTOR(),
+            sa.Computed("to_tsvector('pg_catalog.english', content)", persisted=True),
+        ),
+        schema="rag"
+    )
+    # The index itself is built concurrently; rag.docs is live
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "docs_content_tsv_gin",
+            "docs",
+            ["content_tsv"],
+            schema="rag",
+            postgresql_using="gin",
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "docs_content_tsv_gin", table_name="docs", schema="rag", postgresql_concurrently=True, if_exists=True
+        )
+    op.drop_column("docs", "content_tsv", schema="rag")
@@ -0,0 +1,96 @@
+"""add_contracts_tables
+
+Revision ID: ce5db1846401
+Revises: 7344289ab91f
+Create Date: 2026-10-17 10:12:44.120931
+"""
+
+from __future__ import annotations
+
+from alembic import op  # noqa: F401
+import sqlalchemy as sa  # noqa: F401
+from sqlalchemy.dialects.postgresql import JSONB
+
+
+# revision identifiers, used by Alembic.
+revision = "ce5db1846401"
+down_revision = '7344289ab91f'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Commitments (previously "COMMITMENT: {json}" strings in mem0)
+    op.create_table(
+        "commitment",
+        sa.Column("user_id", sa.String(length=64), nullable=False),
+        sa.Column("id", sa.String(length=128), nullable=False),
+        sa.Column("party", sa.String(length=16), nullable=False),
+        sa.Column("goal_id", sa.String(length=128), nullable=False),
+        sa.Column("promise", sa.Text(), nullable=False),
+        sa.Column("kpi", JSONB(), nullable=False, server_default=sa.text("'{}'::jsonb")),
+        sa.Column("due", sa.String(length=64), nullable=False, server_default=sa.text("'rolling'")),
+        sa.Column("status", sa.String(length=16), nullable=False, server_default=sa.text("'active'")),
+        sa.Column("grace", JSONB(), nullable=False, server_default=sa.text("'{}'::jsonb")),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False, server_default=sa.func.now()),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=False, server_default=sa.func.now()),
+        sa.CheckConstraint("party IN ('user', 'athena')", name="ck_commitment_party_valid"),
+        sa.CheckConstraint("status IN ('active', 'paused', 'completed', 'broken')", name="ck_commitment_status_valid"),
+        # Ids are only unique per user
+        sa.PrimaryKeyConstraint("user_id", "id", name="commitment_pkey"),
+    )
+    op.create_index(
+        "commitment_user_status_party_idx", "commitment", ["user_id", "status", "party", "created_at"]
+    )
+
+    # Interpersonal episodes (previously "EPISODE: {json}" strings in mem0)
+    op.create_table(
+        "interpersonal_episode",
+        sa.Column("user_id", sa.String(length=64), nullable=False),
+        sa.Column("id", sa.String(length=128), nullable=False),
+        sa.Column("target", sa.String(length=16), nullable=False),
+        sa.Column("intensity", sa.Float(), nullable=False),
+        sa.Column("valence", sa.Float(), nullable=False),
+        sa.Column("arousal", sa.Float(), nullable=False),
+        sa.Column("control", sa.Float(), nullable=False),
+        sa.Column("uncertainty", sa.Float(), nullable=False),
+        sa.Column("narrative", sa.Text(), nullable=False),
+        sa.Column("commitment_ids", JSONB(), nullable=False, server_default=sa.text("'[]'::jsonb")),
+        sa.Column("timestamp", sa.DateTime(timezone=True), nullable=False, server_default=sa.func.now()),
+        sa.Column("resolved", sa.Boolean(), nullable=False, server_default=sa.text("false")),
+        sa.CheckConstraint("target IN ('self', 'user', 'external')", name="ck_interpersonal_episode_target_valid"),
+        sa.PrimaryKeyConstraint("user_id", "id", name="interpersonal_episode_pkey"),
+    )
+    op.create_index(
+        "interpersonal_episode_user_ts_idx", "interpersonal_episode", ["user_id", "timestamp"]
+    )
+    op.create_index(
+        "interpersonal_episode_user_resolved_target_ts_idx",
+        "interpersonal_episode",
+        ["user_id", "resolved", "target", "timestamp"],
+    )
+
+    # Boundaries (previously "BOUNDARY: {json}" strings in mem0)
+    op.create_table(
+        "boundary",
+        sa.Column("user_id", sa.String(length=64), nullable=False),
+        sa.Column("id", sa.String(length=128), nullable=False),
+        sa.Column("description", sa.Text(), nullable=False),
+        sa.Column("context", sa.String(length=64), nullable=False, server_default=sa.text("'general'")),
+        sa.Column("active", sa.Boolean(), nullable=False, server_default=sa.text("true")),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False, server_default=sa.func.now()),
+        sa.PrimaryKeyConstraint("user_id", "id", name="boundary_pkey"),
+    )
+    op.create_index("boundary_user_active_context_idx", "boundary", ["user_id", "active", "context"])
+
+
+def downgrade() -> None:
+    op.drop_index("boundary_user_active_context_idx", table_name="boundary")
+    op.drop_table("boundary")
+
+    op.drop_index("interpersonal_episode_user_resolved_target_ts_idx", table_name="interpersonal_episode")
+    op.drop_index("interpersonal_episode_user_ts_idx", table_name="interpersonal_episode")
+    op.drop_table("interpersonal_episode")
+
+    op.drop_index("commitment_user_status_party_idx", table_name="commitment")
+    op.drop_table("commitment")
@@ -0,0 +1,72 @@
+"""add_memory_tiers
+
+Revision ID: f52cb8ef2231
+Revises: 1d962675c879
+Create Date: 2026-10-17 13:52:10.604218
+"""
+
+from __future__ import annotations
+
+from alembic import op  # noqa: F401
+import sqlalchemy as sa  # noqa: F401
+from sqlalchemy.dialects.postgresql import JSONB
+from pgvector.sqlalchemy import Vector
+
+
+# revision identifiers, used by Alembic.
+revision = "f52cb8ef2231"
+down_revision = '1d962675c879'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Access statistics for memories, kept apart from rag.docs so that recording a search
+    # hit never rewrites a 6 KB vector row or touches its HNSW entry
+    op.create_table(
+        "docs_access",
+        sa.Column("langchain_id", sa.Text(), primary_key=True),
+        sa.Column("last_accessed_at", sa.DateTime(timezone=True), nullable=False, server_default=sa.func.now()),
+        sa.Column("access_count", sa.Integer(), nullable=False, server_default="0"),
+        schema="rag",
+    )
+
+    # Cold tier: memories idle long enough to leave the hot rag.docs index. Same layout
+    # minus the full-text column; searched only when the hot tier comes back weak.
+    op.create_table(
+        "docs_cold",
+        sa.Column("langchain_id", sa.Text(), primary_key=True),
+        sa.Column("content", sa.Text(), nullable=False),
+        sa.Column("embedding", Vector(1536), nullable=False),
+        sa.Column("langchain_metadata", JSONB(), nullable=False, server_default=sa.text("'{}'::jsonb")),
+        sa.Column("title", sa.String(200), nullable=True),
+        sa.Column("user_id", sa.BigInteger(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=False, server_default=sa.func.now()),
+        sa.Column("demoted_at", sa.DateTime(timezone=True), nullable=False, server_default=sa.func.now()),
+        schema="rag",
+    )
+    op.create_index(
+        "docs_cold_metadata_user_id_idx",
+        "docs_cold",
+        [sa.text("(langchain_metadata->>'user_id')")],
+        schema="rag",
+    )
+    # Binary-quantized HNSW (~32x smaller than float32); candidates are rescored against
+    # the full-precision column, as with VECTOR_QUANTIZATION="binary" on rag.docs
+    op.execute(
+        "CREATE INDEX docs_cold_emb_bit_hamming_hnsw ON rag.docs_cold "
+        "USING hnsw ((binary_quantize(embedding)::bit(1536)) bit_hamming_ops) WITH (m = 16, ef_construction = 64)"
+    )
+
+
+def downgrade() -> None:
+    # Bring cold memories back before the table goes
+    op.execute(
+        "INSERT INTO rag.docs (langchain_id, content, embedding, langchain_metadata, title, user_id, updated_at) "
+        "SELECT langchain_id, content, embedding, langchain_metadata, title, user_id, updated_at FROM rag.docs_cold "
+        "WHERE user_id IS NOT NULL ON CONFLICT (langchain_id) DO NOTHING"
+    )
+    op.execute("DROP INDEX IF EXISTS rag.docs_cold_emb_bit_hamming_hnsw")
+    op.drop_index("docs_cold_metadata_user_id_idx", table_name="docs_cold", schema="rag")
+    op.drop_table("docs_cold", schema="rag")
+    op.drop_table("docs_access", schema="rag")
@@ -1,8 +1,9 @@
 from .user import User
 from .chat import Chat, ChatMessage
-from .doc import Doc
+from .doc import Doc, ColdDoc, DocAccess
 from .store import StoreKV, StoreVector
 from .prompt import Prompt, PromptRole
 from .digital_wellbeing import Location, TimeFrame, Policy, Schedule
+from .contracts import Commitment, InterpersonalEpisode, Boundary
 from .utils import engine, db_session
 
@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+import sqlalchemy as sa
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy.dialects.postgresql import JSONB
+
+from .utils import Base, TimestampMixin
+
+
+# user_id is the mem0-style string id used throughout polymetis ("1", "demo_user"),
+# so it is not a foreign key to api_user. Ids are only unique per user (rows backfilled
+# from mem0 carry their old timestamp ids), hence the (user_id, id) primary keys.
+
+
+class Commitment(TimestampMixin, Base):
+    __tablename__ = "commitment"
+    __table_args__ = (
+        sa.Index("commitment_user_status_party_idx", "user_id", "status", "party", "created_at"),
+        sa.CheckConstraint("party IN ('user', 'athena')", name="ck_commitment_party_valid"),
+        sa.CheckConstraint(
+            "status IN ('active', 'paused', 'completed', 'broken')", name="ck_commitment_status_valid"
+        ),
+    )
+
+    user_id: Mapped[str] = mapped_column(sa.String(64), primary_key=True)
+    id: Mapped[str] = mapped_column(sa.String(128), primary_key=True)
+    party: Mapped[str] = mapped_column(sa.String(16), nullable=False)
+    goal_id: Mapped[str] = mapped_column(sa.String(128), nullable=False)
+    promise: Mapped[str] = mapped_column(sa.Text, nullable=False)
+    kpi: Mapped[dict] = mapped_column(JSONB, nullable=False, server_default=sa.text("'{}'::jsonb"))
+    due: Mapped[str] = mapped_column(sa.String(64), nullable=False, server_default=sa.text("'rolling'"))
+    status: Mapped[str] = mapped_column(sa.String(16), nullable=False, server_default=sa.text("'active'"))
+    grace: Mapped[dict] = mapped_column(JSONB, nullable=False, server_default=sa.text("'{}'::jsonb"))
+
+    def __repr__(self) -> str:
+        return f"Commitment(id={self.id!r}, party={self.party!r}, status={self.status!r})"
+
+
+class InterpersonalEpisode(Base):
+    __tablename__ = "interpersonal_episode"
+    __table_args__ = (
+        sa.Index("interpersonal_episode_user_ts_idx", "user_id", "timestamp"),
+        sa.Index("interpersonal_episode_user_resolved_target_ts_idx", "user_id", "resolved", "target", "timestamp"),
+        sa.CheckConstraint("target IN ('self', 'user', 'external')", name="ck_interpersonal_episode_target_valid"),
+    )
+
+    user_id: Mapped[str] = mapped_column(sa.String(64), primary_key=True)
+    id: Mapped[str] = mapped_column(sa.String(128), primary_key=True)
+    target: Mapped[str] = mapped_column(sa.String(16), nullable=False)
+    intensity: Mapped[float] = mapped_column(sa.Float, nullable=False)
+    valence: Mapped[float] = mapped_column(sa.Float, nullable=False)
+    arousal: Mapped[float] = mapped_column(sa.Float, nullable=False)
+    control: Mapped[float] = mapped_column(sa.Float, nullable=False)
+    uncertainty: Mapped[float] = mapped_column(sa.Float, nullable=False)
+    narrative: Mapped[str] = mapped_column(sa.Text, nullable=False)
+    commitment_ids: Mapped[list] = mapped_column(JSONB, nullable=False, server_default=sa.text("'[]'::jsonb"))
+    timestamp: Mapped[sa.DateTime] = mapped_column(
+        sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False
+    )
+    resolved: Mapped[bool] = mapped_column(sa.Boolean, nullable=False, server_default=sa.text("false"))
+
+    def __repr__(self) -> str:
+        return f"InterpersonalEpisode(id={self.id!r}, target={self.target!r}, resolved={self.resolved!r})"
+
+
+class Boundary(Base):
+    __tablename__ = "boundary"
+    __table_args__ = (
+        sa.Index("boundary_user_active_context_idx", "user_id", "active", "context"),
+    )
+
+    user_id: Mapped[str] = mapped_column(sa.String(64), primary_key=True)
+    id: Mapped[str] = mapped_column(sa.String(128), primary_key=True)
+    description: Mapped[str] = mapped_column(sa.Text, nullable=False)
+    context: Mapped[str] = mapped_column(sa.String(64), nullable=False, server_default=sa.text("'general'"))
+    active: Mapped[bool] = mapped_column(sa.Boolean, nullable=False, server_default=sa.text("true"))
+    created_at: Mapped[sa.DateTime] = mapped_column(
+        sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False
+    )
+
+    def __repr__(self) -> str:
+        return f"Boundary(id={self.id!r}, context={self.context!r}, active={self.active!r})"
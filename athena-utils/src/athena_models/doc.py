@@ -2,7 +2,7 @@ from __future__ import annotations
 
 import sqlalchemy as sa
 from sqlalchemy.orm import Mapped, mapped_column, relationship
-from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.dialects.postgresql import JSONB, TSVECTOR
 from pgvector.sqlalchemy import Vector
 
 
@@ -11,10 +11,30 @@ from .utils import Base
 
 class Doc(Base):
     __tablename__ = "docs"
-    __table_args__ = {
-        "schema": "rag",
-        # HNSW index will be created via Alembic migration (vendor-specific)
-    }
+    __table_args__ = (
+        sa.Index("docs_content_tsv_gin", "content_tsv", postgresql_using="gin"),
+        sa.Index(
+            "docs_metadata_gin",
+            "langchain_metadata",
+            postgresql_using="gin",
+            postgresql_ops={"langchain_metadata": "jsonb_path_ops"},
+        ),
+        sa.Index(
+            "docs_metadata_user_id_idx",
+            sa.text("(langchain_metadata->>'user_id')"),
+            postgresql_where=sa.text("langchain_metadata ? 'user_id'"),
+        ),
+        sa.Index(
+            "docs_memory_updated_at_idx",
+            "updated_at",
+            postgresql_where=sa.text("langchain_metadata ? 'user_id'"),
+        ),
+        sa.Index("docs_updated_at_idx", "updated_at"),
+        {
+            "schema": "rag",
+            # HNSW index will be created via Alembic migration (vendor-specific)
+        },
+    )
 
     # Mirrors langchain PGVectorStore defaults
     langchain_id: Mapped[str] = mapped_column(sa.Text, primary_key=True)
@@ -22,6 +42,16 @@ class Doc(Base):
     embedding = sa.Column(Vector(1536), nullable=False)
     langchain_metadata: Mapped[dict] = mapped_column(JSONB, nullable=False, server_default=sa.text("'{}'::jsonb"))
 
+    # Full-text side of hybrid retrieval; generated so every writer keeps it in sync
+    content_tsv = sa.Column(
+        TSVECTOR, sa.Computed("to_tsvector('pg_catalog.english', content)", persisted=True)
+    )
+
+    # Bumped by the docs_touch_updated_at trigger on every UPDATE, whoever the writer is
+    updated_at: Mapped[sa.DateTime] = mapped_column(
+        sa.DateTime(timezone=True), server_default=sa.func.now(), onupdate=sa.func.now(), nullable=False
+    )
+
     title: Mapped[str | None] = mapped_column(sa.String(200), nullable=True)
 
     # Foreign key to User
@@ -31,3 +61,40 @@ class Doc(Base):
     user: Mapped["User"] = relationship("User", back_populates="docs")
 
 
+class ColdDoc(Base):
+    """Cold tier of rag.docs: memories demoted by the tiering job (see polymetis memory_tiering)."""
+
+    __tablename__ = "docs_cold"
+    __table_args__ = (
+        sa.Index("docs_cold_metadata_user_id_idx", sa.text("(langchain_metadata->>'user_id')")),
+        {
+            "schema": "rag",
+            # Binary-quantized HNSW index created via Alembic migration (vendor-specific)
+        },
+    )
+
+    langchain_id: Mapped[str] = mapped_column(sa.Text, primary_key=True)
+    content: Mapped[str] = mapped_column(sa.Text, nullable=False)
+    embedding = sa.Column(Vector(1536), nullable=False)
+    langchain_metadata: Mapped[dict] = mapped_column(JSONB, nullable=False, server_default=sa.text("'{}'::jsonb"))
+    title: Mapped[str | None] = mapped_column(sa.String(200), nullable=True)
+    user_id: Mapped[int | None] = mapped_column(sa.BigInteger, nullable=True)
+    updated_at: Mapped[sa.DateTime] = mapped_column(
+        sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False
+    )
+    demoted_at: Mapped[sa.DateTime] = mapped_column(
+        sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False
+    )
+
+
+class DocAccess(Base):
+    """Search hits per memory, in either tier; drives demotion and promotion."""
+
+    __tablename__ = "docs_access"
+    __table_args__ = {"schema": "rag"}
+
+    langchain_id: Mapped[str] = mapped_column(sa.Text, primary_key=True)
+    last_accessed_at: Mapped[sa.DateTime] = mapped_column(
+        sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False
+    )
+    access_count: Mapped[int] = mapped_column(sa.Integer, nullable=False, server_default="0")
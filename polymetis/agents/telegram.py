@@ -1,6 +1,7 @@
 import asyncio
 import time
 from enum import Enum
+from functools import lru_cache
 from typing import Any, Dict, List, Literal
 
 from athena_celery import shared_task
@@ -22,8 +23,11 @@ from integrations.telegram import send_telegram_message
 from utils import (BaseState, MsgFieldType, agentless_start, archive_thread,
                    checkpointer, memory, store, vectorstore)
 from tools import tools
+from utils.archive_scheduler import note_turn
 from utils.memory_engine import get_memory_context_async
+from utils.retrieval_planner import RETRIEVAL_PLANNER_ENABLED, plan_retrieval
 from utility_agents import determine_tone, determine_topics
+from utility_agents.tone import ToneResponse
 from utility_agents.topic import TopicLiteral
 
 logger = get_logger(__name__)
@@ -32,6 +36,12 @@ logger = get_logger(__name__)
 # Base model (bound per-turn using tone settings)
 base_model = ChatOpenAI(model="gpt-5")
 
+# Per-stage primer budgets: past them the turn goes on without memory context / mood / a
+# classified tone (ToneResponse defaults) rather than waiting
+PRIMER_RETRIEVAL_TIMEOUT_SECONDS: float = getattr(settings, "PRIMER_RETRIEVAL_TIMEOUT_SECONDS", 3.0)
+PRIMER_MOOD_TIMEOUT_SECONDS: float = getattr(settings, "PRIMER_MOOD_TIMEOUT_SECONDS", 0.5)
+PRIMER_TONE_TIMEOUT_SECONDS: float = getattr(settings, "PRIMER_TONE_TIMEOUT_SECONDS", 3.0)
+
 class TelegramState(BaseState):
     messages: MsgFieldType = Field(default_factory=lambda: DEFAULT_TELEGRAM_MESSAGES)
     session_id: int
@@ -42,32 +52,62 @@ class TelegramState(BaseState):
     needs_restart: bool = False
 
 
+async def _stage(name: str, coro, timeout: float, fallback: Any, timings: Dict[str, float]) -> Any:
+    """Run one primer stage under its latency budget; the fallback stands in if it is late or fails."""
+    started = time.perf_counter()
+    try:
+        return await asyncio.wait_for(coro, timeout=timeout)
+    except asyncio.TimeoutError:
+        logger.warning(f"Primer stage {name} exceeded its {timeout}s budget; using fallback")
+    except Exception:
+        logger.exception(f"Primer stage {name} failed; using fallback")
+    finally:
+        timings[name] = (time.perf_counter() - started) * 1000
+    return fallback
+
+
+async def _retrieve_context(text: str) -> str:
+    # One embedding, every source searched concurrently, one ranked block; falls back to
+    # memory context alone when the planner is disabled
+    if RETRIEVAL_PLANNER_ENABLED:
+        return (await plan_retrieval(text, namespace="telegram")).to_context()
+    return await get_memory_context_async(text)
+
+
 async def primer(state: TelegramState) -> TelegramState:
 
     logger.info(f"messages at start: {len(state.messages)}")
 
-    # Get memory context for this query (async, runs in thread pool)
-    memory_context = await get_memory_context_async(state.text)
-
-    # Add user message
+    # Add user message (the tone classifier reads it from the state)
     state.messages.append(HumanMessage(content=state.text))
 
+    # Retrieval, mood and tone are independent: run them together so the primer costs the
+    # slowest stage rather than the sum, each with its own budget and fallback
+    started = time.perf_counter()
+    timings: Dict[str, float] = {}
+    memory_context, mood, tone = await asyncio.gather(
+        _stage("retrieval", _retrieve_context(state.text), PRIMER_RETRIEVAL_TIMEOUT_SECONDS, "", timings),
+        _stage("mood", asyncio.to_thread(get_current_mood, user_id=str(1)), PRIMER_MOOD_TIMEOUT_SECONDS, None, timings),
+        _stage("tone", determine_tone(state), PRIMER_TONE_TIMEOUT_SECONDS, ToneResponse(), timings),
+    )
+    logger.info(
+        f"Primer stages in {(time.perf_counter() - started) * 1000:.0f}ms "
+        f"({', '.join(f'{name} {ms:.0f}ms' for name, ms in timings.items())})"
+    )
+
     # Add memory context as system message if available
     if memory_context:
         state.messages.append(SystemMessage(content=memory_context))
 
     # Add mood-based behavioral context
     try:
-
-        mood = get_current_mood(user_id=str(1))
         if mood:
             mood_prompt = generate_mood_system_prompt(mood)
             state.messages.append(SystemMessage(content=mood_prompt))
     except Exception as e:
         logger.debug(f"Failed to add mood context: {e}")
 
-    # Determine tone and other settings
-    tone = await determine_tone(state)
+    # Apply tone and other settings
     state.temperature = max(0.0, min(2.0, float(tone.temperature)))
     state.reasoning_effort = str(tone.reasoning_effort)
     state.verbosity = str(tone.verbosity)
@@ -79,16 +119,26 @@ async def primer(state: TelegramState) -> TelegramState:
 
     return state
 
+@lru_cache(maxsize=64)
+def react_agent(temperature: float, reasoning_effort: str, verbosity: str):
+    """
+    Compiled ReAct agent per tone bucket. Building one compiles a LangGraph graph and binds
+    the whole tool list, so it is done once per (temperature to 0.1, effort, verbosity)
+    instead of on every turn; see scripts/benchmark_react_agent.py.
+    """
+    dynamic_model = base_model.bind(
+        temperature=temperature,
+        reasoning_effort=reasoning_effort,
+        verbosity=verbosity,
+    )
+    return create_react_agent(dynamic_model, store=store, state_schema=TelegramState, tools=tools)
+
+
 async def node_converse(state: TelegramState) -> TelegramState:
 
     logger.info(f"messages at converse: {len(state.messages)}")
 
-    dynamic_model = base_model.bind(
-        temperature=state.temperature,
-        reasoning_effort=state.reasoning_effort,
-        verbosity=state.verbosity,
-    )
-    dynamic_agent = create_react_agent(dynamic_model, store=store, state_schema=TelegramState, tools=tools)
+    dynamic_agent = react_agent(round(state.temperature, 1), state.reasoning_effort, state.verbosity)
 
     out = await dynamic_agent.ainvoke(state)
 
@@ -172,6 +222,8 @@ async def telegram_agent_task(self, **kwargs):
             result = await telegram_agent.ainvoke(kwargs, config=config)
             send_telegram_message(result['session_id'], result['messages'][-1].content)
             message_sent = True
+            # Archive in the background as the thread grows, not all at once on /start
+            await note_turn(kwargs['session_id'], namespace="telegram")
     except Exception as e:
         logger.exception(f"telegram_agent_task failed on attempt {self.request.retries + 1}: {e}")
 
@@ -6,13 +6,19 @@ from celery import Celery
 # Import the task modules to ensure they're registered
 import polymetis.agents.telegram
 import polymetis.agents.self_starter
+import polymetis.utils.memory_consolidation
+import polymetis.utils.memory_tiering
 
 from polymetis.agents.self_starter import self_starter_agent_task
+from polymetis.utils.memory_consolidation import memory_consolidation_task
+from polymetis.utils.memory_tiering import memory_tiering_task
 
 # Configure autodiscovery for polymetis tasks
 celery_app.autodiscover_tasks([
     'polymetis.agents.telegram',
     'polymetis.agents.self_starter',
+    'polymetis.utils.memory_consolidation',
+    'polymetis.utils.memory_tiering',
 ])
 
 
@@ -21,4 +27,14 @@ def setup_periodic_tasks(sender: Celery, **kwargs):
     sender.add_periodic_task(
         crontab(hour=9, minute=0),
         self_starter_agent_task.s(),
-    )
\ No newline at end of file
+    )
+    # Incremental: only users with memories written since the last run are looked at
+    sender.add_periodic_task(
+        crontab(minute=30),
+        memory_consolidation_task.s(),
+    )
+    # Off-peak: moves idle memories to the cold tier and brings re-used ones back
+    sender.add_periodic_task(
+        crontab(hour=4, minute=0),
+        memory_tiering_task.s(),
+    )
@@ -2,18 +2,17 @@ from __future__ import annotations
 
 from typing import List, Optional
 from datetime import datetime
-import json
 
 from athena_logging import get_logger
 from langchain_core.tools import tool
 
-from utils.memory_engine import memory
-from utils.emotional_engine import Commitment, Boundary, InterpersonalEpisode, CommitmentStatus, Target
+from utils import contracts_repository
+from utils.emotional_engine import CommitmentStatus, Target
 
 logger = get_logger(__name__)
 
 @tool("search_commitments")
-def search_commitments(status: str = "active", party: str = "", user_id: str = "1") -> str:
+async def search_commitments(status: str = "active", party: str = "", user_id: str = "1") -> str:
     """
     Search for commitments by status and party.
 
@@ -26,44 +25,26 @@ def search_commitments(status: str = "active", party: str = "", user_id: str = "
         List of matching commitments
     """
     try:
-        query = "COMMITMENT"
-        if status != "all":
-            query += f" status:{status}"
-        if party:
-            query += f" party:{party}"
-
-        results = memory.search(query, user_id=user_id, limit=20)
-
-        if not results:
-            return "No commitments found."
-
-        commitment_texts = []
-        for i, result in enumerate(results, 1):
-            if isinstance(result, dict):
-                content = result.get("memory") or result.get("content") or str(result)
-                if "COMMITMENT:" in content:
-                    try:
-                        commitment_json = content.split("COMMITMENT:", 1)[1].strip()
-                        commitment = json.loads(commitment_json)
-                        if (status == "all" or commitment.get("status") == status) and \
-                           (not party or commitment.get("party") == party):
-                            commitment_texts.append(
-                                f"{i}. [{commitment['id']}] {commitment['party']}: {commitment['promise']} "
-                                f"(Status: {commitment['status']}, KPI: {commitment['kpi']})"
-                            )
-                    except json.JSONDecodeError:
-                        continue
-
-        if not commitment_texts:
+        commitments = await contracts_repository.get_commitments(
+            user_id,
+            status=None if status == "all" else CommitmentStatus(status),
+            party=party or None,
+        )
+
+        if not commitments:
             return f"No {status} commitments found for {party or 'any party'}."
 
+        commitment_texts = [
+            f"{i}. [{c.id}] {c.party}: {c.promise} (Status: {c.status.value}, KPI: {c.kpi})"
+            for i, c in enumerate(commitments, 1)
+        ]
         return f"Commitments ({status}):\n" + "\n".join(commitment_texts)
     except Exception as e:
         logger.exception("Failed to search commitments")
         return f"Failed to search commitments: {str(e)}"
 
 @tool("update_commitment_status")
-def update_commitment_status(commitment_id: str, new_status: str, user_id: str = "1") -> str:
+async def update_commitment_status(commitment_id: str, new_status: str, user_id: str = "1") -> str:
     """
     Update the status of a commitment.
 
@@ -76,28 +57,9 @@ def update_commitment_status(commitment_id: str, new_status: str, user_id: str =
         Confirmation message
     """
     try:
-        # Find the commitment
-        results = memory.search(f"COMMITMENT {commitment_id}", user_id=user_id, limit=5)
-
-        for result in results:
-            if isinstance(result, dict):
-                content = result.get("memory") or result.get("content") or str(result)
-                if "COMMITMENT:" in content and commitment_id in content:
-                    try:
-                        commitment_json = content.split("COMMITMENT:", 1)[1].strip()
-                        commitment = json.loads(commitment_json)
-                        commitment["status"] = new_status
-
-                        new_content = f"COMMITMENT: {json.dumps(commitment)}"
-                        memory_id = result.get("id") or result.get("_id")
-
-                        if memory_id:
-                            memory.update(memory_id, new_content)
-                            logger.info(f"Updated commitment {commitment_id} status to {new_status}")
-                            return f"Commitment {commitment_id} status updated to {new_status}"
-
-                    except json.JSONDecodeError:
-                        continue
+        if await contracts_repository.update_commitment_status(user_id, commitment_id, CommitmentStatus(new_status)):
+            logger.info(f"Updated commitment {commitment_id} status to {new_status}")
+            return f"Commitment {commitment_id} status updated to {new_status}"
 
         return f"Commitment {commitment_id} not found"
     except Exception as e:
@@ -105,7 +67,7 @@ def update_commitment_status(commitment_id: str, new_status: str, user_id: str =
         return f"Failed to update commitment: {str(e)}"
 
 @tool("add_boundary")
-def add_boundary(description: str, context: str = "general", user_id: str = "1") -> str:
+async def add_boundary(description: str, context: str = "general", user_id: str = "1") -> str:
     """
     Add a boundary rule for what Athena will/won't do.
 
@@ -118,27 +80,9 @@ def add_boundary(description: str, context: str = "general", user_id: str = "1")
         Boundary ID for tracking
     """
     try:
-        boundary_id = f"boundary_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
-
-        boundary_data = {
-            "id": boundary_id,
-            "description": description,
-            "context": context,
-            "active": True,
-            "created_at": datetime.now().isoformat()
-        }
-
-        messages = [
-            {"role": "system", "content": f"BOUNDARY: {json.dumps(boundary_data)}"}
-        ]
-
-        metadata = {
-            "category": "contracts.boundaries",
-            "boundary_id": boundary_id,
-            "context": context
-        }
+        boundary_id = contracts_repository.new_id("boundary")
 
-        memory.add(messages, user_id=user_id, metadata=metadata)
+        await contracts_repository.add_boundary(user_id, boundary_id, description, context)
         logger.info(f"Added boundary {boundary_id}")
         return f"Boundary recorded: {boundary_id} - {description}"
     except Exception as e:
@@ -146,7 +90,7 @@ def add_boundary(description: str, context: str = "general", user_id: str = "1")
         return f"Failed to add boundary: {str(e)}"
 
 @tool("log_interpersonal_episode")
-def log_interpersonal_episode(
+async def log_interpersonal_episode(
     target: str,  # "user", "self", or "external"
     intensity: float,
     valence: float,
@@ -175,34 +119,20 @@ def log_interpersonal_episode(
         Episode ID for tracking
     """
     try:
-        episode_id = f"episode_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
-
-        episode_data = {
-            "id": episode_id,
-            "target": target,
-            "intensity": intensity,
-            "valence": valence,
-            "arousal": arousal,
-            "control": control,
-            "uncertainty": uncertainty,
-            "narrative": narrative,
-            "commitment_ids": commitment_ids or [],
-            "timestamp": datetime.now().isoformat(),
-            "resolved": False
-        }
-
-        messages = [
-            {"role": "system", "content": f"EPISODE: {json.dumps(episode_data)}"}
-        ]
-
-        metadata = {
-            "category": "episodes.interpersonal",
-            "episode_id": episode_id,
-            "target": target,
-            "intensity": intensity
-        }
-
-        memory.add(messages, user_id=user_id, metadata=metadata)
+        episode_id = contracts_repository.new_id("episode")
+
+        await contracts_repository.add_episode(
+            user_id,
+            episode_id,
+            target=Target(target),
+            intensity=intensity,
+            valence=valence,
+            arousal=arousal,
+            control=control,
+            uncertainty=uncertainty,
+            narrative=narrative,
+            commitment_ids=commitment_ids,
+        )
         logger.info(f"Logged interpersonal episode {episode_id}")
         return f"Episode logged: {episode_id} - {narrative}"
     except Exception as e:
@@ -210,7 +140,7 @@ def log_interpersonal_episode(
         return f"Failed to log episode: {str(e)}"
 
 @tool("search_episodes")
-def search_episodes(target: str = "", resolved: str = "false", limit: int = 10, user_id: str = "1") -> str:
+async def search_episodes(target: str = "", resolved: str = "false", limit: int = 10, user_id: str = "1") -> str:
     """
     Search for interpersonal episodes.
 
@@ -224,52 +154,31 @@ def search_episodes(target: str = "", resolved: str = "false", limit: int = 10,
         List of matching episodes
     """
     try:
-        query = "EPISODE"
-        if target:
-            query += f" target:{target}"
-
-        results = memory.search(query, user_id=user_id, limit=limit)
-
-        if not results:
-            return "No episodes found."
-
-        episode_texts = []
-        for i, result in enumerate(results, 1):
-            if isinstance(result, dict):
-                content = result.get("memory") or result.get("content") or str(result)
-                if "EPISODE:" in content:
-                    try:
-                        episode_json = content.split("EPISODE:", 1)[1].strip()
-                        episode = json.loads(episode_json)
-
-                        # Apply filters
-                        if target and episode.get("target") != target:
-                            continue
-                        if resolved != "all":
-                            episode_resolved = episode.get("resolved", False)
-                            if (resolved == "true") != episode_resolved:
-                                continue
-
-                        episode_texts.append(
-                            f"{i}. [{episode['id']}] Target: {episode['target']}, "
-                            f"Intensity: {episode['intensity']:.2f}, "
-                            f"V/A/C/U: {episode['valence']:.2f}/{episode['arousal']:.2f}/"
-                            f"{episode['control']:.2f}/{episode['uncertainty']:.2f}, "
-                            f"Narrative: {episode['narrative']}"
-                        )
-                    except json.JSONDecodeError:
-                        continue
-
-        if not episode_texts:
+        episodes = await contracts_repository.get_episodes(
+            user_id,
+            target=Target(target) if target else None,
+            resolved=None if resolved == "all" else resolved == "true",
+            limit=limit,
+        )
+
+        if not episodes:
             return f"No episodes found matching criteria."
 
+        episode_texts = [
+            f"{i}. [{episode.id}] Target: {episode.target.value}, "
+            f"Intensity: {episode.intensity:.2f}, "
+            f"V/A/C/U: {episode.valence:.2f}/{episode.arousal:.2f}/"
+            f"{episode.control:.2f}/{episode.uncertainty:.2f}, "
+            f"Narrative: {episode.narrative}"
+            for i, episode in enumerate(episodes, 1)
+        ]
         return f"Interpersonal Episodes:\n" + "\n".join(episode_texts)
     except Exception as e:
         logger.exception("Failed to search episodes")
         return f"Failed to search episodes: {str(e)}"
 
 @tool("resolve_episode")
-def resolve_episode(episode_id: str, user_id: str = "1") -> str:
+async def resolve_episode(episode_id: str, user_id: str = "1") -> str:
     """
     Mark an interpersonal episode as resolved.
 
@@ -281,27 +190,9 @@ def resolve_episode(episode_id: str, user_id: str = "1") -> str:
         Confirmation message
     """
     try:
-        results = memory.search(f"EPISODE {episode_id}", user_id=user_id, limit=5)
-
-        for result in results:
-            if isinstance(result, dict):
-                content = result.get("memory") or result.get("content") or str(result)
-                if "EPISODE:" in content and episode_id in content:
-                    try:
-                        episode_json = content.split("EPISODE:", 1)[1].strip()
-                        episode = json.loads(episode_json)
-                        episode["resolved"] = True
-
-                        new_content = f"EPISODE: {json.dumps(episode)}"
-                        memory_id = result.get("id") or result.get("_id")
-
-                        if memory_id:
-                            memory.update(memory_id, new_content)
-                            logger.info(f"Resolved episode {episode_id}")
-                            return f"Episode {episode_id} marked as resolved"
-
-                    except json.JSONDecodeError:
-                        continue
+        if await contracts_repository.resolve_episode(user_id, episode_id):
+            logger.info(f"Resolved episode {episode_id}")
+            return f"Episode {episode_id} marked as resolved"
 
         return f"Episode {episode_id} not found"
     except Exception as e:
@@ -2,13 +2,12 @@ from __future__ import annotations
 
 from typing import Any, Dict, List, Optional
 from datetime import datetime
-import json
 
 from athena_logging import get_logger
 from langchain_core.tools import tool
 
+from utils import contracts_repository
 from utils.memory_engine import memory
-from utils.emotional_engine import Commitment, Boundary, InterpersonalEpisode, CommitmentStatus, Target
 
 logger = get_logger(__name__)
 
@@ -191,7 +190,7 @@ def get_memory_categories(user_id: str = "1") -> str:
     return "Available categories (metadata-based): factual, episodic, procedural, evaluative (goals), contracts.commitments"
 
 @tool("add_commitment")
-def add_commitment(
+async def add_commitment(
     party: str,  # "user" or "athena"
     goal_id: str,
     promise: str,
@@ -203,38 +202,24 @@ def add_commitment(
     user_id: str = "1"
 ) -> str:
     """
-    Add a new commitment to memory for accountability tracking.
+    Add a new commitment for accountability tracking.
     """
     try:
-        commitment_id = f"commitment_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{party}"
-
-        commitment_data = {
-            "id": commitment_id,
-            "party": party,
-            "goal_id": goal_id,
-            "promise": promise,
-            "kpi": {kpi_name: kpi_value},
-            "due": due,
-            "created_at": datetime.now().isoformat(),
-            "status": "active",
-            "grace": {
+        commitment_id = contracts_repository.new_id(f"commitment_{party}")
+
+        await contracts_repository.add_commitment(
+            user_id,
+            commitment_id,
+            party=party,
+            goal_id=goal_id,
+            promise=promise,
+            kpi={kpi_name: kpi_value},
+            due=due,
+            grace={
                 "misses_before_nudge": misses_before_nudge,
                 "misses_before_pushback": misses_before_pushback
-            }
-        }
-
-        messages = [
-            {"role": "system", "content": f"COMMITMENT: {json.dumps(commitment_data)}"}
-        ]
-
-        metadata = {
-            "category": "contracts.commitments",
-            "commitment_id": commitment_id,
-            "party": party,
-            "status": "active"
-        }
-
-        memory.add(messages, user_id=user_id, metadata=metadata)
+            },
+        )
         logger.info(f"Added commitment {commitment_id} for {party}")
         return f"Commitment recorded: {commitment_id} - {party} promises '{promise}'"
     except Exception as e:
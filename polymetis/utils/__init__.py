@@ -1,5 +1,5 @@
 from .utils import *
 from .build_retriever import build_retriever
-from .archiving import archive_thread
+from .archiving import archive_thread, archive_pending, reset_watermark
 from .agent_restart import agentless_start, retrieve_existing_state
 from .memory_engine import memory
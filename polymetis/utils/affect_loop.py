@@ -2,9 +2,9 @@
 Enhanced affect loop with emotional attribution and commitment tracking
 """
 
+import asyncio
 from typing import List, Dict, Optional, Tuple
-from datetime import datetime
-import json
+from datetime import datetime, timedelta
 
 from athena_logging import get_logger
 
@@ -12,9 +12,9 @@ from .emotional_engine import (
     EmotionalState, Goal, Commitment, InterpersonalEpisode,
     appraise, map_emotional_state_to_style, generate_tone_templates,
     should_escalate_intensity,
-    Target, ResponseStyle, compute_commitment_signals, attribute_responsibility
+    Target, ResponseStyle, CommitmentStatus, compute_commitment_signals, attribute_responsibility
 )
-from .memory_engine import memory
+from . import contracts_repository
 from .mood_redis import set_current_mood
 
 logger = get_logger(__name__)
@@ -28,63 +28,42 @@ class AffectLoop:
         self._strict_sessions_today = 0
         self._last_session_time = None
 
-    def get_commitments(self) -> List[Commitment]:
-        """Retrieve active commitments from memory"""
+    async def get_commitments(self) -> List[Commitment]:
+        """Retrieve active commitments"""
         try:
-            results = memory.search("COMMITMENT status:active", user_id=self.user_id, limit=50)
-            commitments = []
-
-            for result in results:
-                if isinstance(result, dict):
-                    content = result.get("memory") or result.get("content", "")
-                    if "COMMITMENT:" in content:
-                        try:
-                            commitment_json = content.split("COMMITMENT:", 1)[1].strip()
-                            commitment_data = json.loads(commitment_json)
-                            commitment = Commitment(**commitment_data)
-                            commitments.append(commitment)
-                        except (json.JSONDecodeError, ValueError) as e:
-                            logger.warning(f"Failed to parse commitment: {e}")
-                            continue
-
-            return commitments
+            return await contracts_repository.get_commitments(self.user_id, status=CommitmentStatus.ACTIVE)
         except Exception as e:
             logger.exception("Failed to get commitments")
             return []
 
-    def get_recent_episodes(self, lookback_days: int = 7) -> List[InterpersonalEpisode]:
-        """Retrieve recent interpersonal episodes from memory"""
+    async def get_recent_episodes(self, lookback_days: int = 7) -> List[InterpersonalEpisode]:
+        """Retrieve recent interpersonal episodes, newest first"""
         try:
-            results = memory.search("EPISODE", user_id=self.user_id, limit=100)
-            episodes = []
-
-            for result in results:
-                if isinstance(result, dict):
-                    content = result.get("memory") or result.get("content", "")
-                    if "EPISODE:" in content:
-                        try:
-                            episode_json = content.split("EPISODE:", 1)[1].strip()
-                            episode_data = json.loads(episode_json)
-                            # Convert timestamp string back to datetime
-                            episode_data["timestamp"] = datetime.fromisoformat(episode_data["timestamp"])
-                            episode = InterpersonalEpisode(**episode_data)
-
-                            # Filter by lookback period
-                            if (datetime.now() - episode.timestamp).days <= lookback_days:
-                                episodes.append(episode)
-                        except (json.JSONDecodeError, ValueError) as e:
-                            logger.warning(f"Failed to parse episode: {e}")
-                            continue
-
-            return sorted(episodes, key=lambda x: x.timestamp, reverse=True)
+            since = datetime.now() - timedelta(days=lookback_days)
+            return await contracts_repository.get_episodes(self.user_id, since=since)
         except Exception as e:
             logger.exception("Failed to get episodes")
             return []
 
-    def update_emotional_state(self, goals: List[Goal]) -> EmotionalState:
+    async def update_commitment_status(self, commitment_id: str, status: CommitmentStatus) -> bool:
+        """Set a commitment's status; returns False if it doesn't exist"""
+        try:
+            return await contracts_repository.update_commitment_status(self.user_id, commitment_id, status)
+        except Exception as e:
+            logger.exception("Failed to update commitment status")
+            return False
+
+    async def resolve_episode(self, episode_id: str) -> bool:
+        """Mark an episode as resolved; returns False if it doesn't exist"""
+        try:
+            return await contracts_repository.resolve_episode(self.user_id, episode_id)
+        except Exception as e:
+            logger.exception("Failed to resolve episode")
+            return False
+
+    async def update_emotional_state(self, goals: List[Goal]) -> EmotionalState:
         """Update emotional state with goals and commitment context"""
-        commitments = self.get_commitments()
-        episodes = self.get_recent_episodes()
+        commitments, episodes = await asyncio.gather(self.get_commitments(), self.get_recent_episodes())
 
         # Update emotional state using enhanced appraisal
         self.emotional_state = appraise(
@@ -113,45 +92,32 @@ class AffectLoop:
         style = self.get_response_style()
         return generate_tone_templates(style, context or {})
 
-    def should_escalate(self) -> bool:
+    async def should_escalate(self) -> bool:
         """Check if emotional response should escalate"""
-        episodes = self.get_recent_episodes()
+        episodes = await self.get_recent_episodes()
         return should_escalate_intensity(self.emotional_state, episodes)
 
-    def log_interaction_episode(self,
+    async def log_interaction_episode(self,
                                narrative: str,
                                commitment_ids: List[str] = None,
                                resolved: bool = False) -> str:
         """Log a new interpersonal episode"""
         try:
-            episode_id = f"episode_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
-
-            episode_data = {
-                "id": episode_id,
-                "target": self.emotional_state.T.value,
-                "intensity": self.emotional_state.I,
-                "valence": self.emotional_state.V,
-                "arousal": self.emotional_state.A,
-                "control": self.emotional_state.C,
-                "uncertainty": self.emotional_state.U,
-                "narrative": narrative,
-                "commitment_ids": commitment_ids or [],
-                "timestamp": datetime.now().isoformat(),
-                "resolved": resolved
-            }
-
-            messages = [
-                {"role": "system", "content": f"EPISODE: {json.dumps(episode_data)}"}
-            ]
-
-            metadata = {
-                "category": "episodes.interpersonal",
-                "episode_id": episode_id,
-                "target": self.emotional_state.T.value,
-                "intensity": self.emotional_state.I
-            }
-
-            memory.add(messages, user_id=self.user_id, metadata=metadata)
+            episode_id = contracts_repository.new_id("episode")
+
+            await contracts_repository.add_episode(
+                self.user_id,
+                episode_id,
+                target=self.emotional_state.T,
+                intensity=self.emotional_state.I,
+                valence=self.emotional_state.V,
+                arousal=self.emotional_state.A,
+                control=self.emotional_state.C,
+                uncertainty=self.emotional_state.U,
+                narrative=narrative,
+                commitment_ids=commitment_ids,
+                resolved=resolved,
+            )
             logger.info(f"Logged interpersonal episode: {episode_id}")
             return episode_id
 
@@ -172,7 +138,7 @@ class AffectLoop:
         }
 
 
-    def get_system_behavioral_changes(self) -> Dict[str, any]:
+    async def get_system_behavioral_changes(self) -> Dict[str, any]:
         """Get system-level behavioral changes based on emotional state"""
         changes = {
             "search_horizon_multiplier": 1.0,
@@ -184,7 +150,7 @@ class AffectLoop:
         # High Arousal + User attribution + repeated breach → shorten search horizon
         if (self.emotional_state.A > 0.7 and
             self.emotional_state.T == Target.USER and
-            self.should_escalate()):
+            await self.should_escalate()):
             changes["search_horizon_multiplier"] = 0.6
             changes["quick_wins_priority"] = True
 
@@ -198,43 +164,29 @@ class AffectLoop:
 
         return changes
 
-def create_example_commitment(user_id: str = "1") -> str:
+async def create_example_commitment(user_id: str = "1") -> str:
     """Create an example commitment for demonstration"""
-    commitment_data = {
-        "id": "practice_polish_daily",
-        "party": "user",
-        "goal_id": "learn_pl",
-        "promise": "15m Polish drills on weekdays at 20:00",
-        "kpi": {"sessions_per_week": 5},
-        "due": "rolling",
-        "created_at": datetime.now().isoformat(),
-        "status": "active",
-        "grace": {"misses_before_nudge": 1, "misses_before_pushback": 3}
-    }
-
-    messages = [
-        {"role": "system", "content": f"COMMITMENT: {json.dumps(commitment_data)}"}
-    ]
-
-    metadata = {
-        "category": "contracts.commitments",
-        "commitment_id": commitment_data["id"],
-        "party": "user",
-        "status": "active"
-    }
-
-    memory.add(messages, user_id=user_id, metadata=metadata)
-    return commitment_data["id"]
+    commitment = await contracts_repository.add_commitment(
+        user_id,
+        "practice_polish_daily",
+        party="user",
+        goal_id="learn_pl",
+        promise="15m Polish drills on weekdays at 20:00",
+        kpi={"sessions_per_week": 5},
+        due="rolling",
+        grace={"misses_before_nudge": 1, "misses_before_pushback": 3},
+    )
+    return commitment.id
 
 # Usage example
-def demo_affect_loop():
+async def demo_affect_loop():
     """Demonstrate the enhanced affect loop"""
 
     # Initialize affect loop
     loop = AffectLoop(user_id="demo_user")
 
     # Create example commitment
-    commitment_id = create_example_commitment("demo_user")
+    commitment_id = await create_example_commitment("demo_user")
 
     # Create example goals
     goals = [
@@ -256,7 +208,7 @@ def demo_affect_loop():
     ]
 
     # Update emotional state
-    emotional_state = loop.update_emotional_state(goals)
+    emotional_state = await loop.update_emotional_state(goals)
 
     # Get response style
     style = loop.get_response_style()
@@ -270,13 +222,13 @@ def demo_affect_loop():
     template = loop.generate_response_template(context)
 
     # Log an episode
-    episode_id = loop.log_interaction_episode(
+    episode_id = await loop.log_interaction_episode(
         narrative="User missed scheduled Polish practice session",
         commitment_ids=[commitment_id]
     )
 
     # Check behavioral changes
-    changes = loop.get_system_behavioral_changes()
+    changes = await loop.get_system_behavioral_changes()
 
     print(f"Emotional State: {emotional_state}")
     print(f"Response Style: {style}")
@@ -285,4 +237,4 @@ def demo_affect_loop():
     print(f"System Changes: {changes}")
 
 if __name__ == "__main__":
-    demo_affect_loop()
+    asyncio.run(demo_affect_loop())
@@ -8,7 +8,7 @@ from langgraph.graph.state import RunnableConfig
 from langgraph.checkpoint.redis import AsyncRedisSaver
 from langchain_core.messages import BaseMessage
 
-from utils import checkpointer, archive_thread, BaseState
+from utils import checkpointer, archive_pending, reset_watermark, BaseState
 from athena_logging import get_logger
 
 logger = get_logger(__name__)
@@ -60,8 +60,8 @@ async def agentless_start(session_id: str, namespace: str = "global") -> bool:
     """
     Handle an agentless /start command by:
     1. Retrieving existing messages from checkpointer
-    2. Archiving them using archive_thread
-    3. Clearing the checkpointer state
+    2. Archiving the tail the background archiver hasn't reached yet
+    3. Clearing the checkpointer state and the archive watermark
     4. Returning True
 
     Args:
@@ -77,15 +77,17 @@ async def agentless_start(session_id: str, namespace: str = "global") -> bool:
         # Step 1: Retrieve existing state
         existing_state = await retrieve_existing_state(session_id, namespace)
 
-        # Step 2: Archive messages if state exists and has interesting messages
+        # Step 2: Archive messages if state exists and has interesting messages; most of the
+        # thread was archived in the background already, so only the tail is left to flush
         if existing_state and existing_state.interesting_messages:
-            logger.info(f"Archiving {len(existing_state.interesting_messages)} messages for session {session_id}")
-            await archive_thread(existing_state, namespace=namespace)
+            flushed = await archive_pending(existing_state, namespace=namespace)
+            logger.info(f"Archived {flushed} pending messages for session {session_id}")
         else:
             logger.info(f"No messages to archive for session {session_id}")
 
         # Step 3: Clear the checkpointer state
         await checkpointer.adelete_thread(str(session_id))
+        await reset_watermark(session_id, namespace=namespace)
         logger.info(f"Cleared checkpointer state for session {session_id}")
 
         # Step 4: Return True
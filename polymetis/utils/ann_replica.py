@@ -0,0 +1,350 @@
+"""
+Host-local, memory-mapped ANN replica of rag.docs for candidate generation.
+
+One refresher per host (scripts/ann_replica.py run) keeps a directory of files that every
+worker on the host maps read-only, so they share one copy through the page cache:
+
+  manifest.json          which snapshot and delta are current (swapped atomically)
+  snapshot-<gen>/        FAISS IVF index (opened with IO_FLAG_MMAP), vectors.npy, ids.npy,
+                         owners.npy: a full copy as of the snapshot's watermark
+  delta-<gen>-<seq>/     every row changed since that watermark (updated_at), rewritten on
+                         each refresh; delta rows shadow their snapshot copies
+
+Searches return candidate ids only. Mem0CompatiblePGVectorStore hydrates them from Postgres
+by primary key, so a deleted row (which the change feed can't see) just drops out. Once
+the delta grows past ANN_REPLICA_REBUILD_FRACTION of the snapshot, or the snapshot is older
+than ANN_REPLICA_REBUILD_SECONDS, the snapshot is rebuilt and deleted rows are compacted away.
+"""
+
+import json
+import math
+import os
+import shutil
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from athena_logging import get_logger
+from athena_models import engine
+from athena_settings import settings
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+logger = get_logger(__name__)
+
+ANN_REPLICA_ENABLED: bool = getattr(settings, "ANN_REPLICA_ENABLED", False)
+ANN_REPLICA_DIR: str = getattr(settings, "ANN_REPLICA_DIR", "/var/lib/athena/ann-replica")
+ANN_REPLICA_NPROBE: int = getattr(settings, "ANN_REPLICA_NPROBE", 16)
+# Owners with at most this many rows are searched exactly instead of through the IVF lists
+ANN_REPLICA_EXACT_ROWS: int = getattr(settings, "ANN_REPLICA_EXACT_ROWS", 20000)
+ANN_REPLICA_REBUILD_FRACTION: float = getattr(settings, "ANN_REPLICA_REBUILD_FRACTION", 0.1)
+ANN_REPLICA_REBUILD_SECONDS: int = getattr(settings, "ANN_REPLICA_REBUILD_SECONDS", 24 * 60 * 60)
+# How often readers check manifest.json for a newer snapshot/delta
+ANN_REPLICA_RELOAD_SECONDS: float = getattr(settings, "ANN_REPLICA_RELOAD_SECONDS", 2.0)
+# Rows newer than this may belong to transactions that haven't committed yet
+ANN_REPLICA_LAG_SECONDS: int = getattr(settings, "ANN_REPLICA_LAG_SECONDS", 30)
+# Readers ignore a replica whose refresher hasn't published for this long
+ANN_REPLICA_MAX_STALENESS_SECONDS: float = getattr(settings, "ANN_REPLICA_MAX_STALENESS_SECONDS", 60.0)
+# Candidates fetched from the replica per requested result, to cover rows deleted since
+ANN_REPLICA_OVERSAMPLE: int = getattr(settings, "ANN_REPLICA_OVERSAMPLE", 2)
+
+TABLE = "rag.docs"
+DIMS = 1536
+MANIFEST = "manifest.json"
+_FETCH_ROWS = 5000
+_NO_OWNER = -1
+
+
+# --- files ---------
+
+def _write_json_atomic(path: str, payload: Dict[str, Any]) -> None:
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(payload, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def _read_manifest(directory: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(os.path.join(directory, MANIFEST)) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+class _Part:
+    """One snapshot or delta directory, memory-mapped."""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(os.path.join(path, "meta.json")) as f:
+            self.meta: Dict[str, Any] = json.load(f)
+        mmap_mode = "r" if self.meta["rows"] else None  # zero-length arrays can't be mapped
+        self.vectors: np.ndarray = np.load(os.path.join(path, "vectors.npy"), mmap_mode=mmap_mode)
+        self.ids: np.ndarray = np.load(os.path.join(path, "ids.npy"), mmap_mode=mmap_mode)
+        self.owners: np.ndarray = np.load(os.path.join(path, "owners.npy"), mmap_mode=mmap_mode)
+        self.owner_codes: Dict[str, int] = self.meta.get("owner_codes", {})
+        self.index = None
+        if self.meta.get("index") == "ivf":
+            import faiss
+
+            # Inverted lists stay in the file and are paged in on demand, shared across processes
+            self.index = faiss.read_index(
+                os.path.join(path, "index.faiss"), faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY
+            )
+
+    def positions(self, owner: Optional[str]) -> Optional[np.ndarray]:
+        """Row positions of `owner`, or None for all rows."""
+        if owner is None:
+            return None
+        code = self.owner_codes.get(str(owner))
+        if code is None:
+            return np.zeros(0, dtype=np.int64)
+        return np.flatnonzero(self.owners == code)
+
+    def exact(self, query: np.ndarray, k: int, positions: Optional[np.ndarray]) -> Tuple[np.ndarray, np.ndarray]:
+        vectors = self.vectors if positions is None else self.vectors[positions]
+        if len(vectors) == 0:
+            return np.zeros(0, dtype=np.float32), np.zeros(0, dtype=np.int64)
+        distances = ((vectors - query) ** 2).sum(axis=1)
+        top = np.argsort(distances)[:k] if len(distances) <= k else np.argpartition(distances, k)[:k]
+        top = top[np.argsort(distances[top])]
+        rows = top if positions is None else positions[top]
+        return distances[top], rows
+
+    def search(self, query: np.ndarray, k: int, owner: Optional[str], nprobe: int) -> Tuple[np.ndarray, np.ndarray]:
+        """(squared L2 distances, row positions), best first."""
+        positions = self.positions(owner)
+        if self.index is None or (positions is not None and len(positions) <= ANN_REPLICA_EXACT_ROWS):
+            return self.exact(query, k, positions)
+
+        import faiss
+
+        if positions is None:
+            params = faiss.SearchParametersIVF(nprobe=nprobe)
+        else:
+            # A filtered probe needs more lists to find k of the owner's rows
+            params = faiss.SearchParametersIVF(nprobe=nprobe * 4, sel=faiss.IDSelectorBatch(positions))
+        distances, rows = self.index.search(query[None, :], k, params=params)
+        keep = rows[0] >= 0
+        return distances[0][keep], rows[0][keep]
+
+
+class AnnReplica:
+    """Read side: candidate ids from the current snapshot + delta, reloaded when the manifest changes."""
+
+    def __init__(self, directory: str = ANN_REPLICA_DIR, nprobe: int = ANN_REPLICA_NPROBE):
+        self.directory = directory
+        self.nprobe = nprobe
+        self._lock = threading.Lock()
+        self._checked_at = 0.0
+        self._published_at = 0.0
+        self._manifest: Optional[Dict[str, Any]] = None
+        self._snapshot: Optional[_Part] = None
+        self._delta: Optional[_Part] = None
+        self._delta_ids: set = set()
+
+    def _refresh(self) -> bool:
+        now = time.monotonic()
+        with self._lock:
+            if now - self._checked_at < ANN_REPLICA_RELOAD_SECONDS:
+                return self._snapshot is not None
+            self._checked_at = now
+            try:
+                self._published_at = os.path.getmtime(os.path.join(self.directory, MANIFEST))
+                manifest = _read_manifest(self.directory)
+                if manifest is None:
+                    return False
+                if manifest != self._manifest:
+                    snapshot = self._snapshot
+                    if snapshot is None or manifest["snapshot"] != self._manifest["snapshot"]:
+                        snapshot = _Part(os.path.join(self.directory, manifest["snapshot"]))
+                    delta = _Part(os.path.join(self.directory, manifest["delta"])) if manifest.get("delta") else None
+                    self._snapshot, self._delta, self._manifest = snapshot, delta, manifest
+                    self._delta_ids = set(delta.ids.tolist()) if delta is not None else set()
+            except FileNotFoundError:
+                return False
+            except Exception:
+                logger.warning(f"ANN replica at {self.directory} could not be loaded", exc_info=True)
+            return self._snapshot is not None
+
+    def search(self, embedding: List[float], k: int, owner: Optional[str] = None) -> Optional[List[str]]:
+        """Up to k candidate ids nearest to `embedding` (optionally one owner's), or None if unavailable."""
+        if not self._refresh():
+            return None
+        if time.time() - self._published_at > ANN_REPLICA_MAX_STALENESS_SECONDS:
+            return None  # refresher is down; recent writes would be invisible
+        snapshot, delta, delta_ids = self._snapshot, self._delta, self._delta_ids
+        query = np.asarray(embedding, dtype=np.float32)
+
+        # Over-fetch from the snapshot so rows shadowed by the delta don't leave us short
+        distances, rows = snapshot.search(query, k + min(len(delta_ids), k), owner, self.nprobe)
+        found = [(float(d), str(snapshot.ids[r])) for d, r in zip(distances, rows)]
+        if delta_ids:
+            found = [(d, i) for d, i in found if i not in delta_ids]
+            delta_distances, delta_rows = delta.exact(query, k, delta.positions(owner))
+            found += [(float(d), str(delta.ids[r])) for d, r in zip(delta_distances, delta_rows)]
+        found.sort()
+        return [doc_id for _, doc_id in found[:k]]
+
+    @property
+    def status(self) -> Optional[Dict[str, Any]]:
+        self._refresh()
+        return dict(self._manifest) if self._manifest else None
+
+
+# --- write side ---------
+
+async def _fetch_rows(db: AsyncEngine, since: Optional[datetime] = None):
+    """(ids, owners, vectors) chunks of rag.docs, optionally only rows changed since `since`."""
+    columns = (
+        f"SELECT langchain_id AS id, langchain_metadata->>'user_id' AS owner, "
+        f"CAST(embedding AS real[]) AS embedding FROM {TABLE} "
+    )
+    async with db.connect() as conn:
+        if since is not None:
+            # Bounded by ANN_REPLICA_REBUILD_FRACTION, and served by docs_updated_at_idx
+            result = await conn.stream(text(columns + "WHERE updated_at > :since"), {"since": since})
+            async for rows in result.mappings().partitions(_FETCH_ROWS):
+                yield (
+                    [row["id"] for row in rows],
+                    [row["owner"] for row in rows],
+                    np.asarray([row["embedding"] for row in rows], dtype=np.float32),
+                )
+            return
+
+        stmt = text(columns + "WHERE langchain_id > :after ORDER BY langchain_id LIMIT :limit")
+        after = ""
+        while True:
+            rows = (await conn.execute(stmt, {"after": after, "limit": _FETCH_ROWS})).mappings().all()
+            if not rows:
+                return
+            yield (
+                [row["id"] for row in rows],
+                [row["owner"] for row in rows],
+                np.asarray([row["embedding"] for row in rows], dtype=np.float32),
+            )
+            after = rows[-1]["id"]
+
+
+async def _write_part(db: AsyncEngine, path: str, since: Optional[datetime], build_index: bool) -> Dict[str, Any]:
+    """Write one snapshot/delta directory under a temporary name, then rename it into place."""
+    tmp = f"{path}.tmp"
+    shutil.rmtree(tmp, ignore_errors=True)
+    os.makedirs(tmp)
+
+    ids: List[str] = []
+    owners: List[str] = []
+    # Spill vectors to disk chunk by chunk; the whole table never has to fit in memory
+    with open(os.path.join(tmp, "vectors.f32"), "wb") as raw:
+        async for chunk_ids, chunk_owners, vectors in _fetch_rows(db, since):
+            ids.extend(chunk_ids)
+            owners.extend(chunk_owners)
+            raw.write(vectors.tobytes())
+
+    rows = len(ids)
+    if rows:
+        vectors = np.lib.format.open_memmap(
+            os.path.join(tmp, "vectors.npy"), mode="w+", dtype=np.float32, shape=(rows, DIMS)
+        )
+        vectors[:] = np.memmap(os.path.join(tmp, "vectors.f32"), dtype=np.float32, mode="r", shape=(rows, DIMS))
+        vectors.flush()
+    else:
+        vectors = np.zeros((0, DIMS), dtype=np.float32)
+        np.save(os.path.join(tmp, "vectors.npy"), vectors)
+    os.remove(os.path.join(tmp, "vectors.f32"))
+
+    owner_codes: Dict[str, int] = {}
+    codes = np.asarray(
+        [_NO_OWNER if o is None else owner_codes.setdefault(str(o), len(owner_codes)) for o in owners],
+        dtype=np.int32,
+    )
+    np.save(os.path.join(tmp, "ids.npy"), np.asarray(ids, dtype=str if ids else "<U1"))
+    np.save(os.path.join(tmp, "owners.npy"), codes)
+
+    meta: Dict[str, Any] = {"rows": rows, "owner_codes": owner_codes, "index": "exact"}
+    if build_index and rows > ANN_REPLICA_EXACT_ROWS:
+        import faiss
+
+        nlist = max(1, min(65536, int(4 * math.sqrt(rows))))
+        quantizer = faiss.IndexFlatL2(DIMS)
+        index = faiss.IndexIVFFlat(quantizer, DIMS, nlist, faiss.METRIC_L2)
+        sample = np.random.default_rng(0).choice(rows, size=min(rows, nlist * 64), replace=False)
+        index.train(np.ascontiguousarray(vectors[np.sort(sample)]))
+        for start in range(0, rows, 50000):
+            index.add(np.ascontiguousarray(vectors[start:start + 50000]))
+        faiss.write_index(index, os.path.join(tmp, "index.faiss"))
+        meta.update({"index": "ivf", "nlist": nlist})
+
+    _write_json_atomic(os.path.join(tmp, "meta.json"), meta)
+    shutil.rmtree(path, ignore_errors=True)
+    os.rename(tmp, path)
+    return meta
+
+
+def _collect_garbage(directory: str, manifest: Dict[str, Any], grace_seconds: float = 600) -> None:
+    """Remove parts the manifest no longer points at (open mmaps keep their inodes alive)."""
+    live = {manifest.get("snapshot"), manifest.get("delta")}
+    for name in os.listdir(directory):
+        path = os.path.join(directory, name)
+        if name in live or not (name.startswith("snapshot-") or name.startswith("delta-")):
+            continue
+        if time.time() - os.path.getmtime(path) > grace_seconds:
+            shutil.rmtree(path, ignore_errors=True)
+
+
+async def _db_now(db: AsyncEngine) -> datetime:
+    async with db.connect() as conn:
+        return (await conn.execute(text("SELECT now()"))).scalar_one()
+
+
+async def rebuild(directory: str = ANN_REPLICA_DIR, db: AsyncEngine = engine) -> Dict[str, Any]:
+    """Build a fresh snapshot (and an empty delta) and make it current."""
+    os.makedirs(directory, exist_ok=True)
+    started = time.perf_counter()
+    # Taken before the scan: anything written after it is picked up by the next delta
+    watermark = await _db_now(db) - timedelta(seconds=ANN_REPLICA_LAG_SECONDS)
+    generation = datetime.now(timezone.utc).strftime("%Y%m%d%H%M%S")
+    snapshot = f"snapshot-{generation}"
+    meta = await _write_part(db, os.path.join(directory, snapshot), None, build_index=True)
+
+    manifest = {
+        "table": TABLE,
+        "snapshot": snapshot,
+        "snapshot_rows": meta["rows"],
+        "snapshot_built_at": time.time(),
+        "watermark": watermark.isoformat(),
+        "delta": None,
+        "delta_rows": 0,
+    }
+    _write_json_atomic(os.path.join(directory, MANIFEST), manifest)
+    _collect_garbage(directory, manifest)
+    logger.info(f"ANN replica snapshot {snapshot}: {meta['rows']} rows ({meta['index']}) in {time.perf_counter() - started:.1f}s")
+    return manifest
+
+
+async def refresh(directory: str = ANN_REPLICA_DIR, db: AsyncEngine = engine) -> Dict[str, Any]:
+    """Rewrite the delta from the snapshot watermark, or rebuild the snapshot when it's due."""
+    manifest = _read_manifest(directory)
+    if manifest is None or time.time() - manifest["snapshot_built_at"] > ANN_REPLICA_REBUILD_SECONDS:
+        return await rebuild(directory, db)
+
+    since = datetime.fromisoformat(manifest["watermark"])
+    delta = f"delta-{manifest['snapshot'].split('-', 1)[1]}-{int(time.time() * 1000)}"
+    meta = await _write_part(db, os.path.join(directory, delta), since, build_index=False)
+    if meta["rows"] > max(1, manifest["snapshot_rows"]) * ANN_REPLICA_REBUILD_FRACTION:
+        shutil.rmtree(os.path.join(directory, delta), ignore_errors=True)
+        return await rebuild(directory, db)
+
+    if not meta["rows"]:
+        shutil.rmtree(os.path.join(directory, delta), ignore_errors=True)
+        delta = None
+    manifest = {**manifest, "delta": delta, "delta_rows": meta["rows"]}
+    _write_json_atomic(os.path.join(directory, MANIFEST), manifest)
+    _collect_garbage(directory, manifest)
+    logger.debug(f"ANN replica delta {delta}: {meta['rows']} rows")
+    return manifest
@@ -0,0 +1,132 @@
+"""
+Duplicate detection for archive_thread.
+
+Every archived message used to be checked with two PostgresStore searches of its own (an
+exact text filter and a vector query), so a 200-message thread cost 400 round-trips before
+anything was written. Here the whole thread is checked at once:
+
+  exact     a Redis set of content hashes per namespace (DB 1): one SMISMEMBER for all
+            candidates, one SADD for whatever gets archived
+  semantic  one embedding batch for the candidates, then one SQL statement that finds each
+            candidate's nearest archived message of the same role (LATERAL over the
+            store_vectors HNSW index); candidates within the thread are compared in NumPy
+
+Messages archived before the hash set existed are still caught by the semantic pass.
+"""
+
+import hashlib
+from typing import List, Sequence
+
+import numpy as np
+import redis.asyncio as aioredis
+from athena_logging import get_logger
+from athena_settings import settings
+from sqlalchemy import text
+
+from .db import engine
+from .utils import embeddings
+
+logger = get_logger(__name__)
+
+# Cosine similarity at which a message counts as already archived
+ARCHIVE_DUPLICATE_SIMILARITY: float = getattr(settings, "ARCHIVE_DUPLICATE_SIMILARITY", 0.95)
+
+_NEAREST_ARCHIVED = text(
+    "SELECT c.idx, nn.similarity "
+    "FROM unnest(CAST(:embeddings AS text[]), CAST(:roles AS text[])) WITH ORDINALITY AS c(embedding, role, idx) "
+    "CROSS JOIN LATERAL ("
+    "  SELECT 1 - (sv.embedding <=> CAST(c.embedding AS vector)) AS similarity "
+    "  FROM graph.store_vectors sv JOIN graph.store s ON s.prefix = sv.prefix AND s.key = sv.key "
+    "  WHERE sv.prefix = :prefix AND s.value->>'role' = c.role "
+    "  ORDER BY sv.embedding <=> CAST(c.embedding AS vector) LIMIT 1"
+    ") nn"
+)
+
+
+def content_hash(content: str) -> str:
+    return hashlib.sha1(content.encode()).hexdigest()
+
+
+def _hash_key(namespace: Sequence[str]) -> str:
+    return f"archive:hashes:{_prefix(namespace)}"
+
+
+def _prefix(namespace: Sequence[str]) -> str:
+    # The text PostgresStore stores for the namespace handed to aput
+    return ".".join(namespace)
+
+
+def _client() -> aioredis.Redis:
+    # Per call: Celery tasks each get a fresh event loop (asyncio.run)
+    return aioredis.Redis.from_url(f"redis://{settings.REDIS_URL}/1", decode_responses=True)
+
+
+async def filter_new(contents: List[str], roles: List[str], namespace: Sequence[str]) -> List[bool]:
+    """For each message, whether it is new to the namespace's archive (and to the earlier ones in this batch)."""
+    if not contents:
+        return []
+    keep = [True] * len(contents)
+    hashes = [content_hash(c) for c in contents]
+
+    # Exact duplicates, already archived or repeated within the batch
+    client = _client()
+    try:
+        archived = await client.smismember(_hash_key(namespace), hashes)
+    except Exception as e:
+        logger.warning(f"Archive hash lookup failed ({e}); relying on the semantic check")
+        archived = [False] * len(contents)
+    finally:
+        await client.aclose()
+    seen = set()
+    for i, (digest, known) in enumerate(zip(hashes, archived)):
+        if known or digest in seen:
+            keep[i] = False
+        seen.add(digest)
+
+    candidates = [i for i in range(len(contents)) if keep[i]]
+    if not candidates:
+        return keep
+
+    # Semantic duplicates: one embedding batch (reused by the store's own indexing) and one query
+    vectors = np.asarray(await embeddings.aembed_documents([contents[i] for i in candidates]), dtype=np.float32)
+    async with engine.connect() as conn:
+        rows = (
+            await conn.execute(
+                _NEAREST_ARCHIVED,
+                {
+                    "embeddings": [str(v.tolist()) for v in vectors],
+                    "roles": [roles[i] for i in candidates],
+                    "prefix": _prefix(namespace),
+                },
+            )
+        ).all()
+    for idx, similarity in rows:
+        if similarity is not None and similarity >= ARCHIVE_DUPLICATE_SIMILARITY:
+            keep[candidates[idx - 1]] = False
+
+    # Near-duplicates inside the thread: keep the first of each same-role group
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    unit = vectors / np.where(norms == 0, 1.0, norms)
+    similarity = unit @ unit.T
+    kept: List[int] = []
+    for row, i in enumerate(candidates):
+        if not keep[i]:
+            continue
+        if any(roles[candidates[k]] == roles[i] and similarity[row, k] >= ARCHIVE_DUPLICATE_SIMILARITY for k in kept):
+            keep[i] = False
+            continue
+        kept.append(row)
+    return keep
+
+
+async def remember(contents: List[str], namespace: Sequence[str]) -> None:
+    """Add archived messages to the namespace's hash set."""
+    if not contents:
+        return
+    client = _client()
+    try:
+        await client.sadd(_hash_key(namespace), *(content_hash(c) for c in contents))
+    except Exception as e:
+        logger.warning(f"Failed to record archived message hashes: {e}")
+    finally:
+        await client.aclose()
@@ -0,0 +1,109 @@
+"""
+Background incremental archiving of conversation threads.
+
+Threads used to be archived only on /start, so the whole history went through dedup,
+the vector stores and memory extraction in one burst while the user waited for the fresh
+session. Now every reply is counted, and a Celery task archives the messages past the
+thread's watermark (see archiving.archive_pending):
+
+  every N turns   once ARCHIVE_EVERY_TURNS replies have piled up
+  when idle       ARCHIVE_IDLE_SECONDS after a reply that no other reply followed
+
+Idle runs are debounced: a thread has at most one pending at a time (its ":scheduled"
+key), and a run that finds newer turns reschedules itself for the remaining time instead
+of every reply leaving its own ETA task in the workers.
+
+/start then only has to flush the few messages since the last run.
+"""
+
+import time
+from typing import Optional
+
+import redis.asyncio as aioredis
+from athena_celery import shared_task
+from athena_logging import get_logger
+from athena_settings import settings
+
+from utils.agent_restart import retrieve_existing_state
+from utils.archiving import archive_pending
+
+logger = get_logger(__name__)
+
+ARCHIVE_EVERY_TURNS: int = getattr(settings, "ARCHIVE_EVERY_TURNS", 10)
+ARCHIVE_IDLE_SECONDS: int = getattr(settings, "ARCHIVE_IDLE_SECONDS", 15 * 60)
+# Turn bookkeeping for a thread nobody writes to any more
+_TURN_KEYS_TTL_SECONDS = 7 * 24 * 60 * 60
+
+
+def _client() -> aioredis.Redis:
+    # Per call: Celery tasks each get a fresh event loop (asyncio.run)
+    return aioredis.Redis.from_url(f"redis://{settings.REDIS_URL}/1", decode_responses=True)
+
+
+def _keys(namespace: str, session_id) -> tuple:
+    prefix = f"archive:turns:{namespace}:{session_id}"
+    return prefix, f"{prefix}:last", f"{prefix}:scheduled"
+
+
+async def note_turn(session_id, namespace: str = "telegram") -> None:
+    """Count a finished turn and schedule the archive runs it may call for."""
+    turns_key, last_key, scheduled_key = _keys(namespace, session_id)
+    client = _client()
+    try:
+        pipe = client.pipeline()
+        pipe.incr(turns_key)
+        pipe.expire(turns_key, _TURN_KEYS_TTL_SECONDS)
+        pipe.set(last_key, time.time_ns(), ex=_TURN_KEYS_TTL_SECONDS)
+        pipe.set(scheduled_key, 1, nx=True, ex=ARCHIVE_IDLE_SECONDS)
+        turns, _, _, schedule_idle = await pipe.execute()
+    except Exception as e:
+        logger.warning(f"Failed to record turn for archiving session {session_id}: {e}")
+        return
+    finally:
+        await client.aclose()
+
+    kwargs = {"session_id": str(session_id), "namespace": namespace}
+    try:
+        if turns >= ARCHIVE_EVERY_TURNS:
+            incremental_archive_task.delay(**kwargs)
+        if schedule_idle:
+            incremental_archive_task.apply_async(kwargs={**kwargs, "idle": True}, countdown=ARCHIVE_IDLE_SECONDS)
+    except Exception as e:
+        # /start still flushes whatever was not archived
+        logger.warning(f"Failed to schedule archiving for session {session_id}: {e}")
+
+
+async def archive_incrementally(session_id: str, namespace: str = "telegram", idle: bool = False) -> Optional[int]:
+    """Archive the thread's complete turns past its watermark; None when skipped."""
+    turns_key, last_key, scheduled_key = _keys(namespace, session_id)
+    client = _client()
+    try:
+        if idle:
+            last = await client.get(last_key)
+            remaining = ARCHIVE_IDLE_SECONDS - (time.time_ns() - int(last or 0)) / 1e9
+            if remaining > 1:
+                # Not idle yet: wait out the latest turn, still as the thread's only idle run
+                countdown = int(remaining) + 1
+                await client.set(scheduled_key, 1, ex=countdown + ARCHIVE_IDLE_SECONDS)
+                incremental_archive_task.apply_async(
+                    kwargs={"session_id": session_id, "namespace": namespace, "idle": True}, countdown=countdown
+                )
+                return None
+            await client.delete(scheduled_key)
+        await client.delete(turns_key)
+    finally:
+        await client.aclose()
+
+    state = await retrieve_existing_state(session_id, namespace)
+    if state is None:
+        return None
+    # A run already in progress covers this one
+    archived = await archive_pending(state, namespace=namespace, complete_only=True, blocking=False)
+    if archived:
+        logger.info(f"Incrementally archived {archived} messages for session {session_id}")
+    return archived
+
+
+@shared_task(name="incremental_archive_task")
+async def incremental_archive_task(**kwargs):
+    return await archive_incrementally(**kwargs)
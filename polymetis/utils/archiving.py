@@ -1,39 +1,72 @@
+from utils import BaseState, embeddings, store, vectorstore
 import asyncio
-from utils import BaseState, store, vectorstore
 import time
+from typing import List, Optional, Set
+import redis.asyncio as aioredis
 from langchain_core.messages import BaseMessage, HumanMessage, AIMessage
+from langgraph.store.base import PutOp
 from athena_logging import get_logger
-from utils.memory_engine import store_conversation_async
+from athena_settings import settings
+from utils.archive_dedup import filter_new, remember
+from utils.memory_ingest import ingest_conversations
 
 logger = get_logger(__name__)
 
-async def should_archive(message: BaseMessage, namespace: str):
-
-    if len(message.content) < 140:
-        return False
-
-    condition_1 = store.asearch(namespace,
-        filter={"text": message.content},
-        limit=1)
-
-    condition_2 = store.asearch(namespace,
-        query=message.content,
-        filter={"role": message.type},  # Only compare with same message type
-        limit=1)  # Get top 3 similar messages to check for redundancy
-
-    return not any(await asyncio.gather(condition_1, condition_2))
-
+# Watermarks outlive idle threads for a while; a lost one only means a re-run of the dedup pass
+ARCHIVE_WATERMARK_TTL_SECONDS: int = getattr(settings, "ARCHIVE_WATERMARK_TTL_SECONDS", 30 * 24 * 60 * 60)
+ARCHIVE_LOCK_SECONDS: int = getattr(settings, "ARCHIVE_LOCK_SECONDS", 10 * 60)
+# How long /start waits for a background run; kept well under the Celery soft time limit
+ARCHIVE_START_LOCK_WAIT_SECONDS: int = getattr(settings, "ARCHIVE_START_LOCK_WAIT_SECONDS", 20)
+# Messages embedded and written per round trip
+ARCHIVE_WRITE_BATCH_SIZE: int = getattr(settings, "ARCHIVE_WRITE_BATCH_SIZE", 256)
+
+def worth_archiving(message: BaseMessage) -> bool:
+    return len(message.content) >= 140
+
+async def select_for_archive(messages: List[BaseMessage], namespace: str) -> Set[int]:
+    """Indices of the messages to archive: long enough, and neither exact nor near duplicates."""
+    candidates = [idx for idx, msg in enumerate(messages) if worth_archiving(msg)]
+    keep = await filter_new(
+        [messages[idx].content for idx in candidates],
+        [messages[idx].type for idx in candidates],  # Only compare with same message type
+        namespace,
+    )
+    return {idx for idx, new in zip(candidates, keep) if new}
+
+
+async def write_archive(keys: List[str], texts: List[str], metadatas: List[dict], namespace: str) -> None:
+    """
+    Write archived messages to the PostgresStore and the RAG vectorstore, a batch at a time.
+    Each batch is embedded once (the store re-embeds through the same cache, so it only gets
+    hits) and both writes run concurrently; neither blocks the event loop.
+    """
+    for start in range(0, len(texts), ARCHIVE_WRITE_BATCH_SIZE):
+        end = start + ARCHIVE_WRITE_BATCH_SIZE
+        batch_texts, batch_metadatas = texts[start:end], metadatas[start:end]
+        vectors = await embeddings.aembed_documents(batch_texts)
+        ops = [
+            PutOp(namespace=namespace, key=key, value={**metadata, "text": content})
+            for key, content, metadata in zip(keys[start:end], batch_texts, batch_metadatas)
+        ]
+        await asyncio.gather(
+            store.abatch(ops),
+            vectorstore.aadd_embeddings(texts=batch_texts, embeddings=vectors, metadatas=batch_metadatas),
+        )
 
 
-async def archive_thread(state: BaseState, namespace: str= 'global'):
+async def archive_thread(state: BaseState, namespace: str= 'global', messages: Optional[List[BaseMessage]] = None):
     texts = []
     metadatas = []
     conversation_pairs = []
 
-    # First pass: Archive to vector store and extract conversation pairs
-    messages = state.interesting_messages
+    # First pass: select messages to archive and extract conversation pairs
+    if messages is None:
+        messages = state.interesting_messages
+    # One dedup pass for the whole thread instead of two store searches per message
+    selected = await select_for_archive(messages, namespace)
+    keys = []
     for idx, msg in enumerate(messages):
-        if not await should_archive(msg, namespace):
+        if idx not in selected:
             continue
         timestamp_ms = int(time.time() * 1000)
         metadata = {
@@ -42,11 +75,7 @@ async def archive_thread(state: BaseState, namespace: str= 'global'):
             "session_id": state.session_id,
             "ts": timestamp_ms,
         }
-        await store.aput(
-            namespace=namespace,
-            key=f"{namespace}:{state.session_id}:{timestamp_ms}:{idx}",
-            value={**metadata, "text": msg.content}
-        )
+        keys.append(f"{namespace}:{state.session_id}:{timestamp_ms}:{idx}")
         texts.append(msg.content)
         metadatas.append(metadata)
 
@@ -64,28 +93,102 @@ async def archive_thread(state: BaseState, namespace: str= 'global'):
                     })
                     break
 
-    # Store to vector store (existing functionality)
-    vectorstore.add_texts(texts, metadatas=metadatas)
+    # Store and vectorstore written together in bulk, off the event loop
+    await write_archive(keys, texts, metadatas, namespace)
+    await remember(texts, namespace)
 
-    # Batch store conversations to memory (NEW: replaces real-time storage)
+    # Batch store conversations to memory: a few extraction calls for the whole thread
+    # instead of one mem0 add (extraction + update decision) per pair
     if conversation_pairs:
         logger.info(f"Storing {len(conversation_pairs)} conversation pairs to memory during archiving")
-        try:
-            # Process all conversations in parallel using thread pool (much more efficient)
-            tasks = []
-            for pair in conversation_pairs:
-                task = store_conversation_async(
-                    pair["user_message"],
-                    pair["assistant_message"],
-                    pair["user_id"]
-                )
-                tasks.append(task)
-
-            # Execute all memory storage operations in parallel
-            await asyncio.gather(*tasks)
+        counts = await ingest_conversations(conversation_pairs, str(state.session_id))
+        if counts is not None:
             logger.info(f"Successfully batch-stored {len(conversation_pairs)} conversations to memory")
-        except Exception as e:
-            logger.exception(f"Failed to batch store conversations to memory: {e}")
 
     logger.info(f"Archived {len(texts)} messages and {len(conversation_pairs)} conversations for session {state.session_id}")
 
+
+# --- incremental archiving ---------
+#
+# A per-thread watermark in Redis (DB 1) holds the id of the last archived message, so the
+# background task and /start only ever archive what came after it. While a run is in
+# progress, "<watermark>:inflight" holds the id of the last message it covers.
+
+def _client() -> aioredis.Redis:
+    # Per call: Celery tasks each get a fresh event loop (asyncio.run)
+    return aioredis.Redis.from_url(f"redis://{settings.REDIS_URL}/1", decode_responses=True)
+
+
+def _watermark_key(namespace: str, session_id) -> str:
+    return f"archive:watermark:{namespace}:{session_id}"
+
+
+def pending_messages(messages: List[BaseMessage], watermark: Optional[str], complete_only: bool = False) -> List[BaseMessage]:
+    """
+    Messages after the watermark. With complete_only, the tail stops at the last AI reply so
+    a human message is never archived before the answer it pairs with.
+    """
+    start = 0
+    if watermark:
+        ids = [msg.id for msg in messages]
+        # An unknown watermark (history rewritten) falls back to the whole thread; dedup skips repeats
+        start = ids.index(watermark) + 1 if watermark in ids else 0
+    tail = messages[start:]
+    if complete_only:
+        last_reply = max((idx for idx, msg in enumerate(tail) if msg.type == "ai"), default=-1)
+        tail = tail[:last_reply + 1]
+    return tail
+
+
+async def archive_pending(
+    state: BaseState,
+    namespace: str = 'global',
+    complete_only: bool = False,
+    blocking: bool = True,
+) -> Optional[int]:
+    """
+    Archive the thread's messages past its watermark and advance it.
+    Returns the number of messages looked at, or None when another run holds the thread
+    (only when blocking=False). A blocking call waits ARCHIVE_START_LOCK_WAIT_SECONDS for
+    that run, then archives whatever lies past it without touching the watermark.
+    """
+    client = _client()
+    key = _watermark_key(namespace, state.session_id)
+    lock = client.lock(f"{key}:lock", timeout=ARCHIVE_LOCK_SECONDS, blocking_timeout=ARCHIVE_START_LOCK_WAIT_SECONDS)
+    try:
+        if not await lock.acquire(blocking=blocking):
+            if not blocking:
+                return None
+            # Still running: leave its messages to it and only take the ones it didn't see
+            covered = await client.get(f"{key}:inflight") or await client.get(key)
+            tail = pending_messages(state.interesting_messages, covered, complete_only)
+            if tail:
+                await archive_thread(state, namespace=namespace, messages=tail)
+            return len(tail)
+        try:
+            tail = pending_messages(state.interesting_messages, await client.get(key), complete_only)
+            if not tail:
+                return 0
+            await client.set(f"{key}:inflight", tail[-1].id, ex=ARCHIVE_LOCK_SECONDS)
+            await archive_thread(state, namespace=namespace, messages=tail)
+            await client.set(key, tail[-1].id, ex=ARCHIVE_WATERMARK_TTL_SECONDS)
+            return len(tail)
+        finally:
+            try:
+                await client.delete(f"{key}:inflight")
+                await lock.release()
+            except Exception as e:
+                logger.warning(f"Archive lock for session {state.session_id} expired before release: {e}")
+    finally:
+        await client.aclose()
+
+
+async def reset_watermark(session_id, namespace: str = 'global') -> None:
+    """Forget the thread's watermark once its checkpoint is gone."""
+    client = _client()
+    try:
+        await client.delete(_watermark_key(namespace, session_id))
+    except Exception as e:
+        logger.warning(f"Failed to reset archive watermark for session {session_id}: {e}")
+    finally:
+        await client.aclose()
@@ -5,6 +5,8 @@ from langchain_community.cross_encoders import HuggingFaceCrossEncoder
 from langchain_cohere import CohereRerank
 from langchain_postgres import PGVectorStore
 from .mem0_compatible_pgvectorstore import Mem0CompatiblePGVectorStore
+from .hybrid_search import HybridRetriever
+from .reranker_service import RERANKER_SERVICE_SOCKET, RerankerServiceCompressor
 from athena_logging import get_logger
 from athena_settings import settings
 
@@ -12,17 +14,44 @@ logger = get_logger(__name__)
 
 
 
-def build_retriever(vectorstore: Mem0CompatiblePGVectorStore) -> VectorStoreRetriever | ContextualCompressionRetriever:
+def build_retriever(
+    vectorstore: Mem0CompatiblePGVectorStore,
+    filter: dict | None = None,
+) -> VectorStoreRetriever | HybridRetriever | ContextualCompressionRetriever:
+    """
+    Build the RAG retriever. `filter` is an equality filter on metadata keys
+    (e.g. {"user_id": "42", "category": "evaluative"}) pushed into the vector query.
+    """
     search_type = settings.RETRIEVAL_SEARCH_TYPE
     k = settings.RETRIEVAL_K
     fetch_k = settings.RETRIEVAL_FETCH_K
     lambda_mult = settings.RETRIEVAL_MMR_LAMBDA
+    ef_search = getattr(settings, "RETRIEVAL_EF_SEARCH", None)
+    quantization = getattr(settings, "RETRIEVAL_QUANTIZATION", None)
 
-    base_kwargs = {"k": k}
-    if search_type == "mmr":
-        base_kwargs.update({"fetch_k": fetch_k, "lambda_mult": lambda_mult})
+    if search_type == "hybrid":
+        # Vector + full-text candidates fused by RRF; exact terms no longer need a large fetch_k
+        base: HybridRetriever = HybridRetriever(
+            vectorstore=vectorstore,
+            k=k,
+            candidates=getattr(settings, "RETRIEVAL_HYBRID_CANDIDATES", fetch_k),
+            rrf_k=getattr(settings, "RETRIEVAL_RRF_K", 60),
+            filter=filter,
+            ef_search=ef_search,
+            quantization=quantization,
+        )
+    else:
+        base_kwargs = {"k": k}
+        if filter:
+            base_kwargs["filter"] = filter
+        if ef_search:
+            base_kwargs["ef_search"] = ef_search
+        if quantization:
+            base_kwargs["quantization"] = quantization
+        if search_type == "mmr":
+            base_kwargs.update({"fetch_k": fetch_k, "lambda_mult": lambda_mult})
 
-    base: VectorStoreRetriever = vectorstore.as_retriever(search_type=search_type, search_kwargs=base_kwargs)
+        base: VectorStoreRetriever = vectorstore.as_retriever(search_type=search_type, search_kwargs=base_kwargs)
 
     if settings.DISABLE_RERANKING == 1:
         return base
@@ -43,6 +72,18 @@ def build_retriever(vectorstore: Mem0CompatiblePGVectorStore) -> VectorStoreRetr
             logger.exception("Cohere reranker init failed; falling back to base retriever")
             return base
 
+    # Host-local reranker service (scripts/reranker_service.py): one model per host,
+    # concurrent queries from every worker scored together in micro-batches
+    if provider == "service":
+        reranker: RerankerServiceCompressor = RerankerServiceCompressor(
+            socket_path=RERANKER_SERVICE_SOCKET,
+            top_n=settings.RERANKER_TOPN,
+        )
+        return ContextualCompressionRetriever(
+            base_retriever=base,
+            base_compressor=reranker,
+        )
+
     # Local HF cross-encoder path (good for RTX 4070 dev)
     if provider == "hf" and HuggingFaceCrossEncoder is not None:
         try:
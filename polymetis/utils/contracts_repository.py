@@ -0,0 +1,237 @@
+"""
+Async repository for commitments, interpersonal episodes and boundaries.
+
+Rows live in the athena_models contract tables and are returned as the emotional_engine
+models, so callers get exact, indexed lookups instead of parsing mem0 search hits.
+"""
+
+import uuid
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+from athena_models.contracts import Boundary as BoundaryRow
+from athena_models.contracts import Commitment as CommitmentRow
+from athena_models.contracts import InterpersonalEpisode as EpisodeRow
+from sqlalchemy import select, update
+
+from .db import db_session
+from .emotional_engine import Boundary, Commitment, CommitmentStatus, InterpersonalEpisode, Target
+
+
+def new_id(kind: str) -> str:
+    """Fresh row id such as "episode_3f2a…"; random, so concurrent writes never collide."""
+    return f"{kind}_{uuid.uuid4().hex}"
+
+
+def _naive_local(dt: datetime) -> datetime:
+    """emotional_engine compares against naive datetime.now(), so hand it naive local times."""
+    return dt.astimezone().replace(tzinfo=None) if dt.tzinfo else dt
+
+
+def _aware(dt: datetime) -> datetime:
+    return dt if dt.tzinfo else dt.astimezone(timezone.utc)
+
+
+def _to_commitment(row: CommitmentRow) -> Commitment:
+    return Commitment(
+        id=row.id,
+        party=row.party,
+        goal_id=row.goal_id,
+        promise=row.promise,
+        kpi=row.kpi,
+        due=row.due,
+        created_at=_naive_local(row.created_at),
+        status=CommitmentStatus(row.status),
+        grace=row.grace,
+    )
+
+
+def _to_episode(row: EpisodeRow) -> InterpersonalEpisode:
+    return InterpersonalEpisode(
+        id=row.id,
+        target=Target(row.target),
+        intensity=row.intensity,
+        valence=row.valence,
+        arousal=row.arousal,
+        control=row.control,
+        uncertainty=row.uncertainty,
+        narrative=row.narrative,
+        commitment_ids=list(row.commitment_ids or []),
+        timestamp=_naive_local(row.timestamp),
+        resolved=row.resolved,
+    )
+
+
+def _to_boundary(row: BoundaryRow) -> Boundary:
+    return Boundary(
+        id=row.id,
+        description=row.description,
+        context=row.context,
+        active=row.active,
+        created_at=_naive_local(row.created_at),
+    )
+
+
+# --- commitments ---------
+
+async def add_commitment(
+    user_id: str,
+    commitment_id: str,
+    party: str,
+    goal_id: str,
+    promise: str,
+    kpi: Dict[str, float],
+    due: str = "rolling",
+    grace: Optional[Dict[str, int]] = None,
+    status: CommitmentStatus = CommitmentStatus.ACTIVE,
+) -> Commitment:
+    row = CommitmentRow(
+        id=commitment_id,
+        user_id=str(user_id),
+        party=party,
+        goal_id=goal_id,
+        promise=promise,
+        kpi=kpi,
+        due=due,
+        status=CommitmentStatus(status).value,
+        grace=grace or {},
+    )
+    async with db_session() as session:
+        session.add(row)
+        await session.commit()
+        await session.refresh(row)
+        return _to_commitment(row)
+
+
+async def get_commitments(
+    user_id: str,
+    status: Optional[CommitmentStatus] = None,
+    party: Optional[str] = None,
+    limit: Optional[int] = None,
+) -> List[Commitment]:
+    """Commitments for a user, newest first, optionally filtered by status and party."""
+    stmt = select(CommitmentRow).where(CommitmentRow.user_id == str(user_id))
+    if status is not None:
+        stmt = stmt.where(CommitmentRow.status == CommitmentStatus(status).value)
+    if party:
+        stmt = stmt.where(CommitmentRow.party == party)
+    stmt = stmt.order_by(CommitmentRow.created_at.desc())
+    if limit is not None:
+        stmt = stmt.limit(limit)
+
+    async with db_session() as session:
+        rows = await session.execute(stmt)
+        return [_to_commitment(row) for row in rows.scalars().all()]
+
+
+async def update_commitment_status(user_id: str, commitment_id: str, status: CommitmentStatus) -> bool:
+    """Set a commitment's status. Returns False if the user has no such commitment."""
+    stmt = (
+        update(CommitmentRow)
+        .where(CommitmentRow.user_id == str(user_id), CommitmentRow.id == commitment_id)
+        .values(status=CommitmentStatus(status).value)
+    )
+    async with db_session() as session:
+        result = await session.execute(stmt)
+        await session.commit()
+        return result.rowcount > 0
+
+
+# --- interpersonal episodes ---------
+
+async def add_episode(
+    user_id: str,
+    episode_id: str,
+    target: Target,
+    intensity: float,
+    valence: float,
+    arousal: float,
+    control: float,
+    uncertainty: float,
+    narrative: str,
+    commitment_ids: Optional[List[str]] = None,
+    resolved: bool = False,
+    timestamp: Optional[datetime] = None,
+) -> InterpersonalEpisode:
+    row = EpisodeRow(
+        id=episode_id,
+        user_id=str(user_id),
+        target=Target(target).value,
+        intensity=intensity,
+        valence=valence,
+        arousal=arousal,
+        control=control,
+        uncertainty=uncertainty,
+        narrative=narrative,
+        commitment_ids=commitment_ids or [],
+        resolved=resolved,
+    )
+    if timestamp is not None:
+        row.timestamp = _aware(timestamp)
+
+    async with db_session() as session:
+        session.add(row)
+        await session.commit()
+        await session.refresh(row)
+        return _to_episode(row)
+
+
+async def get_episodes(
+    user_id: str,
+    since: Optional[datetime] = None,
+    target: Optional[Target] = None,
+    resolved: Optional[bool] = None,
+    limit: Optional[int] = None,
+) -> List[InterpersonalEpisode]:
+    """Episodes for a user, newest first, optionally filtered by time, target and resolution."""
+    stmt = select(EpisodeRow).where(EpisodeRow.user_id == str(user_id))
+    if resolved is not None:
+        stmt = stmt.where(EpisodeRow.resolved == resolved)
+    if target is not None:
+        stmt = stmt.where(EpisodeRow.target == Target(target).value)
+    if since is not None:
+        stmt = stmt.where(EpisodeRow.timestamp >= _aware(since))
+    stmt = stmt.order_by(EpisodeRow.timestamp.desc())
+    if limit is not None:
+        stmt = stmt.limit(limit)
+
+    async with db_session() as session:
+        rows = await session.execute(stmt)
+        return [_to_episode(row) for row in rows.scalars().all()]
+
+
+async def resolve_episode(user_id: str, episode_id: str) -> bool:
+    """Mark an episode resolved. Returns False if the user has no such episode."""
+    stmt = (
+        update(EpisodeRow)
+        .where(EpisodeRow.user_id == str(user_id), EpisodeRow.id == episode_id)
+        .values(resolved=True)
+    )
+    async with db_session() as session:
+        result = await session.execute(stmt)
+        await session.commit()
+        return result.rowcount > 0
+
+
+# --- boundaries ---------
+
+async def add_boundary(user_id: str, boundary_id: str, description: str, context: str = "general") -> Boundary:
+    row = BoundaryRow(id=boundary_id, user_id=str(user_id), description=description, context=context, active=True)
+    async with db_session() as session:
+        session.add(row)
+        await session.commit()
+        await session.refresh(row)
+        return _to_boundary(row)
+
+
+async def get_boundaries(user_id: str, active: Optional[bool] = True, context: Optional[str] = None) -> List[Boundary]:
+    stmt = select(BoundaryRow).where(BoundaryRow.user_id == str(user_id))
+    if active is not None:
+        stmt = stmt.where(BoundaryRow.active == active)
+    if context:
+        stmt = stmt.where(BoundaryRow.context == context)
+    stmt = stmt.order_by(BoundaryRow.created_at.desc())
+
+    async with db_session() as session:
+        rows = await session.execute(stmt)
+        return [_to_boundary(row) for row in rows.scalars().all()]
@@ -0,0 +1,16 @@
+"""
+athena_models engine and sessions for polymetis.
+
+athena_models.engine pools asyncpg connections for the life of the process, which suits
+aegis' single event loop. Polymetis code runs inside Celery tasks, and every task gets a
+fresh loop (asyncio.run): a pooled connection opened by one task is bound to that task's
+loop and fails in the next one ("attached to a different loop"). This engine uses NullPool,
+so each checkout opens a connection on the running loop and closes it on release.
+"""
+
+from athena_settings import settings
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import NullPool
+
+engine = create_async_engine(settings.DATABASE_URL, echo=False, poolclass=NullPool)
+db_session = async_sessionmaker(engine, expire_on_commit=False)
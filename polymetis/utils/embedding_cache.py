@@ -0,0 +1,210 @@
+"""
+Content-hash embedding cache.
+
+Wraps any LangChain Embeddings so the same string is only ever sent to the provider once.
+Vectors are keyed by (model, dims, sha256(text)) and kept in two tiers:
+an in-process LRU and Redis (DB 2, alongside the checkpointer on DB 0 and moods on DB 1).
+Misses from both tiers are embedded in a single provider batch and written back to both.
+"""
+
+import asyncio
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+import numpy as np
+import redis
+import redis.asyncio as aioredis
+from athena_logging import get_logger
+from athena_settings import settings
+from langchain_core.embeddings import Embeddings
+
+logger = get_logger(__name__)
+
+
+class CachedEmbeddings(Embeddings):
+    """Embeddings wrapper with an LRU tier, a Redis tier and hit/miss counters."""
+
+    def __init__(
+        self,
+        underlying: Embeddings,
+        model: str,
+        dims: int,
+        lru_size: int = 10000,
+        ttl_seconds: int = 60 * 60 * 24 * 30,
+        redis_url: Optional[str] = None,
+    ):
+        self.underlying = underlying
+        self.model = model
+        self.dims = dims
+        self.lru_size = lru_size
+        self.ttl_seconds = ttl_seconds
+
+        self._redis_url = redis_url or f"redis://{settings.REDIS_URL}/2"
+        self._redis = redis.Redis.from_url(self._redis_url)
+        # One async client per event loop: its pooled connections are bound to the loop that
+        # opened them, and Celery tasks, the PGEngine loop and the agent loop all embed
+        self._aredis_by_loop: "Dict[asyncio.AbstractEventLoop, aioredis.Redis]" = {}
+
+        self._lru: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits_memory = 0
+        self._hits_redis = 0
+        self._misses = 0
+
+    # --- keys and encoding ---------
+
+    def _key(self, text: str) -> str:
+        digest = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        return f"athena:emb:{self.model}:{self.dims}:{digest}"
+
+    @staticmethod
+    def _encode(vector: List[float]) -> bytes:
+        return np.asarray(vector, dtype=np.float32).tobytes()
+
+    @staticmethod
+    def _decode(raw: bytes) -> List[float]:
+        return np.frombuffer(raw, dtype=np.float32).tolist()
+
+    def _aredis(self) -> aioredis.Redis:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            client = self._aredis_by_loop.get(loop)
+            if client is None:
+                # Clients of finished loops (asyncio.run) can't be closed any more; just drop them
+                for stale in [other for other in self._aredis_by_loop if other.is_closed()]:
+                    del self._aredis_by_loop[stale]
+                client = self._aredis_by_loop[loop] = aioredis.Redis.from_url(self._redis_url)
+            return client
+
+    # --- LRU tier ---------
+
+    def _lru_get(self, key: str) -> Optional[List[float]]:
+        with self._lock:
+            vector = self._lru.get(key)
+            if vector is not None:
+                self._lru.move_to_end(key)
+            return vector
+
+    def _lru_put(self, key: str, vector: List[float]) -> None:
+        with self._lock:
+            self._lru[key] = vector
+            self._lru.move_to_end(key)
+            while len(self._lru) > self.lru_size:
+                self._lru.popitem(last=False)
+
+    def _lookup_memory(self, keys: List[str]) -> Dict[str, List[float]]:
+        found = {}
+        for key in keys:
+            vector = self._lru_get(key)
+            if vector is not None:
+                found[key] = vector
+        return found
+
+    def _absorb_redis(self, keys: List[str], raws: List[Optional[bytes]], found: Dict[str, List[float]]) -> None:
+        for key, raw in zip(keys, raws):
+            if raw is not None:
+                vector = self._decode(raw)
+                self._lru_put(key, vector)
+                found[key] = vector
+
+    def _count(self, memory_hits: int, redis_hits: int, misses: int) -> None:
+        with self._lock:
+            self._hits_memory += memory_hits
+            self._hits_redis += redis_hits
+            self._misses += misses
+
+    # --- Embeddings interface ---------
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        keys = [self._key(t) for t in texts]
+        unique_keys = list(dict.fromkeys(keys))
+
+        found = self._lookup_memory(unique_keys)
+        memory_hits = len(found)
+
+        pending = [k for k in unique_keys if k not in found]
+        if pending:
+            try:
+                self._absorb_redis(pending, self._redis.mget(pending), found)
+            except Exception:
+                logger.warning("Embedding cache Redis read failed; falling back to provider", exc_info=True)
+        redis_hits = len(found) - memory_hits
+
+        missing = [k for k in unique_keys if k not in found]
+        if missing:
+            text_by_key = dict(zip(keys, texts))
+            vectors = self.underlying.embed_documents([text_by_key[k] for k in missing])
+            self._store(missing, vectors, found)
+            try:
+                p = self._redis.pipeline(transaction=False)
+                for key in missing:
+                    p.set(key, self._encode(found[key]), ex=self.ttl_seconds)
+                p.execute()
+            except Exception:
+                logger.warning("Embedding cache Redis write failed", exc_info=True)
+
+        self._count(memory_hits, redis_hits, len(missing))
+        return [found[k] for k in keys]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        keys = [self._key(t) for t in texts]
+        unique_keys = list(dict.fromkeys(keys))
+
+        found = self._lookup_memory(unique_keys)
+        memory_hits = len(found)
+
+        pending = [k for k in unique_keys if k not in found]
+        if pending:
+            try:
+                self._absorb_redis(pending, await self._aredis().mget(pending), found)
+            except Exception:
+                logger.warning("Embedding cache Redis read failed; falling back to provider", exc_info=True)
+        redis_hits = len(found) - memory_hits
+
+        missing = [k for k in unique_keys if k not in found]
+        if missing:
+            text_by_key = dict(zip(keys, texts))
+            vectors = await self.underlying.aembed_documents([text_by_key[k] for k in missing])
+            self._store(missing, vectors, found)
+            try:
+                p = self._aredis().pipeline(transaction=False)
+                for key in missing:
+                    p.set(key, self._encode(found[key]), ex=self.ttl_seconds)
+                await p.execute()
+            except Exception:
+                logger.warning("Embedding cache Redis write failed", exc_info=True)
+
+        self._count(memory_hits, redis_hits, len(missing))
+        return [found[k] for k in keys]
+
+    async def aembed_query(self, text: str) -> List[float]:
+        return (await self.aembed_documents([text]))[0]
+
+    def _store(self, keys: List[str], vectors: List[List[float]], found: Dict[str, List[float]]) -> None:
+        for key, vector in zip(keys, vectors):
+            vector = list(vector)
+            if len(vector) != self.dims:
+                logger.warning(f"Embedding for {key} has {len(vector)} dims, expected {self.dims}")
+            self._lru_put(key, vector)
+            found[key] = vector
+
+    # --- stats ---------
+
+    @property
+    def stats(self) -> Dict[str, float]:
+        """Hit/miss counters since process start."""
+        with self._lock:
+            hits = self._hits_memory + self._hits_redis
+            total = hits + self._misses
+            return {
+                "hits_memory": self._hits_memory,
+                "hits_redis": self._hits_redis,
+                "misses": self._misses,
+                "hit_ratio": hits / total if total else 0.0,
+                "lru_entries": len(self._lru),
+            }
@@ -0,0 +1,240 @@
+"""
+Request coalescing for the embedding provider.
+
+Agent turns, archiving and the memory tools each embed a query or a handful of texts at a
+time, so under load the provider sees a stream of tiny requests. CoalescingEmbeddings
+holds each call for a short window (EMBEDDING_COALESCE_WINDOW_MS). Everything that arrives
+in that window goes to the provider as one embed_documents batch, capped at the provider's
+input and token limits, and each caller gets its own vectors back.
+
+It sits under CachedEmbeddings, so only cache misses wait for the window. Async callers are
+batched per event loop; sync callers (threads) are batched by whichever thread arrives
+first, which leads the flush for the others.
+"""
+
+import asyncio
+import threading
+import time
+import weakref
+from typing import Dict, List, Optional, Tuple
+
+from athena_logging import get_logger
+from athena_settings import settings
+from langchain_core.embeddings import Embeddings
+
+logger = get_logger(__name__)
+
+EMBEDDING_COALESCE_WINDOW_MS: float = getattr(settings, "EMBEDDING_COALESCE_WINDOW_MS", 10.0)
+# OpenAI accepts up to 2048 inputs and 300k tokens per embeddings request
+EMBEDDING_MAX_BATCH_INPUTS: int = getattr(settings, "EMBEDDING_MAX_BATCH_INPUTS", 2048)
+EMBEDDING_MAX_BATCH_TOKENS: int = getattr(settings, "EMBEDDING_MAX_BATCH_TOKENS", 250_000)
+
+
+def _estimate_tokens(texts: List[str]) -> int:
+    # ~4 characters per token is close enough for staying under the request limit
+    return sum(len(t) // 4 + 1 for t in texts)
+
+
+class _SyncRequest:
+    def __init__(self, texts: List[str]):
+        self.texts = texts
+        self.done = threading.Event()
+        self.vectors: Optional[List[List[float]]] = None
+        self.error: Optional[BaseException] = None
+
+
+class CoalescingEmbeddings(Embeddings):
+    """Embeddings wrapper that merges concurrent calls into shared provider batches."""
+
+    def __init__(
+        self,
+        underlying: Embeddings,
+        window_ms: float = EMBEDDING_COALESCE_WINDOW_MS,
+        max_inputs: int = EMBEDDING_MAX_BATCH_INPUTS,
+        max_tokens: int = EMBEDDING_MAX_BATCH_TOKENS,
+    ):
+        self.underlying = underlying
+        self.window = window_ms / 1000
+        self.max_inputs = max_inputs
+        self.max_tokens = max_tokens
+
+        # Sync side: pending requests and whether a thread is already leading a flush
+        self._lock = threading.Lock()
+        self._pending: List[_SyncRequest] = []
+        self._leading = False
+
+        # Async side: one batcher per event loop (Celery runs each task under asyncio.run)
+        self._batchers: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, _AsyncBatcher]" = (
+            weakref.WeakKeyDictionary()
+        )
+
+        self._requests = 0
+        self._provider_calls = 0
+        self._inputs = 0
+
+    def _fits(self, inputs: int, tokens: int, texts: List[str]) -> bool:
+        return inputs + len(texts) <= self.max_inputs and tokens + _estimate_tokens(texts) <= self.max_tokens
+
+    def _oversized(self, texts: List[str]) -> bool:
+        return not self._fits(0, 0, texts)
+
+    def _count(self, requests: int, inputs: int) -> None:
+        with self._lock:
+            self._requests += requests
+            self._provider_calls += 1
+            self._inputs += inputs
+
+    @staticmethod
+    def _dedupe(texts: List[str]) -> Tuple[List[str], List[int]]:
+        """Unique texts, plus the position of each input among them."""
+        positions: Dict[str, int] = {}
+        index = [positions.setdefault(t, len(positions)) for t in texts]
+        return list(positions), index
+
+    # --- sync ---------
+
+    def _take_batch(self) -> List[_SyncRequest]:
+        batch: List[_SyncRequest] = []
+        inputs = tokens = 0
+        with self._lock:
+            while self._pending and (not batch or self._fits(inputs, tokens, self._pending[0].texts)):
+                request = self._pending.pop(0)
+                batch.append(request)
+                inputs += len(request.texts)
+                tokens += _estimate_tokens(request.texts)
+            if not batch:
+                self._leading = False
+        return batch
+
+    def _flush_sync(self, batch: List[_SyncRequest]) -> None:
+        unique, index = self._dedupe([t for request in batch for t in request.texts])
+        try:
+            vectors = self.underlying.embed_documents(unique)
+        except BaseException as e:
+            for request in batch:
+                request.error = e
+                request.done.set()
+            return
+        self._count(len(batch), len(unique))
+
+        offset = 0
+        for request in batch:
+            request.vectors = [vectors[i] for i in index[offset:offset + len(request.texts)]]
+            offset += len(request.texts)
+            request.done.set()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if not texts:
+            return []
+        if self._oversized(texts):
+            return self.underlying.embed_documents(texts)
+
+        request = _SyncRequest(texts)
+        with self._lock:
+            self._pending.append(request)
+            lead = not self._leading
+            self._leading = True
+
+        if lead:
+            # Give concurrent callers a moment to join, then flush until nothing is pending
+            time.sleep(self.window)
+            while True:
+                batch = self._take_batch()
+                if not batch:
+                    break
+                self._flush_sync(batch)
+
+        request.done.wait()
+        if request.error is not None:
+            raise request.error
+        return request.vectors
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+    # --- async ---------
+
+    def _batcher(self) -> "_AsyncBatcher":
+        loop = asyncio.get_running_loop()
+        batcher = self._batchers.get(loop)
+        if batcher is None:
+            batcher = self._batchers[loop] = _AsyncBatcher(self, loop)
+        return batcher
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        if not texts:
+            return []
+        if self._oversized(texts):
+            return await self.underlying.aembed_documents(texts)
+        return await self._batcher().submit(texts)
+
+    async def aembed_query(self, text: str) -> List[float]:
+        return (await self.aembed_documents([text]))[0]
+
+    # --- stats ---------
+
+    @property
+    def stats(self) -> Dict[str, float]:
+        """Caller requests vs. provider calls since process start."""
+        with self._lock:
+            return {
+                "requests": self._requests,
+                "provider_calls": self._provider_calls,
+                "inputs": self._inputs,
+                "requests_per_call": self._requests / self._provider_calls if self._provider_calls else 0.0,
+            }
+
+
+class _AsyncBatcher:
+    """Collects one event loop's aembed_documents calls and flushes them as one batch."""
+
+    def __init__(self, owner: CoalescingEmbeddings, loop: asyncio.AbstractEventLoop):
+        self.owner = owner
+        self.loop = loop
+        self.pending: List[Tuple[List[str], asyncio.Future]] = []
+        self.inputs = 0
+        self.tokens = 0
+        self.timer: Optional[asyncio.TimerHandle] = None
+        self.tasks: set = set()
+
+    async def submit(self, texts: List[str]) -> List[List[float]]:
+        if self.pending and not self.owner._fits(self.inputs, self.tokens, texts):
+            self.flush()
+
+        future = self.loop.create_future()
+        self.pending.append((texts, future))
+        self.inputs += len(texts)
+        self.tokens += _estimate_tokens(texts)
+        if self.inputs >= self.owner.max_inputs:
+            self.flush()
+        elif self.timer is None:
+            self.timer = self.loop.call_later(self.owner.window, self.flush)
+        return await future
+
+    def flush(self) -> None:
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
+        batch, self.pending = self.pending, []
+        self.inputs = self.tokens = 0
+        if batch:
+            task = self.loop.create_task(self._run(batch))
+            self.tasks.add(task)
+            task.add_done_callback(self.tasks.discard)
+
+    async def _run(self, batch: List[Tuple[List[str], asyncio.Future]]) -> None:
+        unique, index = self.owner._dedupe([t for texts, _ in batch for t in texts])
+        try:
+            vectors = await self.owner.underlying.aembed_documents(unique)
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        self.owner._count(len(batch), len(unique))
+
+        offset = 0
+        for texts, future in batch:
+            if not future.done():
+                future.set_result([vectors[i] for i in index[offset:offset + len(texts)]])
+            offset += len(texts)
@@ -0,0 +1,223 @@
+"""
+Per-user cache of mem0's entity graph for graph-augmented memory retrieval.
+
+Every memory search asks Neo4j for the relations around the entities in the query, and the
+same neighbourhoods come back turn after turn. This cache holds each user's whole entity
+subgraph: node names with their embeddings, and the relations between them. With it,
+BatchedMemoryGraph can answer the neighbourhood lookup locally with one matrix product.
+
+Layout in Redis (DB 1, next to the memory-context generations):
+
+  graphnb:<user>:nodes    hash  name -> float16 unit-normalized embedding
+  graphnb:<user>:edges    set   "source\\x1frelationship\\x1fdestination"
+  graphnb:<user>:loaded   marker that the two keys above hold the complete subgraph
+  graphnb:<user>:gen      bumped by every write
+
+Graph writes are applied to Redis incrementally (only while the subgraph is loaded), and
+each process keeps a decoded copy that it reloads when the generation moves. On a miss the
+subgraph is loaded from Neo4j; that load is only published if no write happened while it
+ran, so the cache never misses a relation that is in the graph.
+"""
+
+import threading
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import redis
+from athena_logging import get_logger
+from athena_settings import settings
+
+logger = get_logger(__name__)
+
+GRAPH_CACHE_ENABLED: bool = getattr(settings, "GRAPH_CACHE_ENABLED", True)
+GRAPH_CACHE_TTL_SECONDS: int = getattr(settings, "GRAPH_CACHE_TTL_SECONDS", 24 * 60 * 60)
+# Users with bigger graphs are always searched in Neo4j
+GRAPH_CACHE_MAX_NODES: int = getattr(settings, "GRAPH_CACHE_MAX_NODES", 20000)
+
+Edge = Tuple[str, str, str]
+# Loads (nodes with embeddings, edges) for a user from Neo4j; None if over GRAPH_CACHE_MAX_NODES
+Loader = Callable[[str, int], Optional[Tuple[Dict[str, List[float]], List[Edge]]]]
+
+_SEP = "\x1f"
+
+
+def _encode(vector: Iterable[float]) -> bytes:
+    vector = np.asarray(vector, dtype=np.float32)
+    norm = np.linalg.norm(vector)
+    return (vector / (norm if norm else 1.0)).astype(np.float16).tobytes()
+
+
+@dataclass
+class _Subgraph:
+    generation: int
+    names: List[str]
+    matrix: np.ndarray  # (nodes, dims) unit vectors
+    outgoing: Dict[str, List[Tuple[str, str]]]
+    incoming: Dict[str, List[Tuple[str, str]]]
+
+    @classmethod
+    def decode(cls, generation: int, nodes: Dict[bytes, bytes], edges: Iterable[bytes]) -> "_Subgraph":
+        names = [name.decode() for name in nodes]
+        matrix = (
+            np.stack([np.frombuffer(v, dtype=np.float16) for v in nodes.values()]).astype(np.float32)
+            if nodes else np.zeros((0, 0), dtype=np.float32)
+        )
+        outgoing: Dict[str, List[Tuple[str, str]]] = {}
+        incoming: Dict[str, List[Tuple[str, str]]] = {}
+        for raw in edges:
+            source, relationship, destination = raw.decode().split(_SEP)
+            outgoing.setdefault(source, []).append((relationship, destination))
+            incoming.setdefault(destination, []).append((source, relationship))
+        return cls(generation, names, matrix, outgoing, incoming)
+
+    def neighbourhood(self, vectors: List[List[float]], threshold: float, limit: int) -> List[Dict[str, object]]:
+        """Relations touching nodes similar to any query entity, best match first (mem0's result shape)."""
+        if not len(self.names) or not vectors:
+            return []
+        queries = np.asarray(vectors, dtype=np.float32)
+        norms = np.linalg.norm(queries, axis=1, keepdims=True)
+        queries /= np.where(norms == 0, 1.0, norms)
+        similarity = np.round(queries @ self.matrix.T, 4)
+
+        results = []
+        for row, col in zip(*np.nonzero(similarity >= threshold)):
+            name, score = self.names[col], float(similarity[row, col])
+            for relationship, destination in self.outgoing.get(name, ()):
+                results.append((score, name, relationship, destination))
+            for source, relationship in self.incoming.get(name, ()):
+                results.append((score, source, relationship, name))
+        results.sort(key=lambda item: -item[0])
+
+        seen = set()
+        output = []
+        for score, source, relationship, destination in results:
+            if (source, relationship, destination) in seen:
+                continue
+            seen.add((source, relationship, destination))
+            output.append({
+                "source": source, "source_id": None,
+                "relationship": relationship, "relation_id": None,
+                "destination": destination, "destination_id": None,
+                "similarity": score,
+            })
+            if len(output) >= limit:
+                break
+        return output
+
+
+class GraphNeighbourhoodCache:
+    """In-process + Redis cache of each user's entity subgraph, updated on every graph write."""
+
+    def __init__(self, redis_url: Optional[str] = None, ttl_seconds: int = GRAPH_CACHE_TTL_SECONDS):
+        redis_url = redis_url or f"redis://{settings.REDIS_URL}/1"
+        self._redis = redis.Redis.from_url(redis_url)
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._local: Dict[str, _Subgraph] = {}
+
+    @staticmethod
+    def _keys(user_id: str) -> Tuple[str, str, str, str]:
+        prefix = f"graphnb:{user_id}"
+        return f"{prefix}:nodes", f"{prefix}:edges", f"{prefix}:loaded", f"{prefix}:gen"
+
+    def get(self, user_id: str, loader: Loader) -> Optional[_Subgraph]:
+        """The user's subgraph, loading it on a miss; None when it can't be served from cache."""
+        nodes_key, edges_key, loaded_key, gen_key = self._keys(user_id)
+        try:
+            loaded, generation = self._redis.pipeline().exists(loaded_key).get(gen_key).execute()
+            generation = int(generation or 0)
+            if not loaded:
+                return self._load(user_id, generation, loader)
+
+            with self._lock:
+                local = self._local.get(user_id)
+            if local is not None and local.generation == generation:
+                return local
+
+            pipe = self._redis.pipeline()
+            nodes, edges, current = pipe.hgetall(nodes_key).smembers(edges_key).get(gen_key).execute()
+            subgraph = _Subgraph.decode(int(current or 0), nodes, edges)
+            with self._lock:
+                self._local[user_id] = subgraph
+            return subgraph
+        except Exception as e:
+            logger.warning(f"Graph cache unavailable for user {user_id}: {e}")
+            return None
+
+    def _load(self, user_id: str, generation: int, loader: Loader) -> Optional[_Subgraph]:
+        subgraph = loader(user_id, GRAPH_CACHE_MAX_NODES)
+        if subgraph is None:
+            return None
+        nodes, edges = subgraph
+
+        nodes_key, edges_key, loaded_key, gen_key = self._keys(user_id)
+        encoded = {name: _encode(vector) for name, vector in nodes.items()}
+        members = [_SEP.join(edge) for edge in edges]
+        with self._redis.pipeline() as pipe:
+            try:
+                # Publish only if no write landed while Neo4j was being read
+                pipe.watch(gen_key)
+                if int(pipe.get(gen_key) or 0) != generation:
+                    return None
+                pipe.multi()
+                pipe.delete(nodes_key, edges_key)
+                if encoded:
+                    pipe.hset(nodes_key, mapping=encoded)
+                if members:
+                    pipe.sadd(edges_key, *members)
+                pipe.set(loaded_key, 1, ex=self.ttl_seconds)
+                pipe.expire(nodes_key, self.ttl_seconds)
+                pipe.expire(edges_key, self.ttl_seconds)
+                pipe.execute()
+            except redis.WatchError:
+                return None
+
+        subgraph = _Subgraph.decode(
+            generation, {k.encode(): v for k, v in encoded.items()}, [m.encode() for m in members]
+        )
+        with self._lock:
+            self._local[user_id] = subgraph
+        logger.debug(f"Graph cache loaded {len(nodes)} nodes / {len(edges)} relations for user {user_id}")
+        return subgraph
+
+    def apply(
+        self,
+        user_id: str,
+        nodes: Optional[Dict[str, List[float]]] = None,
+        added: Iterable[Edge] = (),
+        removed: Iterable[Edge] = (),
+    ) -> None:
+        """Record a graph write: always bump the generation, patch the subgraph if it is loaded."""
+        nodes_key, edges_key, loaded_key, gen_key = self._keys(user_id)
+        added = [_SEP.join(edge) for edge in added]
+        removed = [_SEP.join(edge) for edge in removed]
+        try:
+            if self._redis.exists(loaded_key):
+                pipe = self._redis.pipeline()
+                if nodes:
+                    pipe.hset(nodes_key, mapping={name: _encode(v) for name, v in nodes.items()})
+                if removed:
+                    pipe.srem(edges_key, *removed)
+                if added:
+                    pipe.sadd(edges_key, *added)
+                pipe.incr(gen_key)
+                pipe.execute()
+            else:
+                self._redis.incr(gen_key)
+        except Exception as e:
+            # Without the bump a stale subgraph could keep being served; drop it instead
+            logger.warning(f"Graph cache update failed for user {user_id}: {e}")
+            self.invalidate(user_id)
+
+    def invalidate(self, user_id: str) -> None:
+        nodes_key, edges_key, loaded_key, gen_key = self._keys(user_id)
+        with self._lock:
+            self._local.pop(user_id, None)
+        try:
+            self._redis.pipeline().delete(loaded_key, nodes_key, edges_key).incr(gen_key).execute()
+        except Exception as e:
+            logger.warning(f"Graph cache invalidation failed for user {user_id}: {e}")
+
+
+graph_cache = GraphNeighbourhoodCache()
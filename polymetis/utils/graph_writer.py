@@ -0,0 +1,329 @@
+"""
+Batched Neo4j writes for mem0's graph store.
+
+mem0's MemoryGraph writes what it extracts from a turn one item at a time: two embedding
+calls, two node-similarity lookups and one MERGE per relation, each a separate round-trip
+over the sync driver. BatchedMemoryGraph keeps mem0's extraction and update decisions but
+replaces the write step. All entity names of a turn (or of an archive batch) are embedded
+in one call and resolved against existing nodes in one query. Relations are then written
+with UNWIND, one statement per (source type, relation, destination type) group, over the
+async driver.
+
+The async driver lives on its own event loop thread: mem0 calls the graph from worker
+threads (its executor, or asyncio.to_thread), and Celery gives every task a fresh loop.
+
+Every node written here also gets the __Entity__ label, so one uniqueness constraint on
+(user_id, name) backs the MERGE lookups instead of a scan over every label.
+"""
+
+import asyncio
+import threading
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Tuple
+
+from athena_logging import get_logger
+from athena_settings import settings
+from mem0.memory.graph_memory import MemoryGraph
+from neo4j import AsyncDriver, AsyncGraphDatabase
+
+from .graph_cache import GRAPH_CACHE_ENABLED, Edge, graph_cache
+from .utils import embeddings
+
+logger = get_logger(__name__)
+
+GRAPH_WRITE_BATCH_SIZE: int = getattr(settings, "GRAPH_WRITE_BATCH_SIZE", 500)
+GRAPH_WRITE_TIMEOUT_SECONDS: float = getattr(settings, "GRAPH_WRITE_TIMEOUT_SECONDS", 30.0)
+# mem0's default for reusing an existing node whose name embeds close to a new entity
+GRAPH_NODE_MATCH_THRESHOLD: float = getattr(settings, "GRAPH_NODE_MATCH_THRESHOLD", 0.7)
+
+ENTITY_LABEL = "__Entity__"
+
+_SCHEMA = [
+    f"CREATE CONSTRAINT entity_user_name IF NOT EXISTS FOR (n:{ENTITY_LABEL}) REQUIRE (n.user_id, n.name) IS UNIQUE",
+    f"CREATE INDEX entity_user_id IF NOT EXISTS FOR (n:{ENTITY_LABEL}) ON (n.user_id)",
+]
+# Used instead of the constraint while existing data still has duplicates
+_FALLBACK_INDEX = f"CREATE INDEX entity_user_name_idx IF NOT EXISTS FOR (n:{ENTITY_LABEL}) ON (n.user_id, n.name)"
+# Nodes mem0 wrote before this layer only carry their type label
+_BACKFILL_LABEL = (
+    f"MATCH (n) WHERE n.user_id IS NOT NULL AND n.name IS NOT NULL AND NOT n:{ENTITY_LABEL} "
+    f"CALL {{ WITH n SET n:{ENTITY_LABEL} }} IN TRANSACTIONS OF 10000 ROWS"
+)
+
+# Same similarity scale as mem0's _search_source_node / _search_destination_node
+_RESOLVE_NODES = (
+    f"UNWIND $entities AS entity "
+    f"CALL {{ "
+    f"  WITH entity "
+    f"  MATCH (candidate:{ENTITY_LABEL} {{user_id: $user_id}}) WHERE candidate.embedding IS NOT NULL "
+    f"  WITH candidate, round(2 * vector.similarity.cosine(candidate.embedding, entity.embedding) - 1, 4) AS similarity "
+    f"  WHERE similarity >= $threshold "
+    f"  RETURN candidate.name AS existing ORDER BY similarity DESC LIMIT 1 "
+    f"}} "
+    f"RETURN entity.name AS name, existing"
+)
+
+
+# Whole-subgraph reads for graph_cache
+_COUNT_NODES = f"MATCH (n:{ENTITY_LABEL} {{user_id: $user_id}}) RETURN count(n) AS nodes"
+_LOAD_NODES = (
+    f"MATCH (n:{ENTITY_LABEL} {{user_id: $user_id}}) WHERE n.embedding IS NOT NULL "
+    f"RETURN n.name AS name, n.embedding AS embedding"
+)
+_LOAD_EDGES = (
+    f"MATCH (s:{ENTITY_LABEL} {{user_id: $user_id}})-[r]->(d:{ENTITY_LABEL} {{user_id: $user_id}}) "
+    f"RETURN s.name AS source, type(r) AS relationship, d.name AS destination"
+)
+
+
+def _quote(name: str) -> str:
+    """Backtick-quote a label or relationship type for interpolation into Cypher."""
+    return "`" + name.replace("`", "") + "`"
+
+
+def _merge_edges_stmt(source_type: str, relationship: str, destination_type: str) -> str:
+    # Like mem0, a node's embedding is only set when the node is created: an entity resolved
+    # onto an existing node must not overwrite that node's vector with its own name's.
+    # source_new / target_new report which endpoints got their embedding from this row.
+    return (
+        f"UNWIND $edges AS edge "
+        f"MERGE (s:{ENTITY_LABEL} {{user_id: $user_id, name: edge.source}}) "
+        f"ON CREATE SET s.created = timestamp(), s.mentions = 1 "
+        f"ON MATCH SET s.mentions = coalesce(s.mentions, 0) + 1 "
+        f"SET s:{_quote(source_type)} "
+        f"WITH s, edge, s.embedding IS NULL AS source_new "
+        f"CALL {{ WITH s, edge, source_new WITH s, edge WHERE source_new "
+        f"  CALL db.create.setNodeVectorProperty(s, 'embedding', edge.source_embedding) }} "
+        f"MERGE (d:{ENTITY_LABEL} {{user_id: $user_id, name: edge.destination}}) "
+        f"ON CREATE SET d.created = timestamp(), d.mentions = 1 "
+        f"ON MATCH SET d.mentions = coalesce(d.mentions, 0) + 1 "
+        f"SET d:{_quote(destination_type)} "
+        f"WITH s, d, edge, source_new, d.embedding IS NULL AS target_new "
+        f"CALL {{ WITH d, edge, target_new WITH d, edge WHERE target_new "
+        f"  CALL db.create.setNodeVectorProperty(d, 'embedding', edge.destination_embedding) }} "
+        f"MERGE (s)-[r:{_quote(relationship)}]->(d) "
+        f"ON CREATE SET r.created_at = timestamp(), r.updated_at = timestamp(), r.mentions = 1 "
+        f"ON MATCH SET r.updated_at = timestamp(), r.mentions = coalesce(r.mentions, 0) + 1 "
+        f"RETURN s.name AS source, type(r) AS relationship, d.name AS target, source_new, target_new"
+    )
+
+
+def _delete_edges_stmt(relationship: str) -> str:
+    return (
+        f"UNWIND $edges AS edge "
+        f"MATCH (s:{ENTITY_LABEL} {{user_id: $user_id, name: edge.source}})"
+        f"-[r:{_quote(relationship)}]->"
+        f"(d:{ENTITY_LABEL} {{user_id: $user_id, name: edge.destination}}) "
+        f"DELETE r RETURN s.name AS source, d.name AS target, edge.relationship AS relationship"
+    )
+
+
+class GraphWriter:
+    """Async Neo4j driver on a private event loop, with batched entity/relation writes."""
+
+    def __init__(self, url: str, username: str, password: str, database: Optional[str] = None):
+        self.url = url
+        self.auth = (username, password)
+        self.database = database
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._driver: Optional[AsyncDriver] = None
+        self._schema_ready = False
+
+    # --- loop ---------
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                threading.Thread(target=self._loop.run_forever, name="graph-writer", daemon=True).start()
+            return self._loop
+
+    def run(self, coro) -> Any:
+        """Run `coro` on the writer's loop and wait for it (called from mem0's worker threads)."""
+        future = asyncio.run_coroutine_threadsafe(coro, self._ensure_loop())
+        return future.result(timeout=GRAPH_WRITE_TIMEOUT_SECONDS)
+
+    async def _session(self):
+        if self._driver is None:
+            self._driver = AsyncGraphDatabase.driver(self.url, auth=self.auth)
+        if not self._schema_ready:
+            await self._ensure_schema()
+        return self._driver.session(database=self.database)
+
+    async def _ensure_schema(self) -> None:
+        # Attempted once per process; writes still work (slower) without the schema
+        self._schema_ready = True
+        try:
+            async with self._driver.session(database=self.database) as session:
+                await (await session.run(_BACKFILL_LABEL)).consume()
+                for stmt in _SCHEMA:
+                    try:
+                        await (await session.run(stmt)).consume()
+                    except Exception as e:
+                        logger.warning(f"Graph schema statement failed ({e}); using a composite index instead")
+                        await (await session.run(_FALLBACK_INDEX)).consume()
+            logger.info("Graph store constraints and indexes on (user_id, name) are in place")
+        except Exception:
+            logger.exception("Failed to set up graph store constraints and indexes")
+
+    # --- writes ---------
+
+    async def aresolve(self, user_id: str, vectors: Dict[str, List[float]], threshold: float) -> Dict[str, str]:
+        """Map each entity name to the existing node name it should merge into (itself if none)."""
+        resolved = {name: name for name in vectors}
+        entities = [{"name": name, "embedding": vector} for name, vector in vectors.items()]
+        async with await self._session() as session:
+            for start in range(0, len(entities), GRAPH_WRITE_BATCH_SIZE):
+                result = await session.run(
+                    _RESOLVE_NODES,
+                    entities=entities[start:start + GRAPH_WRITE_BATCH_SIZE],
+                    user_id=user_id,
+                    threshold=threshold,
+                )
+                async for record in result:
+                    if record["existing"]:
+                        resolved[record["name"]] = record["existing"]
+        return resolved
+
+    async def amerge_edges(self, user_id: str, edges: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Upsert relations (and their endpoint nodes), one UNWIND per label/type group."""
+        groups: Dict[Tuple[str, str, str], List[Dict[str, Any]]] = defaultdict(list)
+        for edge in edges:
+            groups[(edge["source_type"], edge["relationship"], edge["destination_type"])].append(edge)
+
+        written: List[Dict[str, Any]] = []
+        async with await self._session() as session:
+            for (source_type, relationship, destination_type), group in groups.items():
+                stmt = _merge_edges_stmt(source_type, relationship, destination_type)
+                for start in range(0, len(group), GRAPH_WRITE_BATCH_SIZE):
+                    batch = group[start:start + GRAPH_WRITE_BATCH_SIZE]
+                    records = await session.execute_write(self._write, stmt, batch, user_id)
+                    written.extend(records)
+        return written
+
+    async def adelete_edges(self, user_id: str, edges: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Delete relations, one UNWIND per relationship type."""
+        groups: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+        for edge in edges:
+            groups[edge["relationship"]].append(edge)
+
+        deleted: List[Dict[str, Any]] = []
+        async with await self._session() as session:
+            for relationship, group in groups.items():
+                for start in range(0, len(group), GRAPH_WRITE_BATCH_SIZE):
+                    batch = group[start:start + GRAPH_WRITE_BATCH_SIZE]
+                    records = await session.execute_write(self._write, _delete_edges_stmt(relationship), batch, user_id)
+                    deleted.extend(records)
+        return deleted
+
+    async def aload_subgraph(
+        self, user_id: str, max_nodes: int
+    ) -> Optional[Tuple[Dict[str, List[float]], List[Edge]]]:
+        """All of a user's entity nodes (with embeddings) and relations, or None if there are too many."""
+        async with await self._session() as session:
+            count = await (await session.run(_COUNT_NODES, user_id=user_id)).single()
+            if count["nodes"] > max_nodes:
+                return None
+            nodes = {r["name"]: r["embedding"] async for r in await session.run(_LOAD_NODES, user_id=user_id)}
+            edges = [
+                (r["source"], r["relationship"], r["destination"])
+                async for r in await session.run(_LOAD_EDGES, user_id=user_id)
+            ]
+        return nodes, edges
+
+    @staticmethod
+    async def _write(tx, stmt: str, edges: List[Dict[str, Any]], user_id: str) -> List[Dict[str, Any]]:
+        result = await tx.run(stmt, edges=edges, user_id=user_id)
+        return [record.data() async for record in result]
+
+
+graph_writer = GraphWriter(
+    url=settings.GRAPH_STORE_URI,
+    username=settings.GRAPH_STORE_USERNAME,
+    password=settings.GRAPH_STORE_PASSWORD,
+)
+
+
+class BatchedMemoryGraph(MemoryGraph):
+    """
+    mem0 MemoryGraph whose entity writes and deletes go through graph_writer in batches, and
+    whose neighbourhood lookups are served from graph_cache when the user's subgraph is cached.
+    """
+
+    def _search_graph_db(self, node_list, filters, limit=100):
+        # The cache is per user; agent/run-scoped searches go to Neo4j
+        if GRAPH_CACHE_ENABLED and set(filters) == {"user_id"} and node_list:
+            subgraph = graph_cache.get(filters["user_id"], self._load_subgraph)
+            if subgraph is not None:
+                threshold = getattr(self, "threshold", GRAPH_NODE_MATCH_THRESHOLD)
+                return subgraph.neighbourhood(embeddings.embed_documents(list(node_list)), threshold, limit)
+        return super()._search_graph_db(node_list, filters, limit)
+
+    @staticmethod
+    def _load_subgraph(user_id: str, max_nodes: int):
+        return graph_writer.run(graph_writer.aload_subgraph(user_id, max_nodes))
+
+    def _add_entities(self, to_be_added, filters, entity_type_map):
+        if not to_be_added:
+            return []
+        user_id = filters["user_id"]
+        names = list(dict.fromkeys(n for item in to_be_added for n in (item["source"], item["destination"])))
+        # One embedding call for every entity of the turn (served by the shared cache/coalescer)
+        vectors = dict(zip(names, embeddings.embed_documents(names)))
+        threshold = getattr(self, "threshold", GRAPH_NODE_MATCH_THRESHOLD)
+        resolved = graph_writer.run(graph_writer.aresolve(user_id, vectors, threshold))
+
+        edges = [
+            {
+                "source": resolved[item["source"]],
+                "destination": resolved[item["destination"]],
+                "relationship": item["relationship"],
+                "source_type": entity_type_map.get(item["source"], "__User__"),
+                "destination_type": entity_type_map.get(item["destination"], "__User__"),
+                "source_embedding": vectors[item["source"]],
+                "destination_embedding": vectors[item["destination"]],
+            }
+            for item in to_be_added
+        ]
+        written = graph_writer.run(graph_writer.amerge_edges(user_id, edges))
+        # Only nodes created by this write carry these vectors; existing ones kept theirs
+        vector_of = {
+            **{edge["source"]: edge["source_embedding"] for edge in edges},
+            **{edge["destination"]: edge["destination_embedding"] for edge in edges},
+        }
+        created = {r["source"] for r in written if r["source_new"]} | {r["target"] for r in written if r["target_new"]}
+        graph_cache.apply(
+            user_id,
+            nodes={name: vector_of[name] for name in created if name in vector_of},
+            added=[(r["source"], r["relationship"], r["target"]) for r in written],
+        )
+        logger.debug(f"Graph write: {len(written)} relations across {len(names)} entities for user {user_id}")
+        # mem0 reports one result list per added relation
+        return [[record] for record in written]
+
+    def _delete_entities(self, to_be_deleted, filters):
+        if not to_be_deleted:
+            return []
+        edges = [
+            {"source": item["source"], "destination": item["destination"], "relationship": item["relationship"]}
+            for item in to_be_deleted
+        ]
+        deleted = graph_writer.run(graph_writer.adelete_edges(filters["user_id"], edges))
+        graph_cache.apply(
+            filters["user_id"], removed=[(r["source"], r["relationship"], r["target"]) for r in deleted]
+        )
+        return [[record] for record in deleted]
+
+    def delete_all(self, filters):
+        try:
+            return super().delete_all(filters)
+        finally:
+            graph_cache.invalidate(filters["user_id"])
+
+
+def install_batched_graph(memory: Any) -> None:
+    """Switch a mem0 Memory/AsyncMemory's graph to batched writes, if it has one."""
+    graph = getattr(memory, "graph", None)
+    if isinstance(graph, MemoryGraph) and not isinstance(graph, BatchedMemoryGraph):
+        graph.__class__ = BatchedMemoryGraph
@@ -0,0 +1,83 @@
+"""
+Hybrid lexical + vector retrieval over rag.docs.
+
+The HNSW query and a Postgres full-text query (against the generated, GIN-indexed
+content_tsv column) run side by side and are fused with reciprocal-rank fusion, so exact
+terms like tickers, package names and URLs rank even when their embedding is unremarkable.
+"""
+
+from typing import Any, Dict, List, Optional, Sequence
+
+from langchain_core.callbacks import AsyncCallbackManagerForRetrieverRun, CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+from sqlalchemy import RowMapping
+
+TSV_COLUMN = "content_tsv"
+TSV_LANG = "pg_catalog.english"
+
+
+def rank_fusion(
+    primary_search_results: Sequence[RowMapping],
+    secondary_search_results: Sequence[RowMapping],
+    rrf_k: float = 60,
+    fetch_top_k: int = 4,
+    limit: Optional[int] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Reciprocal-rank fusion that trusts the order each query returned its rows in.
+
+    langchain_postgres' reciprocal_rank_fusion re-sorts by "distance" descending, which
+    inverts the dense ranking for L2 distance. Both queries already come back best first
+    (ORDER BY distance / ORDER BY ts_rank_cd DESC), so ranks are taken as-is.
+    """
+    fused: Dict[str, Dict[str, Any]] = {}
+    for results in (primary_search_results, secondary_search_results):
+        for rank, row in enumerate(results):
+            row_values = dict(row)
+            doc_id = str(next(iter(row_values.values())))  # first column is the id
+            score = fused[doc_id]["distance"] if doc_id in fused else 0.0
+            row_values["distance"] = score + 1.0 / (rank + rrf_k)
+            fused[doc_id] = row_values
+
+    ranked = sorted(fused.values(), key=lambda item: item["distance"], reverse=True)
+    return ranked[: limit or fetch_top_k]
+
+
+class HybridRetriever(BaseRetriever):
+    """Retriever running vector and full-text search on a Mem0CompatiblePGVectorStore, fused by RRF."""
+
+    vectorstore: Any
+    k: int = 4
+    candidates: int = 20
+    rrf_k: float = 60
+    # Equality filter on metadata keys, pushed into both SQL queries
+    filter: Optional[dict] = None
+    # Per-retriever hnsw.ef_search and quantization ("none" / "halfvec" / "binary");
+    # None keeps the store's default
+    ef_search: Optional[int] = None
+    quantization: Optional[str] = None
+
+    def _get_relevant_documents(self, query: str, *, run_manager: CallbackManagerForRetrieverRun) -> List[Document]:
+        return self.vectorstore.hybrid_search(
+            query,
+            k=self.k,
+            candidates=self.candidates,
+            rrf_k=self.rrf_k,
+            filter=self.filter,
+            ef_search=self.ef_search,
+            quantization=self.quantization,
+        )
+
+    async def _aget_relevant_documents(
+        self, query: str, *, run_manager: AsyncCallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        return await self.vectorstore.ahybrid_search(
+            query,
+            k=self.k,
+            candidates=self.candidates,
+            rrf_k=self.rrf_k,
+            filter=self.filter,
+            ef_search=self.ef_search,
+            quantization=self.quantization,
+        )
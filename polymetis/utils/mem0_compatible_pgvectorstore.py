@@ -5,14 +5,76 @@ This module provides a subclass of PGVectorStore that includes the add_embedding
 expected by mem0, while maintaining all original PGVectorStore functionality.
 """
 
-from typing import List, Optional, Any, Dict
+import asyncio
+import copy
+import json
+import threading
+import time
+import uuid
+from typing import List, Optional, Any, Dict, Sequence, Tuple
+import numpy as np
 from langchain_postgres import PGVectorStore, PGEngine
+from langchain_core.documents import Document
 from langchain_core.embeddings import Embeddings
 from langchain_postgres.v2.indexes import DistanceStrategy
+from sqlalchemy import RowMapping, text
 from athena_logging import get_logger
+from athena_settings import settings
+from .ann_replica import ANN_REPLICA_ENABLED, ANN_REPLICA_OVERSAMPLE, AnnReplica
+from .ann_replica import TABLE as ANN_REPLICA_TABLE
+from .hybrid_search import TSV_COLUMN, TSV_LANG, rank_fusion
+from .mmr import decode_vectors, maximal_marginal_relevance
 
 logger = get_logger(__name__)
 
+# 4 bind parameters per row keeps each statement well under the driver limit
+_MAX_ROWS_PER_INSERT = 1000
+
+# pgvector >= 0.8: keep walking the HNSW graph until enough rows pass the filter
+# ("off" disables it). create_sync checks the installed extension and turns it off below 0.8,
+# where the hnsw.iterative_scan setting doesn't exist.
+VECTOR_ITERATIVE_SCAN: str = getattr(settings, "VECTOR_ITERATIVE_SCAN", "strict_order")
+VECTOR_MAX_SCAN_TUPLES: int = getattr(settings, "VECTOR_MAX_SCAN_TUPLES", 20000)
+
+# Opt-in first pass over a compact index ("halfvec" or "binary"), rescored at full precision.
+# "none" searches the float32 HNSW index directly. Build the matching index first
+# (scripts/manage_vector_indexes.py rebuild rag.docs:halfvec / rag.docs:binary); no migration does.
+VECTOR_QUANTIZATION: str = getattr(settings, "VECTOR_QUANTIZATION", "none")
+VECTOR_RESCORE_OVERSAMPLE: int = getattr(settings, "VECTOR_RESCORE_OVERSAMPLE", 4)
+QUANTIZATION_MODES = ("none", "halfvec", "binary")
+
+# Hot/cold memory tiers (see memory_tiering). Per-user searches also query <table>_cold when
+# the hot tier comes back short or its best match is farther than MEMORY_COLD_FALLBACK_DISTANCE,
+# and every returned memory is counted in <table>_access.
+MEMORY_TIERING: bool = getattr(settings, "MEMORY_TIERING", True)
+# Access hits are buffered per process and written in one upsert at most this often, so a
+# search doesn't turn into a write (tiering works in days; a few lost hits don't matter)
+MEMORY_ACCESS_FLUSH_SECONDS: float = getattr(settings, "MEMORY_ACCESS_FLUSH_SECONDS", 60.0)
+MEMORY_COLD_FALLBACK_DISTANCE: float = getattr(settings, "MEMORY_COLD_FALLBACK_DISTANCE", 1.0)
+
+_FILTER_SCALARS = (str, int, float, bool)
+
+# Candidate vectors for MMR, as pgvector's binary send format (see mmr.decode_vectors)
+_EMBEDDING_BYTES = "embedding_bytes"
+
+# Fire-and-forget access flushes; keeps the tasks referenced until they finish
+_background_tasks: set = set()
+
+# Access hits not yet written: langchain_id -> count
+_pending_access: Dict[str, int] = {}
+_pending_access_lock = threading.Lock()
+_last_access_flush = time.monotonic()
+
+# One memory-mapped replica per process, shared by every store on its table (see ann_replica)
+_ann_replica: Optional[AnnReplica] = None
+
+
+def _shared_ann_replica() -> AnnReplica:
+    global _ann_replica
+    if _ann_replica is None:
+        _ann_replica = AnnReplica()
+    return _ann_replica
+
 
 class Mem0CompatiblePGVectorStore(PGVectorStore):
     """
@@ -22,50 +84,606 @@ class Mem0CompatiblePGVectorStore(PGVectorStore):
     while maintaining full compatibility with the parent class.
     """
 
-    def add_embeddings(
+    # Table layout, filled in by create_sync (PGVectorStore keeps its own copy name-mangled)
+    _schema_name: str = "public"
+    _table_name: str = "langchain_pg_embedding"
+    _id_column: str = "langchain_id"
+    _content_column: str = "content"
+    _embedding_column: str = "embedding"
+    _metadata_json_column: str = "langchain_metadata"
+    _distance_strategy: DistanceStrategy = DistanceStrategy.COSINE_DISTANCE
+    # Default hnsw.ef_search, from create_sync's index_query_options; callers may pass ef_search
+    _ef_search: Optional[int] = None
+    # Host-local ANN replica for candidate generation, when enabled for this table
+    _ann_replica: Optional[AnnReplica] = None
+    # hnsw.iterative_scan mode for filtered searches, from create_sync's extension check
+    _iterative_scan: str = "off"
+
+    def _build_insert(
+        self,
+        rows: List[Tuple[str, str, List[float], Dict[str, Any]]],
+    ) -> Tuple[str, Dict[str, Any]]:
+        """Build one multi-row upsert statement and its bind parameters."""
+        values_sql = []
+        params: Dict[str, Any] = {}
+        for i, (doc_id, content, embedding, metadata) in enumerate(rows):
+            values_sql.append(
+                f"(:id_{i}, :content_{i}, CAST(:embedding_{i} AS vector), CAST(:metadata_{i} AS jsonb))"
+            )
+            params[f"id_{i}"] = doc_id
+            params[f"content_{i}"] = content
+            params[f"embedding_{i}"] = str([float(x) for x in embedding])
+            params[f"metadata_{i}"] = json.dumps(metadata)
+
+        stmt = (
+            f'INSERT INTO "{self._schema_name}"."{self._table_name}" '
+            f'("{self._id_column}", "{self._content_column}", "{self._embedding_column}", "{self._metadata_json_column}") '
+            f"VALUES {', '.join(values_sql)} "
+            f'ON CONFLICT ("{self._id_column}") DO UPDATE SET '
+            f'"{self._content_column}" = EXCLUDED."{self._content_column}", '
+            f'"{self._embedding_column}" = EXCLUDED."{self._embedding_column}", '
+            f'"{self._metadata_json_column}" = EXCLUDED."{self._metadata_json_column}"'
+        )
+        return stmt, params
+
+    async def _ainsert_embeddings(
         self,
-        texts: List[str],
+        texts: Optional[List[str]],
         embeddings: List[List[float]],
         metadatas: Optional[List[Dict[str, Any]]] = None,
         ids: Optional[List[str]] = None,
+    ) -> List[str]:
+        """Write caller-supplied vectors in batched multi-row upserts inside one transaction."""
+        metadatas = [copy.deepcopy(m) for m in metadatas] if metadatas else [{} for _ in embeddings]
+        # mem0 only passes payloads; the memory text lives under "data"
+        if texts is None:
+            texts = [metadata.get("data", "") for metadata in metadatas]
+        ids = [i if i is not None else str(uuid.uuid4()) for i in ids] if ids else [str(uuid.uuid4()) for _ in embeddings]
+
+        if not (len(texts) == len(embeddings) == len(metadatas) == len(ids)):
+            raise ValueError(
+                f"add_embeddings got mismatched lengths: texts={len(texts)}, embeddings={len(embeddings)}, "
+                f"metadatas={len(metadatas)}, ids={len(ids)}"
+            )
+
+        rows = list(zip(ids, texts, embeddings, metadatas))
+        if not rows:
+            return []
+
+        async with self._engine._pool.connect() as conn:
+            for start in range(0, len(rows), _MAX_ROWS_PER_INSERT):
+                stmt, params = self._build_insert(rows[start:start + _MAX_ROWS_PER_INSERT])
+                await conn.execute(text(stmt), params)
+            await conn.commit()
+
+        return ids
+
+    def add_embeddings(
+        self,
+        texts: Optional[List[str]] = None,
+        embeddings: Optional[List[List[float]]] = None,
+        metadatas: Optional[List[Dict[str, Any]]] = None,
+        ids: Optional[List[str]] = None,
         **kwargs
     ) -> List[str]:
         """
-        Add embeddings to the vector store.
+        Add precomputed embeddings to the vector store.
 
-        This method provides the interface that mem0 expects. The embeddings parameter
-        is ignored since PGVectorStore computes embeddings automatically from texts
-        using the configured embedding service.
+        This method provides the interface that mem0 expects. The vectors mem0 already
+        computed are written as-is, so nothing is embedded a second time.
 
         Args:
-            texts: List of texts to add
-            embeddings: List of embeddings (ignored - computed automatically)
+            texts: List of texts to add (taken from each metadata's "data" key when omitted)
+            embeddings: List of embeddings, one per text
             metadatas: Optional list of metadata dictionaries
             ids: Optional list of document IDs
-            **kwargs: Additional keyword arguments
+            **kwargs: Additional keyword arguments (ignored)
 
         Returns:
             List of document IDs
         """
         try:
-            logger.debug(f"Adding {len(texts)} texts via add_embeddings method")
-
-            # Use the parent class's add_texts method
-            # PGVectorStore will compute embeddings automatically using the embedding service
-            result = self.add_texts(
-                texts=texts,
-                metadatas=metadatas,
-                ids=ids,
-                **kwargs
+            result = self._engine._run_as_sync(
+                self._ainsert_embeddings(texts, embeddings or [], metadatas, ids)
             )
+            logger.debug(f"Inserted {len(result)} precomputed embeddings into {self._schema_name}.{self._table_name}")
+            return result
 
-            logger.info(f"Successfully added {len(texts)} texts to PGVectorStore")
+        except Exception as e:
+            logger.exception(f"Failed to add embeddings to PGVectorStore: {e}")
+            raise
+
+    async def aadd_embeddings(
+        self,
+        texts: Optional[List[str]] = None,
+        embeddings: Optional[List[List[float]]] = None,
+        metadatas: Optional[List[Dict[str, Any]]] = None,
+        ids: Optional[List[str]] = None,
+        **kwargs
+    ) -> List[str]:
+        """
+        Async version of add_embeddings.
+
+        Args:
+            texts: List of texts to add (taken from each metadata's "data" key when omitted)
+            embeddings: List of embeddings, one per text
+            metadatas: Optional list of metadata dictionaries
+            ids: Optional list of document IDs
+            **kwargs: Additional keyword arguments (ignored)
+
+        Returns:
+            List of document IDs
+        """
+        try:
+            result = await self._engine._run_as_async(
+                self._ainsert_embeddings(texts, embeddings or [], metadatas, ids)
+            )
+            logger.debug(f"Inserted {len(result)} precomputed embeddings into {self._schema_name}.{self._table_name}")
             return result
 
         except Exception as e:
             logger.exception(f"Failed to add embeddings to PGVectorStore: {e}")
             raise
 
+    # --- metadata filter pushdown ---------
+    #
+    # langchain_postgres only filters on real columns, so mem0's {"user_id": ...} and any
+    # metadata filter either fail or get applied after the ANN scan. Equality filters on
+    # metadata keys are instead compiled into the WHERE clause of the vector query itself
+    # (GIN containment, plus the partial user_id index) with iterative HNSW scans, so a
+    # per-user search only walks that user's neighbours. Other filters fall back to
+    # PGVectorStore unchanged.
+
+    def _metadata_filter(self, filter: Optional[dict]) -> Optional[Tuple[str, Dict[str, Any]]]:
+        """WHERE clause for a {key: value} metadata filter, or None if it can't be pushed down."""
+        if not filter:
+            return "", {}
+        if not isinstance(filter, dict):
+            return None
+        if not all(isinstance(k, str) and not k.startswith("$") and isinstance(v, _FILTER_SCALARS)
+                   for k, v in filter.items()):
+            return None
+
+        clauses = []
+        params: Dict[str, Any] = {}
+        containment = dict(filter)
+        if "user_id" in containment:
+            # Matches the docs_metadata_user_id_idx expression index
+            clauses.append(f"\"{self._metadata_json_column}\"->>'user_id' = :filter_user_id")
+            params["filter_user_id"] = str(containment.pop("user_id"))
+        if containment:
+            clauses.append(f"\"{self._metadata_json_column}\" @> CAST(:filter_metadata AS jsonb)")
+            params["filter_metadata"] = json.dumps(containment)
+        return " AND ".join(clauses), params
+
+    def _row_to_document(self, row: RowMapping) -> Document:
+        return Document(
+            id=str(row[self._id_column]),
+            page_content=row[self._content_column],
+            metadata=row[self._metadata_json_column] or {},
+        )
+
+    @staticmethod
+    def _query_options(kwargs: Dict[str, Any]) -> Dict[str, Any]:
+        """Per-query search options accepted by every search entry point."""
+        return {key: kwargs[key] for key in ("ef_search", "quantization") if kwargs.get(key) is not None}
+
+    def _dense_stmt(self, columns: str, table: str, clause: str, quantization: str, dims: int) -> str:
+        emb = f'"{self._embedding_column}"'
+        operator = self._distance_strategy.operator
+        query = "CAST(:query_embedding AS vector)"
+        if quantization == "none":
+            return (
+                f"SELECT {columns}, {emb} {operator} {query} AS distance FROM {table} WHERE {clause} "
+                f"ORDER BY {emb} {operator} {query} LIMIT :k"
+            )
+
+        # Expressions must match the docs_emb_halfvec_* / docs_emb_bit_* index definitions
+        if quantization == "halfvec":
+            first_pass = f"{emb}::halfvec({dims}) {operator} CAST(:query_embedding AS halfvec({dims}))"
+        elif quantization == "binary":
+            first_pass = f"binary_quantize({emb})::bit({dims}) <~> binary_quantize({query})"
+        else:
+            raise ValueError(f"Unknown quantization {quantization!r}, expected one of {QUANTIZATION_MODES}")
+
+        # The compact index picks the candidates, full-precision vectors decide their order
+        inner_columns = (
+            f'"{self._id_column}", "{self._content_column}", "{self._metadata_json_column}", {emb}'
+        )
+        return (
+            f"SELECT {columns}, {emb} {operator} {query} AS distance FROM ("
+            f"SELECT {inner_columns} FROM {table} WHERE {clause} ORDER BY {first_pass} LIMIT :candidates"
+            f") candidates ORDER BY distance LIMIT :k"
+        )
+
+    async def _afiltered_query(
+        self,
+        embedding: List[float],
+        k: int,
+        where: Tuple[str, Dict[str, Any]],
+        fts_query: Optional[str] = None,
+        with_embeddings: bool = False,
+        ef_search: Optional[int] = None,
+        quantization: Optional[str] = None,
+        table_name: Optional[str] = None,
+    ) -> Tuple[List[RowMapping], List[RowMapping]]:
+        """Run the dense (and optionally full-text) query under one filter, best rows first."""
+        clause, params = where
+        clause = clause or "TRUE"
+        table = f'"{self._schema_name}"."{table_name or self._table_name}"'
+        columns = f'"{self._id_column}", "{self._content_column}", "{self._metadata_json_column}"'
+        if with_embeddings:
+            columns += f', vector_send("{self._embedding_column}") AS {_EMBEDDING_BYTES}'
+
+        k = k or 4
+        dense_stmt = self._dense_stmt(columns, table, clause, quantization or VECTOR_QUANTIZATION, len(embedding))
+        params = {
+            **params,
+            "query_embedding": str([float(x) for x in embedding]),
+            "k": k,
+            "candidates": k * VECTOR_RESCORE_OVERSAMPLE,
+        }
+
+        sparse_rows: List[RowMapping] = []
+        ef_search = ef_search or self._ef_search
+        async with self._engine._pool.connect() as conn:
+            async with conn.begin():
+                if ef_search:
+                    await conn.execute(text(f"SET LOCAL hnsw.ef_search = {int(ef_search)}"))
+                if self._iterative_scan != "off":
+                    await conn.execute(text(f"SET LOCAL hnsw.iterative_scan = {self._iterative_scan}"))
+                    await conn.execute(text(f"SET LOCAL hnsw.max_scan_tuples = {int(VECTOR_MAX_SCAN_TUPLES)}"))
+                dense_rows = (await conn.execute(text(dense_stmt), params)).mappings().fetchall()
+
+                if fts_query:
+                    query_tsv = f"plainto_tsquery('{TSV_LANG}', :fts_query)"
+                    sparse_stmt = (
+                        f'SELECT {columns}, ts_rank_cd("{TSV_COLUMN}", {query_tsv}) AS distance '
+                        f'FROM {table} WHERE "{TSV_COLUMN}" @@ {query_tsv} AND {clause} '
+                        f"ORDER BY distance DESC LIMIT :k"
+                    )
+                    sparse_rows = (
+                        await conn.execute(text(sparse_stmt), {**params, "fts_query": fts_query})
+                    ).mappings().fetchall()
+        return dense_rows, sparse_rows
+
+    async def _areplica_query(
+        self, embedding: List[float], k: int, where: Tuple[str, Dict[str, Any]]
+    ) -> Optional[List[RowMapping]]:
+        """Dense rows from replica candidates hydrated by id, or None to take the HNSW path."""
+        clause, params = where
+        # The replica only knows row owners; other metadata filters need Postgres
+        if self._ann_replica is None or set(params) - {"filter_user_id"}:
+            return None
+        k = k or 4
+        try:
+            ids = await asyncio.to_thread(
+                self._ann_replica.search, embedding, k * ANN_REPLICA_OVERSAMPLE, params.get("filter_user_id")
+            )
+        except Exception as e:
+            logger.warning(f"ANN replica search failed ({e}); using the HNSW index")
+            return None
+        if ids is None:
+            return None
+        if not ids:
+            return []
+
+        table = f'"{self._schema_name}"."{self._table_name}"'
+        columns = f'"{self._id_column}", "{self._content_column}", "{self._metadata_json_column}"'
+        emb = f'"{self._embedding_column}"'
+        stmt = text(
+            f"SELECT {columns}, {emb} {self._distance_strategy.operator} CAST(:query_embedding AS vector) AS distance "
+            f'FROM {table} WHERE "{self._id_column}" = ANY(CAST(:ids AS text[])) AND {clause or "TRUE"} '
+            f"ORDER BY distance LIMIT :k"
+        )
+        async with self._engine._pool.connect() as conn:
+            rows = (
+                await conn.execute(
+                    stmt, {**params, "ids": ids, "k": k, "query_embedding": str([float(x) for x in embedding])}
+                )
+            ).mappings().fetchall()
+        # Too many candidates were deleted (or moved) since the replica saw them
+        if len(rows) < min(k, len(ids)):
+            return None
+        return rows
+
+    async def _afiltered_search(
+        self, embedding: List[float], k: int, where: Tuple[str, Dict[str, Any]], **options: Any
+    ) -> List[Tuple[Document, float]]:
+        dense_rows = await self._areplica_query(embedding, k, where)
+        if dense_rows is None:
+            dense_rows, _ = await self._afiltered_query(embedding, k, where, **options)
+        if self._tiered(where):
+            k = k or 4
+            if len(dense_rows) < k or float(dense_rows[0]["distance"]) > MEMORY_COLD_FALLBACK_DISTANCE:
+                # The cold table only has a binary-quantized index
+                cold_rows, _ = await self._afiltered_query(
+                    embedding, k, where, ef_search=options.get("ef_search"), quantization="binary",
+                    table_name=self._cold_table_name,
+                )
+                dense_rows = sorted([*dense_rows, *cold_rows], key=lambda row: float(row["distance"]))[:k]
+            self._record_access([str(row[self._id_column]) for row in dense_rows])
+        return [(self._row_to_document(row), float(row["distance"])) for row in dense_rows]
+
+    async def _afiltered_mmr(
+        self,
+        embedding: List[float],
+        k: int,
+        fetch_k: int,
+        lambda_mult: float,
+        where: Tuple[str, Dict[str, Any]],
+        **options: Any,
+    ) -> List[Document]:
+        # Candidate vectors come back in the same round-trip as the search
+        dense_rows, _ = await self._afiltered_query(embedding, fetch_k, where, with_embeddings=True, **options)
+        candidates = decode_vectors([row[_EMBEDDING_BYTES] for row in dense_rows])
+        selected = maximal_marginal_relevance(
+            np.array(embedding, dtype=np.float32), candidates, k=k, lambda_mult=lambda_mult
+        )
+        return [self._row_to_document(dense_rows[i]) for i in selected]
+
+    def _hybrid_where(self, filter: Optional[dict]) -> Tuple[str, Dict[str, Any]]:
+        where = self._metadata_filter(filter)
+        if filter and where is None:
+            raise ValueError(f"Hybrid search only supports equality filters on metadata keys, got {filter}")
+        return where or ("", {})
+
+    async def ahybrid_search(
+        self,
+        query: str,
+        k: int = 4,
+        candidates: int = 20,
+        rrf_k: float = 60,
+        filter: Optional[dict] = None,
+        ef_search: Optional[int] = None,
+        quantization: Optional[str] = None,
+    ) -> List[Document]:
+        """Vector + full-text search fused by reciprocal rank, with the filter pushed into both."""
+        where = self._hybrid_where(filter)
+        embedding = await self.embeddings.aembed_query(query)
+        dense_rows, sparse_rows = await self._engine._run_as_async(
+            self._afiltered_query(
+                embedding, candidates, where, fts_query=query, ef_search=ef_search, quantization=quantization
+            )
+        )
+        return [self._row_to_document(row) for row in rank_fusion(dense_rows, sparse_rows, rrf_k=rrf_k, limit=k)]
+
+    def hybrid_search(
+        self,
+        query: str,
+        k: int = 4,
+        candidates: int = 20,
+        rrf_k: float = 60,
+        filter: Optional[dict] = None,
+        ef_search: Optional[int] = None,
+        quantization: Optional[str] = None,
+    ) -> List[Document]:
+        where = self._hybrid_where(filter)
+        embedding = self.embeddings.embed_query(query)
+        dense_rows, sparse_rows = self._engine._run_as_sync(
+            self._afiltered_query(
+                embedding, candidates, where, fts_query=query, ef_search=ef_search, quantization=quantization
+            )
+        )
+        return [self._row_to_document(row) for row in rank_fusion(dense_rows, sparse_rows, rrf_k=rrf_k, limit=k)]
+
+    # --- hot/cold tiers ---------
+
+    @property
+    def _cold_table_name(self) -> str:
+        return f"{self._table_name}_cold"
+
+    @property
+    def _access_table_name(self) -> str:
+        return f"{self._table_name}_access"
+
+    @staticmethod
+    def _tiered(where: Tuple[str, Dict[str, Any]]) -> bool:
+        # Only memory searches are tiered, and those are always scoped to one user
+        return MEMORY_TIERING and "filter_user_id" in where[1]
+
+    def _record_access(self, ids: List[str]) -> None:
+        """Count search hits; flushes everything buffered once MEMORY_ACCESS_FLUSH_SECONDS have passed."""
+        global _last_access_flush
+        if not ids:
+            return
+        with _pending_access_lock:
+            for langchain_id in ids:
+                _pending_access[langchain_id] = _pending_access.get(langchain_id, 0) + 1
+            if time.monotonic() - _last_access_flush < MEMORY_ACCESS_FLUSH_SECONDS:
+                return
+            counts = dict(_pending_access)
+            _pending_access.clear()
+            _last_access_flush = time.monotonic()
+        task = asyncio.get_running_loop().create_task(self._arecord_access(counts))
+        _background_tasks.add(task)
+        task.add_done_callback(_background_tasks.discard)
+
+    async def _arecord_access(self, counts: Dict[str, int]) -> None:
+        access = f'"{self._schema_name}"."{self._access_table_name}"'
+        try:
+            async with self._engine._pool.connect() as conn:
+                await conn.execute(
+                    text(
+                        f"INSERT INTO {access} AS a (langchain_id, last_accessed_at, access_count) "
+                        f"SELECT id, now(), hits FROM unnest(CAST(:ids AS text[]), CAST(:hits AS int[])) AS t(id, hits) "
+                        f"ON CONFLICT (langchain_id) DO UPDATE SET last_accessed_at = now(), "
+                        f"access_count = a.access_count + EXCLUDED.access_count"
+                    ),
+                    {"ids": list(counts), "hits": list(counts.values())},
+                )
+                await conn.commit()
+        except Exception as e:
+            logger.warning(f"Failed to record {len(counts)} memory accesses: {e}")
+
+    async def _aget_cold_by_ids(self, ids: List[str]) -> List[Document]:
+        cold = f'"{self._schema_name}"."{self._cold_table_name}"'
+        stmt = text(
+            f'SELECT "{self._id_column}", "{self._content_column}", "{self._metadata_json_column}" '
+            f'FROM {cold} WHERE "{self._id_column}" = ANY(CAST(:ids AS text[]))'
+        )
+        async with self._engine._pool.connect() as conn:
+            rows = (await conn.execute(stmt, {"ids": ids})).mappings().fetchall()
+        return [self._row_to_document(row) for row in rows]
+
+    async def _adelete_tiered(self, ids: List[str]) -> None:
+        """Remove ids from the cold tier and the access stats (the hot row is PGVectorStore's)."""
+        params = {"ids": [str(i) for i in ids]}
+        async with self._engine._pool.connect() as conn:
+            for table in (self._cold_table_name, self._access_table_name):
+                await conn.execute(
+                    text(
+                        f'DELETE FROM "{self._schema_name}"."{table}" '
+                        f"WHERE langchain_id = ANY(CAST(:ids AS text[]))"
+                    ),
+                    params,
+                )
+            await conn.commit()
+
+    # mem0 reads, updates (delete + insert) and deletes memories by id, wherever they live.
+    # An updated cold memory is re-inserted into the hot table, which promotes it.
+
+    async def aget_by_ids(self, ids: Sequence[str]) -> List[Document]:
+        docs = await super().aget_by_ids(ids)
+        missing = [i for i in ids if i not in {doc.id for doc in docs}]
+        if MEMORY_TIERING and missing:
+            docs += await self._engine._run_as_async(self._aget_cold_by_ids(missing))
+        return docs
+
+    def get_by_ids(self, ids: Sequence[str]) -> List[Document]:
+        docs = super().get_by_ids(ids)
+        missing = [i for i in ids if i not in {doc.id for doc in docs}]
+        if MEMORY_TIERING and missing:
+            docs += self._engine._run_as_sync(self._aget_cold_by_ids(missing))
+        return docs
+
+    async def adelete(self, ids: Optional[list] = None, **kwargs: Any) -> Optional[bool]:
+        result = await super().adelete(ids, **kwargs)
+        if MEMORY_TIERING and ids:
+            await self._engine._run_as_async(self._adelete_tiered(ids))
+        return result
+
+    def delete(self, ids: Optional[list] = None, **kwargs: Any) -> Optional[bool]:
+        result = super().delete(ids, **kwargs)
+        if MEMORY_TIERING and ids:
+            self._engine._run_as_sync(self._adelete_tiered(ids))
+        return result
+
+    # Search entry points: our SQL when the filter allows it (or there is none), PGVectorStore
+    # otherwise. All accept ef_search (hnsw.ef_search) and quantization overrides per query.
+
+    async def asimilarity_search_with_score_by_vector(
+        self, embedding: List[float], k: int = 4, filter: Optional[dict] = None, **kwargs: Any
+    ) -> List[Tuple[Document, float]]:
+        where = self._metadata_filter(filter)
+        if where is None:
+            return await super().asimilarity_search_with_score_by_vector(embedding, k=k, filter=filter, **kwargs)
+        return await self._engine._run_as_async(
+            self._afiltered_search(embedding, k, where, **self._query_options(kwargs))
+        )
+
+    def similarity_search_with_score_by_vector(
+        self, embedding: List[float], k: int = 4, filter: Optional[dict] = None, **kwargs: Any
+    ) -> List[Tuple[Document, float]]:
+        where = self._metadata_filter(filter)
+        if where is None:
+            return super().similarity_search_with_score_by_vector(embedding, k=k, filter=filter, **kwargs)
+        return self._engine._run_as_sync(
+            self._afiltered_search(embedding, k, where, **self._query_options(kwargs))
+        )
+
+    async def asimilarity_search_by_vector(
+        self, embedding: List[float], k: int = 4, filter: Optional[dict] = None, **kwargs: Any
+    ) -> List[Document]:
+        if self._metadata_filter(filter) is None:
+            return await super().asimilarity_search_by_vector(embedding, k=k, filter=filter, **kwargs)
+        return [doc for doc, _ in await self.asimilarity_search_with_score_by_vector(embedding, k, filter, **kwargs)]
+
+    def similarity_search_by_vector(
+        self, embedding: List[float], k: int = 4, filter: Optional[dict] = None, **kwargs: Any
+    ) -> List[Document]:
+        # mem0's langchain provider searches through here with {"user_id": ...}
+        if self._metadata_filter(filter) is None:
+            return super().similarity_search_by_vector(embedding, k=k, filter=filter, **kwargs)
+        return [doc for doc, _ in self.similarity_search_with_score_by_vector(embedding, k, filter, **kwargs)]
+
+    async def asimilarity_search_with_score(
+        self, query: str, k: int = 4, filter: Optional[dict] = None, **kwargs: Any
+    ) -> List[Tuple[Document, float]]:
+        if self._metadata_filter(filter) is None:
+            return await super().asimilarity_search_with_score(query, k=k, filter=filter, **kwargs)
+        return await self.asimilarity_search_with_score_by_vector(
+            await self.embeddings.aembed_query(query), k, filter, **kwargs
+        )
+
+    def similarity_search_with_score(
+        self, query: str, k: int = 4, filter: Optional[dict] = None, **kwargs: Any
+    ) -> List[Tuple[Document, float]]:
+        if self._metadata_filter(filter) is None:
+            return super().similarity_search_with_score(query, k=k, filter=filter, **kwargs)
+        return self.similarity_search_with_score_by_vector(self.embeddings.embed_query(query), k, filter, **kwargs)
+
+    async def asimilarity_search(
+        self, query: str, k: int = 4, filter: Optional[dict] = None, **kwargs: Any
+    ) -> List[Document]:
+        if self._metadata_filter(filter) is None:
+            return await super().asimilarity_search(query, k=k, filter=filter, **kwargs)
+        return [doc for doc, _ in await self.asimilarity_search_with_score(query, k, filter, **kwargs)]
+
+    def similarity_search(
+        self, query: str, k: int = 4, filter: Optional[dict] = None, **kwargs: Any
+    ) -> List[Document]:
+        if self._metadata_filter(filter) is None:
+            return super().similarity_search(query, k=k, filter=filter, **kwargs)
+        return [doc for doc, _ in self.similarity_search_with_score(query, k, filter, **kwargs)]
+
+    async def amax_marginal_relevance_search(
+        self,
+        query: str,
+        k: int = 4,
+        fetch_k: int = 20,
+        lambda_mult: float = 0.5,
+        filter: Optional[dict] = None,
+        **kwargs: Any,
+    ) -> List[Document]:
+        where = self._metadata_filter(filter)
+        if where is None:
+            return await super().amax_marginal_relevance_search(
+                query, k=k, fetch_k=fetch_k, lambda_mult=lambda_mult, filter=filter, **kwargs
+            )
+        embedding = await self.embeddings.aembed_query(query)
+        return await self._engine._run_as_async(
+            self._afiltered_mmr(embedding, k, fetch_k, lambda_mult, where, **self._query_options(kwargs))
+        )
+
+    def max_marginal_relevance_search(
+        self,
+        query: str,
+        k: int = 4,
+        fetch_k: int = 20,
+        lambda_mult: float = 0.5,
+        filter: Optional[dict] = None,
+        **kwargs: Any,
+    ) -> List[Document]:
+        where = self._metadata_filter(filter)
+        if where is None:
+            return super().max_marginal_relevance_search(
+                query, k=k, fetch_k=fetch_k, lambda_mult=lambda_mult, filter=filter, **kwargs
+            )
+        embedding = self.embeddings.embed_query(query)
+        return self._engine._run_as_sync(
+            self._afiltered_mmr(embedding, k, fetch_k, lambda_mult, where, **self._query_options(kwargs))
+        )
+
+    @staticmethod
+    async def _avector_version(engine: PGEngine) -> Tuple[int, ...]:
+        """Installed pgvector extension version, e.g. (0, 8, 0); () if it can't be read."""
+        async with engine._pool.connect() as conn:
+            version = (await conn.execute(
+                text("SELECT extversion FROM pg_extension WHERE extname = 'vector'")
+            )).scalar()
+        return tuple(int(part) for part in (version or "").split(".") if part.isdigit())
+
     @classmethod
     def create_sync(
         cls,
@@ -106,5 +724,32 @@ class Mem0CompatiblePGVectorStore(PGVectorStore):
         # Change the instance's class to our subclass
         parent_instance.__class__ = cls
 
+        # Remember the table layout for the direct insert path
+        parent_instance._schema_name = schema_name
+        parent_instance._table_name = table_name
+        parent_instance._id_column = kwargs.get("id_column", cls._id_column)
+        parent_instance._content_column = kwargs.get("content_column", cls._content_column)
+        parent_instance._embedding_column = kwargs.get("embedding_column", cls._embedding_column)
+        parent_instance._metadata_json_column = kwargs.get("metadata_json_column", cls._metadata_json_column)
+        parent_instance._distance_strategy = distance_strategy
+        query_options = kwargs.get("index_query_options")
+        parent_instance._ef_search = getattr(query_options, "ef_search", None)
+        if VECTOR_ITERATIVE_SCAN != "off":
+            version = engine._run_as_sync(cls._avector_version(engine))
+            if version >= (0, 8):
+                parent_instance._iterative_scan = VECTOR_ITERATIVE_SCAN
+            else:
+                logger.warning(
+                    f"pgvector {'.'.join(map(str, version)) or 'version unknown'} has no hnsw.iterative_scan "
+                    f"(needs 0.8, then ALTER EXTENSION vector UPDATE); filtered searches won't use it"
+                )
+        # The replica ranks by L2, like the rag.docs index
+        if (
+            ANN_REPLICA_ENABLED
+            and f"{schema_name}.{table_name}" == ANN_REPLICA_TABLE
+            and distance_strategy == DistanceStrategy.EUCLIDEAN
+        ):
+            parent_instance._ann_replica = _shared_ann_replica()
+
         logger.info(f"Created Mem0CompatiblePGVectorStore with table '{schema_name}.{table_name}'")
         return parent_instance
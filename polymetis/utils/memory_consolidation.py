@@ -0,0 +1,245 @@
+"""
+Background consolidation of near-duplicate memories in rag.docs.
+
+mem0 only compares a new fact with a handful of neighbours, so near-identical variants
+("[FACTUAL] Dislikes Instagram.", "[FACTUAL] User dislikes Instagram") pile up over time.
+They inflate the HNSW index and crowd distinct memories out of get_memory_context.
+
+The job is incremental. A watermark in Redis (DB 1) records the updated_at it last
+consolidated up to, so each run only looks at users with memories written since then,
+and only compares those fresh memories against the user's other memories. Vectors are
+loaded in chunks and compared as NumPy blocks. Matches above the similarity threshold
+that share the same [TYPE] tags are grouped with union-find. This is a purge, not a text
+merge: each group keeps its medoid verbatim as the canonical memory and the rest are
+deleted in one transaction per user. The kept rows are never written, so the job's own
+work doesn't show up past the watermark on the next run.
+"""
+
+import re
+import time
+from datetime import datetime, timedelta, timezone
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+import numpy as np
+import redis.asyncio as aioredis
+from athena_celery import shared_task
+from athena_logging import get_logger
+from athena_settings import settings
+from sqlalchemy import text
+
+from .db import engine
+from .memory_engine import memory_context_cache
+
+logger = get_logger(__name__)
+
+MEMORY_CONSOLIDATION_SIMILARITY: float = getattr(settings, "MEMORY_CONSOLIDATION_SIMILARITY", 0.95)
+MEMORY_CONSOLIDATION_CHUNK_SIZE: int = getattr(settings, "MEMORY_CONSOLIDATION_CHUNK_SIZE", 2000)
+# Rows newer than this may belong to transactions that haven't committed yet
+MEMORY_CONSOLIDATION_LAG_SECONDS: int = getattr(settings, "MEMORY_CONSOLIDATION_LAG_SECONDS", 60)
+
+WATERMARK_KEY = "memory_consolidation:watermark"
+
+_TABLE = "rag.docs"
+_TAGS_RE = re.compile(r"^\s*((?:\[[^\]]*\]\s*)*)")
+
+
+def _tags(content: str) -> str:
+    """Leading [TYPE][DEADLINE:...] tags; only memories with identical tags may merge."""
+    return re.sub(r"\s+", "", _TAGS_RE.match(content or "").group(1)).upper()
+
+
+def _unit_rows(vectors: List[List[float]]) -> np.ndarray:
+    matrix = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix / np.where(norms == 0, 1.0, norms)
+
+
+class _Block:
+    """A chunk of one user's memories: ids, tag codes and unit-normalised vectors."""
+
+    def __init__(self, rows, tag_codes: Dict[str, int]):
+        self.ids = [row["id"] for row in rows]
+        self.tags = np.asarray([tag_codes.setdefault(_tags(row["content"]), len(tag_codes)) for row in rows])
+        self.vectors = _unit_rows([row["embedding"] for row in rows])
+
+
+class _UnionFind:
+    def __init__(self):
+        self.parent: Dict[str, str] = {}
+
+    def find(self, item: str) -> str:
+        self.parent.setdefault(item, item)
+        root = item
+        while self.parent[root] != root:
+            root = self.parent[root]
+        while self.parent[item] != root:
+            self.parent[item], item = root, self.parent[item]
+        return root
+
+    def union(self, a: str, b: str) -> None:
+        ra, rb = self.find(a), self.find(b)
+        if ra != rb:
+            self.parent[rb] = ra
+
+    def groups(self) -> List[List[str]]:
+        grouped: Dict[str, List[str]] = {}
+        for item in self.parent:
+            grouped.setdefault(self.find(item), []).append(item)
+        return [members for members in grouped.values() if len(members) > 1]
+
+
+def _watermark_client() -> aioredis.Redis:
+    # Per run: Celery tasks each get a fresh event loop (asyncio.run)
+    return aioredis.Redis.from_url(f"redis://{settings.REDIS_URL}/1", decode_responses=True)
+
+
+async def _read_watermark(client: aioredis.Redis) -> datetime:
+    raw = await client.get(WATERMARK_KEY)
+    # First run consolidates everything once
+    return datetime.fromisoformat(raw) if raw else datetime.fromtimestamp(0, tz=timezone.utc)
+
+
+async def _users_since(conn, since: datetime, until: datetime) -> List[str]:
+    stmt = text(
+        f"SELECT DISTINCT langchain_metadata->>'user_id' FROM {_TABLE} "
+        f"WHERE langchain_metadata ? 'user_id' AND updated_at > :since AND updated_at <= :until"
+    )
+    return list((await conn.execute(stmt, {"since": since, "until": until})).scalars().all())
+
+
+async def _iter_blocks(
+    conn,
+    user_id: str,
+    tag_codes: Dict[str, int],
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+) -> AsyncIterator[_Block]:
+    """Keyset-paginated chunks of a user's memories (optionally only those updated in a window)."""
+    window = "AND updated_at > :since AND updated_at <= :until " if since is not None else ""
+    stmt = text(
+        f"SELECT langchain_id AS id, content, CAST(embedding AS real[]) AS embedding FROM {_TABLE} "
+        f"WHERE langchain_metadata->>'user_id' = :user_id {window}AND langchain_id > :after "
+        f"ORDER BY langchain_id LIMIT :limit"
+    )
+    after = ""
+    while True:
+        params = {"user_id": user_id, "after": after, "limit": MEMORY_CONSOLIDATION_CHUNK_SIZE}
+        if since is not None:
+            params.update({"since": since, "until": until})
+        rows = (await conn.execute(stmt, params)).mappings().all()
+        if not rows:
+            return
+        yield _Block(rows, tag_codes)
+        after = rows[-1]["id"]
+
+
+def _link_duplicates(
+    fresh: _Block, other: _Block, threshold: float, groups: _UnionFind, vectors: Dict[str, np.ndarray]
+) -> None:
+    """Union every (fresh, other) pair above the threshold with matching tags."""
+    similarity = fresh.vectors @ other.vectors.T
+    rows, cols = np.nonzero((similarity >= threshold) & (fresh.tags[:, None] == other.tags[None, :]))
+    for row, col in zip(rows.tolist(), cols.tolist()):
+        a, b = fresh.ids[row], other.ids[col]
+        if a == b:
+            continue
+        groups.union(a, b)
+        vectors.setdefault(a, fresh.vectors[row])
+        vectors.setdefault(b, other.vectors[col])
+
+
+def _medoid(members: List[str], vectors: Dict[str, np.ndarray]) -> str:
+    """Member most similar to the rest of its group; the other members are its duplicates."""
+    matrix = np.stack([vectors[m] for m in members])
+    return members[int(np.argmax((matrix @ matrix.T).sum(axis=1)))]
+
+
+async def consolidate_user(
+    user_id: str,
+    since: datetime,
+    until: datetime,
+    threshold: float = MEMORY_CONSOLIDATION_SIMILARITY,
+) -> Tuple[int, int]:
+    """
+    Purge near-duplicates among one user's memories updated in (since, until], keeping
+    each group's medoid. Returns (groups purged, memories deleted).
+    """
+    tag_codes: Dict[str, int] = {}
+    groups = _UnionFind()
+    vectors: Dict[str, np.ndarray] = {}
+
+    async with engine.connect() as conn:
+        async for fresh in _iter_blocks(conn, user_id, tag_codes, since, until):
+            # Older memories were consolidated by earlier runs; only fresh ones can add duplicates
+            async for other in _iter_blocks(conn, user_id, tag_codes):
+                _link_duplicates(fresh, other, threshold, groups, vectors)
+
+        clusters = groups.groups()
+        if not clusters:
+            return 0, 0
+
+        duplicates: List[str] = []
+        for members in clusters:
+            keep = _medoid(members, vectors)
+            duplicates.extend(m for m in members if m != keep)
+
+        # The kept memory is left untouched: any UPDATE would fire docs_touch_updated_at and
+        # make the next run rescan its neighbourhood, so runs would never settle
+        await conn.execute(
+            text(f"DELETE FROM {_TABLE} WHERE langchain_id = ANY(:ids)"),
+            {"ids": duplicates},
+        )
+        await conn.commit()
+
+    await memory_context_cache.ainvalidate(user_id)
+    return len(clusters), len(duplicates)
+
+
+async def consolidate_memories(threshold: float = MEMORY_CONSOLIDATION_SIMILARITY) -> Dict[str, int]:
+    """
+    One incremental pass over every user with memories written since the watermark.
+    The watermark only advances when every user was consolidated, so failures are retried.
+    """
+    started = time.perf_counter()
+    client = _watermark_client()
+    try:
+        return await _consolidate_since_watermark(client, threshold, started)
+    finally:
+        await client.aclose()
+
+
+async def _consolidate_since_watermark(client: aioredis.Redis, threshold: float, started: float) -> Dict[str, int]:
+    since = await _read_watermark(client)
+    until = datetime.now(timezone.utc) - timedelta(seconds=MEMORY_CONSOLIDATION_LAG_SECONDS)
+    if until <= since:
+        return {"users": 0, "groups": 0, "deleted": 0}
+
+    async with engine.connect() as conn:
+        users = await _users_since(conn, since, until)
+
+    stats = {"users": len(users), "groups": 0, "deleted": 0}
+    failed = 0
+    for user_id in users:
+        try:
+            merged, deleted = await consolidate_user(user_id, since, until, threshold)
+            stats["groups"] += merged
+            stats["deleted"] += deleted
+        except Exception:
+            failed += 1
+            logger.exception(f"Memory consolidation failed for user {user_id}")
+
+    if failed:
+        logger.warning(f"Memory consolidation: {failed} users failed, watermark stays at {since.isoformat()}")
+    else:
+        await client.set(WATERMARK_KEY, until.isoformat())
+
+    logger.info(
+        f"Memory consolidation: {stats['users']} users, {stats['groups']} groups merged, "
+        f"{stats['deleted']} duplicates deleted in {time.perf_counter() - started:.1f}s"
+    )
+    return stats
+
+
+@shared_task(name="memory_consolidation_task")
+async def memory_consolidation_task(**kwargs):
+    return await consolidate_memories(**kwargs)
@@ -0,0 +1,273 @@
+"""
+Write-invalidated cache for get_memory_context results.
+
+Entries are kept per user in-process and keyed by the normalized query text (plus limit).
+Optionally a lookup may also match an earlier query whose embedding is close enough.
+
+Invalidation is driven by generation counters in Redis (DB 1, next to the mood keys):
+every memory add/update/delete bumps the owning user's counter (or the global one when
+the owner is unknown), and an entry is only served while both counters still match the
+values read before it was computed. A write in any worker therefore invalidates the
+cached context in every worker.
+"""
+
+import asyncio
+import re
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import redis
+import redis.asyncio as aioredis
+from athena_logging import get_logger
+from athena_settings import settings
+from langchain_core.embeddings import Embeddings
+
+logger = get_logger(__name__)
+
+Generation = Tuple[int, int]
+
+_GLOBAL_SCOPE = "__all__"
+_PUNCT_RE = re.compile(r"[^\w\s]")
+_SPACE_RE = re.compile(r"\s+")
+
+
+def normalize_query(query: str) -> str:
+    """Lowercase, drop punctuation and collapse whitespace."""
+    return _SPACE_RE.sub(" ", _PUNCT_RE.sub(" ", query.lower())).strip()
+
+
+@dataclass
+class _Entry:
+    # Formatted context, or whatever else a caller caches per query (the retrieval planner's hits)
+    context: Any
+    generation: Generation
+    cost_seconds: float
+    created_at: float
+    embedding: Optional[np.ndarray] = None
+
+
+@dataclass
+class CacheTicket:
+    """State captured on a miss that a later store() needs."""
+    generation: Generation
+    embedding: Optional[np.ndarray] = None
+
+
+@dataclass
+class _UserCache:
+    entries: "OrderedDict[Tuple[str, int], _Entry]" = field(default_factory=OrderedDict)
+
+
+class MemoryContextCache:
+    """Per-user cache of formatted memory context, invalidated by memory writes."""
+
+    def __init__(
+        self,
+        embeddings: Optional[Embeddings] = None,
+        similarity_threshold: Optional[float] = None,
+        ttl_seconds: float = 600.0,
+        max_entries_per_user: int = 256,
+        redis_url: Optional[str] = None,
+    ):
+        self.embeddings = embeddings
+        self.similarity_threshold = similarity_threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries_per_user = max_entries_per_user
+
+        self._redis_url = redis_url or f"redis://{settings.REDIS_URL}/1"
+        self._redis = redis.Redis.from_url(self._redis_url, decode_responses=True)
+        # One async client per event loop: ingest, consolidation and tiering invalidate from
+        # Celery tasks, each on its own asyncio.run loop, and pooled connections are loop-bound
+        self._aredis_by_loop: "Dict[asyncio.AbstractEventLoop, aioredis.Redis]" = {}
+
+        self._users: Dict[str, _UserCache] = {}
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._latency_saved = 0.0
+
+    def _aredis(self) -> aioredis.Redis:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            client = self._aredis_by_loop.get(loop)
+            if client is None:
+                # Clients of finished loops can't be closed any more; just drop them
+                for stale in [other for other in self._aredis_by_loop if other.is_closed()]:
+                    del self._aredis_by_loop[stale]
+                client = self._aredis_by_loop[loop] = aioredis.Redis.from_url(self._redis_url, decode_responses=True)
+            return client
+
+    # --- generations ---------
+
+    @staticmethod
+    def _gen_key(scope: str) -> str:
+        return f"athena:memctx:gen:{scope}"
+
+    def _gen_keys(self, user_id: str) -> List[str]:
+        return [self._gen_key(user_id), self._gen_key(_GLOBAL_SCOPE)]
+
+    @staticmethod
+    def _parse_generation(raw: List[Optional[str]]) -> Generation:
+        return int(raw[0] or 0), int(raw[1] or 0)
+
+    def generation(self, user_id: str) -> Optional[Generation]:
+        """Current (user, global) generation, or None if Redis is unreachable."""
+        try:
+            return self._parse_generation(self._redis.mget(self._gen_keys(user_id)))
+        except Exception:
+            logger.warning("Memory context cache could not read generation", exc_info=True)
+            return None
+
+    async def ageneration(self, user_id: str) -> Optional[Generation]:
+        try:
+            return self._parse_generation(await self._aredis().mget(self._gen_keys(user_id)))
+        except Exception:
+            logger.warning("Memory context cache could not read generation", exc_info=True)
+            return None
+
+    def _drop_local(self, user_id: Optional[str]) -> None:
+        with self._lock:
+            if user_id is None:
+                self._users.clear()
+            else:
+                self._users.pop(str(user_id), None)
+
+    def invalidate(self, user_id: Optional[str]) -> None:
+        """Invalidate one user's cached context, or everyone's when user_id is None."""
+        self._drop_local(user_id)
+        try:
+            self._redis.incr(self._gen_key(_GLOBAL_SCOPE if user_id is None else str(user_id)))
+        except Exception:
+            logger.warning("Memory context cache could not publish invalidation", exc_info=True)
+
+    async def ainvalidate(self, user_id: Optional[str]) -> None:
+        self._drop_local(user_id)
+        try:
+            await self._aredis().incr(self._gen_key(_GLOBAL_SCOPE if user_id is None else str(user_id)))
+        except Exception:
+            logger.warning("Memory context cache could not publish invalidation", exc_info=True)
+
+    # --- lookup / store ---------
+
+    def _match(
+        self,
+        user_id: str,
+        query: str,
+        limit: int,
+        generation: Generation,
+        query_embedding: Optional[np.ndarray],
+    ) -> Optional[_Entry]:
+        now = time.monotonic()
+        with self._lock:
+            user_cache = self._users.get(user_id)
+            if user_cache is None:
+                self._misses += 1
+                return None
+
+            # Evict anything stale before matching
+            for key in [k for k, e in user_cache.entries.items()
+                        if e.generation != generation or now - e.created_at > self.ttl_seconds]:
+                del user_cache.entries[key]
+
+            key = (normalize_query(query), limit)
+            entry = user_cache.entries.get(key)
+            if entry is None and query_embedding is not None:
+                candidates = [(k, e) for k, e in user_cache.entries.items() if k[1] == limit and e.embedding is not None]
+                if candidates:
+                    scores = np.stack([e.embedding for _, e in candidates]) @ query_embedding
+                    best = int(np.argmax(scores))
+                    if scores[best] >= self.similarity_threshold:
+                        key, entry = candidates[best]
+
+            if entry is None:
+                self._misses += 1
+                return None
+
+            user_cache.entries.move_to_end(key)
+            self._hits += 1
+            self._latency_saved += entry.cost_seconds
+            return entry
+
+    @staticmethod
+    def _unit(vector: List[float]) -> np.ndarray:
+        arr = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(arr)
+        return arr / norm if norm else arr
+
+    @property
+    def _uses_similarity(self) -> bool:
+        return self.embeddings is not None and self.similarity_threshold is not None
+
+    def _resolve(
+        self, user_id: str, query: str, limit: int,
+        generation: Optional[Generation], embedding: Optional[np.ndarray],
+    ) -> Tuple[Optional[Any], Optional[CacheTicket]]:
+        if generation is None:
+            return None, None
+        entry = self._match(str(user_id), query, limit, generation, embedding)
+        stats = self.stats
+        if (stats["hits"] + stats["misses"]) % 100 == 0:
+            logger.info(f"Memory context cache: hit ratio {stats['hit_ratio']:.1%}, "
+                        f"{stats['latency_saved_seconds']:.1f}s of retrieval saved")
+        if entry is not None:
+            logger.debug(f"Memory context cache hit for user {user_id} (saved {entry.cost_seconds * 1000:.0f}ms)")
+            return entry.context, None
+        return None, CacheTicket(generation, embedding)
+
+    def lookup(self, user_id: str, query: str, limit: int) -> Tuple[Optional[Any], Optional[CacheTicket]]:
+        """
+        Return (cached context, None) on a hit, or (None, ticket) on a miss.
+        Pass the ticket to store() with the freshly computed context; a None ticket on a
+        miss means the cache is unavailable and nothing should be stored.
+        """
+        generation = self.generation(user_id)
+        embedding = None
+        if generation is not None and self._uses_similarity:
+            embedding = self._unit(self.embeddings.embed_query(query))
+        return self._resolve(user_id, query, limit, generation, embedding)
+
+    async def alookup(self, user_id: str, query: str, limit: int) -> Tuple[Optional[Any], Optional[CacheTicket]]:
+        generation = await self.ageneration(user_id)
+        embedding = None
+        if generation is not None and self._uses_similarity:
+            embedding = self._unit(await self.embeddings.aembed_query(query))
+        return self._resolve(user_id, query, limit, generation, embedding)
+
+    def store(
+        self,
+        user_id: str,
+        query: str,
+        limit: int,
+        context: Any,
+        ticket: Optional[CacheTicket],
+        cost_seconds: float,
+    ) -> None:
+        """Cache a freshly computed context under the generation captured by lookup()."""
+        if ticket is None:
+            return
+        key = (normalize_query(query), limit)
+        entry = _Entry(context, ticket.generation, cost_seconds, time.monotonic(), ticket.embedding)
+        with self._lock:
+            user_cache = self._users.setdefault(str(user_id), _UserCache())
+            user_cache.entries[key] = entry
+            user_cache.entries.move_to_end(key)
+            while len(user_cache.entries) > self.max_entries_per_user:
+                user_cache.entries.popitem(last=False)
+
+    # --- stats ---------
+
+    @property
+    def stats(self) -> Dict[str, float]:
+        """Hit ratio and total retrieval latency avoided since process start."""
+        with self._lock:
+            total = self._hits + self._misses
+            return {
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_ratio": self._hits / total if total else 0.0,
+                "latency_saved_seconds": self._latency_saved,
+            }
@@ -1,12 +1,15 @@
 import asyncio
+import time
+import weakref
 from datetime import datetime
-from typing import List, Any, Dict
-from concurrent.futures import ThreadPoolExecutor
-from functools import wraps
+from typing import List, Any, Dict, Optional
 
-from mem0 import Memory
+from mem0 import AsyncMemory, Memory
 from athena_settings import settings
 from .utils import embeddings, vectorstore
+from .graph_writer import install_batched_graph
+from .memory_context_cache import MemoryContextCache
+from .reranker import build_memory_reranker
 from athena_logging import get_logger
 
 logger = get_logger(__name__)
@@ -107,23 +110,101 @@ config = {
             "client": vectorstore,
         },
     },
-    "embeddings": {
+    "embedder": {
         "provider": "langchain",
         "config": {
             "model": embeddings,
         },
     },
-    "reranker": {
-        "provider": "huggingface",
-        "config": {
-            "model": settings.RERANKER_MODEL,
-            "device": "cuda:0",
-        },
-    },
+    # The reranker is not configured here: mem0's HuggingFace one is fp32 transformers on a
+    # fixed device, so the CPU-tuned one from .reranker is attached after construction.
 }
 
 
-memory = Memory.from_config(config)
+# Cached get_memory_context results; every memory write below invalidates its owner's entries
+memory_context_cache = MemoryContextCache(
+    embeddings=embeddings,
+    similarity_threshold=getattr(settings, "MEMORY_CONTEXT_CACHE_SIMILARITY", None),
+    ttl_seconds=getattr(settings, "MEMORY_CONTEXT_CACHE_TTL_SECONDS", 600),
+)
+
+
+class CacheInvalidatingMemory(Memory):
+    """mem0 Memory that invalidates cached memory context on every write."""
+
+    def _owner_of(self, memory_id: str) -> Optional[str]:
+        try:
+            return (self.get(memory_id) or {}).get("user_id")
+        except Exception:
+            return None
+
+    def add(self, *args, user_id=None, **kwargs):
+        try:
+            return super().add(*args, user_id=user_id, **kwargs)
+        finally:
+            memory_context_cache.invalidate(user_id)
+
+    def update(self, memory_id, *args, **kwargs):
+        owner = self._owner_of(memory_id)
+        try:
+            return super().update(memory_id, *args, **kwargs)
+        finally:
+            memory_context_cache.invalidate(owner)
+
+    def delete(self, memory_id, *args, **kwargs):
+        owner = self._owner_of(memory_id)
+        try:
+            return super().delete(memory_id, *args, **kwargs)
+        finally:
+            memory_context_cache.invalidate(owner)
+
+    def delete_all(self, *args, user_id=None, **kwargs):
+        try:
+            return super().delete_all(*args, user_id=user_id, **kwargs)
+        finally:
+            memory_context_cache.invalidate(user_id)
+
+
+class CacheInvalidatingAsyncMemory(AsyncMemory):
+    """mem0 AsyncMemory that invalidates cached memory context on every write."""
+
+    async def _owner_of(self, memory_id: str) -> Optional[str]:
+        try:
+            return (await self.get(memory_id) or {}).get("user_id")
+        except Exception:
+            return None
+
+    async def add(self, *args, user_id=None, **kwargs):
+        try:
+            return await super().add(*args, user_id=user_id, **kwargs)
+        finally:
+            await memory_context_cache.ainvalidate(user_id)
+
+    async def update(self, memory_id, *args, **kwargs):
+        owner = await self._owner_of(memory_id)
+        try:
+            return await super().update(memory_id, *args, **kwargs)
+        finally:
+            await memory_context_cache.ainvalidate(owner)
+
+    async def delete(self, memory_id, *args, **kwargs):
+        owner = await self._owner_of(memory_id)
+        try:
+            return await super().delete(memory_id, *args, **kwargs)
+        finally:
+            await memory_context_cache.ainvalidate(owner)
+
+    async def delete_all(self, *args, user_id=None, **kwargs):
+        try:
+            return await super().delete_all(*args, user_id=user_id, **kwargs)
+        finally:
+            await memory_context_cache.ainvalidate(user_id)
+
+
+memory = CacheInvalidatingMemory.from_config(config)
+memory.reranker = build_memory_reranker()
+# Entity/relation writes go to Neo4j in UNWIND batches over the async driver
+install_batched_graph(memory)
 
 # Define custom categories for evaluative memories (goals)
 custom_categories = [
@@ -136,6 +217,59 @@ custom_categories = [
 # The evaluative category will be handled through metadata instead
 logger.info("Memory engine initialized - using metadata for category classification")
 
+def _format_memory_context(results: Any, limit: int) -> str:
+    """Format mem0 search results as a context block for the agent."""
+    if not results:
+        return ""
+
+    context_lines = []
+
+    # Handle different result formats from mem0
+    if isinstance(results, dict):
+        # If results is a dict, look for common keys that might contain the results
+        if "results" in results:
+            limit = min(limit, len(results["results"]))
+            result_list = results["results"][:limit]
+        elif "memories" in results:
+            limit = min(limit, len(results["memories"]))
+            result_list = results["memories"][:limit]
+        else:
+            logger.warning(f"Unexpected results format: {results}")
+            return ""
+    elif isinstance(results, list):
+        limit = min(limit, len(results))
+        result_list = results[:limit]
+    else:
+        logger.warning(f"Unexpected results type: {type(results)}")
+        return ""
+
+    for result in result_list:
+        if isinstance(result, dict):
+            memory_text = result.get("memory") or result.get("content") or result.get("text") or str(result)
+            context_lines.append(f"- {memory_text}")
+        elif isinstance(result, str):
+            context_lines.append(f"- {result}")
+
+    if context_lines:
+        context = "Relevant information from previous conversations:\n" + "\n".join(context_lines)
+        logger.info(f"Retrieved {len(context_lines)} memories for query")
+        return context
+    return ""
+
+def _conversation_payload(user_message: str, assistant_message: str) -> tuple[List[Dict[str, str]], Dict[str, Any]]:
+    """Build the messages and metadata mem0 stores for one conversation turn."""
+    messages = [
+        {"role": "user", "content": user_message},
+        {"role": "assistant", "content": assistant_message}
+    ]
+
+    # Add metadata to help with autonomous classification
+    metadata = {
+        "conversation_type": "interactive",
+        "timestamp": datetime.now().isoformat(),
+    }
+    return messages, metadata
+
 def get_memory_context(query: str, limit: int = 5, user_id: str = None) -> str:
     """
     Retrieve relevant memories for a query, formatted as context.
@@ -145,44 +279,15 @@ def get_memory_context(query: str, limit: int = 5, user_id: str = None) -> str:
         user_id = str(1)
 
     try:
-        results = memory.search(query, user_id=user_id, limit=limit)
-        if not results:
-            return ""
-
-        context_lines = []
-
-
-        # Handle different result formats from mem0
-        if isinstance(results, dict):
-            # If results is a dict, look for common keys that might contain the results
-            if "results" in results:
-                limit = min(limit, len(results["results"]))
-                result_list = results["results"][:limit]
-            elif "memories" in results:
-                limit = min(limit, len(results["memories"]))
-                result_list = results["memories"][:limit]
-            else:
-                logger.warning(f"Unexpected results format: {results}")
-                return ""
-        elif isinstance(results, list):
-            limit = min(limit, len(results))
-            result_list = results[:limit]
-        else:
-            logger.warning(f"Unexpected results type: {type(results)}")
-            return ""
+        cached, ticket = memory_context_cache.lookup(user_id, query, limit)
+        if cached is not None:
+            return cached
 
-        for result in result_list:
-            if isinstance(result, dict):
-                memory_text = result.get("memory") or result.get("content") or result.get("text") or str(result)
-                context_lines.append(f"- {memory_text}")
-            elif isinstance(result, str):
-                context_lines.append(f"- {result}")
-
-        if context_lines:
-            context = "Relevant information from previous conversations:\n" + "\n".join(context_lines)
-            logger.info(f"Retrieved {len(context_lines)} memories for query")
-            return context
-        return ""
+        started = time.perf_counter()
+        results = memory.search(query, user_id=user_id, limit=limit)
+        context = _format_memory_context(results, limit)
+        memory_context_cache.store(user_id, query, limit, context, ticket, time.perf_counter() - started)
+        return context
     except Exception as e:
         logger.exception("Failed to retrieve memory context")
         return ""
@@ -193,17 +298,7 @@ def store_conversation(user_message: str, assistant_message: str, user_id: str =
     This should be called automatically after each assistant response.
     """
     try:
-        messages = [
-            {"role": "user", "content": user_message},
-            {"role": "assistant", "content": assistant_message}
-        ]
-
-        # Add metadata to help with autonomous classification
-        metadata = {
-            "conversation_type": "interactive",
-            "timestamp": datetime.now().isoformat(),
-        }
-
+        messages, metadata = _conversation_payload(user_message, assistant_message)
         memory.add(messages, user_id=user_id, metadata=metadata)
         logger.info("Stored conversation in memory with evaluative classification support")
     except Exception as e:
@@ -221,68 +316,113 @@ def verify_evaluative_category() -> str:
     return "ℹ Using metadata-based categorization for evaluative memories (goals, objectives, targets)"
 
 
-# Thread pool for memory operations
-_memory_thread_pool = ThreadPoolExecutor(max_workers=20, thread_name_prefix="memory_ops")
+# --- Async memory engine ---------
+#
+# Async callers go through mem0's AsyncMemory instead of pushing the sync client onto a
+# thread pool. Every operation holds a slot of a per-loop semaphore, which also caps the
+# worker threads mem0 uses for its blocking provider calls, and is cut off by a timeout
+# so a slow LLM or graph call can't stall the turn that awaits it.
 
-def _run_in_thread(func):
-    """Decorator to run sync functions in thread pool."""
-    @wraps(func)
-    async def async_wrapper(*args, **kwargs):
-        loop = asyncio.get_event_loop()
-        try:
-            result = await loop.run_in_executor(_memory_thread_pool, func, *args, **kwargs)
-            return result
-        except Exception as e:
-            logger.exception(f"Error running {func.__name__} in thread pool")
-            # Return appropriate default for the function type
-            if func.__name__ == "get_memory_context":
-                return ""
-            return None
-    return async_wrapper
+MEMORY_MAX_CONCURRENCY: int = getattr(settings, "MEMORY_MAX_CONCURRENCY", 32)
+MEMORY_SEARCH_TIMEOUT_SECONDS: float = getattr(settings, "MEMORY_SEARCH_TIMEOUT_SECONDS", 8.0)
+MEMORY_ADD_TIMEOUT_SECONDS: float = getattr(settings, "MEMORY_ADD_TIMEOUT_SECONDS", 120.0)
 
-@_run_in_thread
-def _sync_get_memory_context(query: str, limit: int = 5, user_id: str = None) -> str:
-    """Synchronous version of get_memory_context for thread pool execution."""
-    return get_memory_context(query, limit, user_id)
+_async_memory: Optional[CacheInvalidatingAsyncMemory] = None
+# Celery runs every task under a fresh asyncio.run(), so loop-bound primitives are kept per loop
+_loop_semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = weakref.WeakKeyDictionary()
+_loop_init_locks: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Lock]" = weakref.WeakKeyDictionary()
+_background_tasks: set[asyncio.Task] = set()
 
-@_run_in_thread
-def _sync_store_conversation(user_message: str, assistant_message: str, user_id: str = "1") -> None:
-    """Synchronous version of store_conversation for thread pool execution."""
-    return store_conversation(user_message, assistant_message, user_id)
+def _memory_semaphore() -> asyncio.Semaphore:
+    loop = asyncio.get_running_loop()
+    semaphore = _loop_semaphores.get(loop)
+    if semaphore is None:
+        semaphore = _loop_semaphores[loop] = asyncio.Semaphore(MEMORY_MAX_CONCURRENCY)
+    return semaphore
+
+async def get_async_memory() -> CacheInvalidatingAsyncMemory:
+    """
+    Return the process-wide AsyncMemory, creating it on first use.
+    It shares the vectorstore, embeddings and reranker model with the sync `memory`.
+    """
+    global _async_memory
+    if _async_memory is not None:
+        return _async_memory
+
+    loop = asyncio.get_running_loop()
+    lock = _loop_init_locks.setdefault(loop, asyncio.Lock())
+    async with lock:
+        if _async_memory is None:
+            instance = await CacheInvalidatingAsyncMemory.from_config(config)
+            # Reuse the already-loaded cross-encoder instead of loading a second copy
+            instance.reranker = memory.reranker
+            install_batched_graph(instance)
+            _async_memory = instance
+            logger.info("Async memory engine initialized")
+    return _async_memory
 
-# Async wrappers for memory operations
 async def get_memory_context_async(query: str, limit: int = 5, user_id: str = None) -> str:
     """
-    Async wrapper for get_memory_context that runs in a thread pool.
-    Use this in async contexts to avoid blocking.
+    Async version of get_memory_context built on mem0's AsyncMemory.
+    Returns "" if retrieval fails or exceeds MEMORY_SEARCH_TIMEOUT_SECONDS.
     """
-    return await _sync_get_memory_context(query, limit, user_id)
+    if user_id is None:
+        user_id = str(1)
+
+    try:
+        cached, ticket = await memory_context_cache.alookup(user_id, query, limit)
+        if cached is not None:
+            return cached
+
+        async_memory = await get_async_memory()
+        started = time.perf_counter()
+        async with _memory_semaphore():
+            results = await asyncio.wait_for(
+                async_memory.search(query, user_id=user_id, limit=limit),
+                timeout=MEMORY_SEARCH_TIMEOUT_SECONDS,
+            )
+        context = _format_memory_context(results, limit)
+        memory_context_cache.store(user_id, query, limit, context, ticket, time.perf_counter() - started)
+        return context
+    except asyncio.TimeoutError:
+        logger.warning(f"Memory search timed out after {MEMORY_SEARCH_TIMEOUT_SECONDS}s")
+        return ""
+    except Exception as e:
+        logger.exception("Failed to retrieve memory context")
+        return ""
 
 async def store_conversation_async(user_message: str, assistant_message: str, user_id: str = "1") -> None:
     """
-    Async wrapper for store_conversation that runs in a thread pool.
-    Use this in async contexts to avoid blocking.
+    Async version of store_conversation built on mem0's AsyncMemory.
+    Failures and timeouts (MEMORY_ADD_TIMEOUT_SECONDS) are logged, not raised.
     """
-    return await _sync_store_conversation(user_message, assistant_message, user_id)
+    try:
+        async_memory = await get_async_memory()
+        messages, metadata = _conversation_payload(user_message, assistant_message)
+        async with _memory_semaphore():
+            await asyncio.wait_for(
+                async_memory.add(messages, user_id=user_id, metadata=metadata),
+                timeout=MEMORY_ADD_TIMEOUT_SECONDS,
+            )
+        logger.info("Stored conversation in memory with evaluative classification support")
+    except asyncio.TimeoutError:
+        logger.warning(f"Storing conversation timed out after {MEMORY_ADD_TIMEOUT_SECONDS}s")
+    except Exception as e:
+        logger.exception("Failed to store conversation")
 
 def store_conversation_fire_and_forget(user_message: str, assistant_message: str, user_id: str = "1") -> None:
     """
     Fire-and-forget version of store_conversation that doesn't block.
-    Schedules the storage operation in the background.
+    Schedules the storage on the running loop, or runs it to completion if there is none.
     """
-    async def _background_store():
-        try:
-            await store_conversation_async(user_message, assistant_message, user_id)
-            logger.debug("Background conversation storage completed")
-        except Exception as e:
-            logger.exception("Background conversation storage failed")
-
-    # Schedule the coroutine in the background
+    coro = store_conversation_async(user_message, assistant_message, user_id)
     try:
-        loop = asyncio.get_event_loop()
-        if loop.is_running():
-            asyncio.create_task(_background_store())
-        else:
-            loop.run_until_complete(_background_store())
-    except Exception as e:
-        logger.exception("Failed to schedule background conversation storage")
\ No newline at end of file
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        asyncio.run(coro)
+        return
+
+    # Keep a reference so the task isn't garbage-collected mid-flight
+    task = loop.create_task(coro)
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
@@ -0,0 +1,266 @@
+"""
+Batched memory ingestion for archived threads.
+
+mem0's add() handles one conversation turn at a time: one extraction call, one
+update-decision call and a handful of embedding calls per turn. Archiving a long thread
+that way costs minutes of LLM time. Here turns are packed into a few extraction calls under
+a token budget, the resulting facts are de-duplicated locally, and the ADD/UPDATE/DELETE
+decisions are made and applied in bulk against the same vector store mem0 reads from.
+"""
+
+import asyncio
+import hashlib
+import json
+import uuid
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pytz
+from athena_logging import get_logger
+from athena_settings import settings
+from mem0.configs.prompts import get_update_memory_messages
+from mem0.memory.utils import extract_json, parse_messages, remove_code_blocks
+
+from .memory_engine import (
+    CUSTOM_FACT_EXTRACTION_PROMPT,
+    CUSTOM_UPDATE_MEMORY_PROMPT,
+    MEMORY_ADD_TIMEOUT_SECONDS,
+    _conversation_payload,
+    _memory_semaphore,
+    get_async_memory,
+    memory_context_cache,
+)
+from .memory_context_cache import normalize_query
+from .utils import embeddings, vectorstore
+
+logger = get_logger(__name__)
+
+MEMORY_INGEST_TOKEN_BUDGET: int = getattr(settings, "MEMORY_INGEST_TOKEN_BUDGET", 6000)
+MEMORY_INGEST_FACTS_PER_DECISION: int = getattr(settings, "MEMORY_INGEST_FACTS_PER_DECISION", 40)
+MEMORY_INGEST_DUPLICATE_SIMILARITY: float = getattr(settings, "MEMORY_INGEST_DUPLICATE_SIMILARITY", 0.95)
+MEMORY_INGEST_NEIGHBOURS: int = 5
+
+
+def _estimate_tokens(text: str) -> int:
+    # ~4 characters per token is close enough for budgeting prompts
+    return len(text) // 4 + 1
+
+
+def _pack_turns(pairs: List[Dict[str, Any]], budget: int) -> List[List[Dict[str, str]]]:
+    """Pack conversation pairs into message chunks of at most `budget` estimated tokens."""
+    chunks: List[List[Dict[str, str]]] = []
+    current: List[Dict[str, str]] = []
+    used = 0
+    for pair in pairs:
+        messages, _ = _conversation_payload(pair["user_message"], pair["assistant_message"])
+        cost = sum(_estimate_tokens(m["content"]) for m in messages)
+        if current and used + cost > budget:
+            chunks.append(current)
+            current, used = [], 0
+        current.extend(messages)
+        used += cost
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def _parse_json(response: str, key: str) -> List[Any]:
+    response = remove_code_blocks(response or "")
+    if not response.strip():
+        return []
+    try:
+        return json.loads(response).get(key, [])
+    except json.JSONDecodeError:
+        return json.loads(extract_json(response)).get(key, [])
+
+
+async def _generate(llm, messages: List[Dict[str, str]]) -> str:
+    async with _memory_semaphore():
+        return await asyncio.wait_for(
+            asyncio.to_thread(llm.generate_response, messages=messages, response_format={"type": "json_object"}),
+            timeout=MEMORY_ADD_TIMEOUT_SECONDS,
+        )
+
+
+async def _extract_facts(llm, chunk: List[Dict[str, str]]) -> List[str]:
+    messages = [
+        {"role": "system", "content": CUSTOM_FACT_EXTRACTION_PROMPT},
+        {"role": "user", "content": f"Input:\n{parse_messages(chunk)}"},
+    ]
+    try:
+        facts = _parse_json(await _generate(llm, messages), "facts")
+        return [f.strip() for f in facts if isinstance(f, str) and f.strip()]
+    except Exception:
+        logger.exception("Fact extraction failed for archived chunk")
+        return []
+
+
+def _dedupe_facts(facts: List[str], vectors: List[List[float]], threshold: float) -> List[int]:
+    """Indices of facts to keep: first exact (normalized) duplicates, then near-duplicates by cosine."""
+    seen = set()
+    candidates = []
+    for idx, fact in enumerate(facts):
+        key = normalize_query(fact)
+        if key not in seen:
+            seen.add(key)
+            candidates.append(idx)
+    if len(candidates) < 2:
+        return candidates
+
+    matrix = np.asarray([vectors[i] for i in candidates], dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    matrix /= np.where(norms == 0, 1.0, norms)
+    similarity = matrix @ matrix.T
+
+    keep: List[int] = []
+    for row in range(len(candidates)):
+        if keep and similarity[row, keep].max() >= threshold:
+            continue
+        keep.append(row)
+    return [candidates[row] for row in keep]
+
+
+async def _existing_memories(
+    async_memory, facts: List[str], vectors: List[List[float]], user_id: str
+) -> Dict[str, Any]:
+    """Nearest stored memories for every fact, searched concurrently and merged by id."""
+    async def search(fact: str, vector: List[float]):
+        return await asyncio.to_thread(
+            async_memory.vector_store.search,
+            query=fact,
+            vectors=vector,
+            limit=MEMORY_INGEST_NEIGHBOURS,
+            filters={"user_id": user_id},
+        )
+
+    results = await asyncio.gather(*(search(f, v) for f, v in zip(facts, vectors)), return_exceptions=True)
+    existing: Dict[str, Any] = {}
+    for result in results:
+        if isinstance(result, Exception):
+            logger.warning(f"Existing memory search failed: {result}")
+            continue
+        for mem in result:
+            existing.setdefault(mem.id, mem)
+    return existing
+
+
+def _now() -> str:
+    return datetime.now(pytz.timezone("US/Pacific")).isoformat()
+
+
+async def _decide_and_apply(
+    async_memory,
+    facts: List[str],
+    vectors: List[List[float]],
+    user_id: str,
+    metadata: Dict[str, Any],
+) -> Dict[str, int]:
+    """One update-decision call for a batch of facts, then one upsert and one delete."""
+    existing = await _existing_memories(async_memory, facts, vectors, user_id)
+
+    # mem0's update prompt works on small integer ids; map them back afterwards
+    temp_ids: Dict[str, str] = {}
+    old_memory = []
+    for idx, (memory_id, mem) in enumerate(existing.items()):
+        temp_ids[str(idx)] = memory_id
+        old_memory.append({"id": str(idx), "text": (mem.payload or {}).get("data", "")})
+
+    prompt = get_update_memory_messages(old_memory, facts, CUSTOM_UPDATE_MEMORY_PROMPT)
+    try:
+        actions = _parse_json(await _generate(async_memory.llm, [{"role": "user", "content": prompt}]), "memory")
+    except Exception:
+        logger.exception("Memory update decision failed for archived facts")
+        return {"ADD": 0, "UPDATE": 0, "DELETE": 0}
+
+    upserts: List[Tuple[str, str, Dict[str, Any]]] = []
+    deletes: List[str] = []
+    for action in actions:
+        event, text = action.get("event"), action.get("text")
+        memory_id = temp_ids.get(str(action.get("id")))
+        if event == "ADD" and text:
+            payload = {**metadata, "data": text, "hash": hashlib.md5(text.encode()).hexdigest(), "created_at": _now()}
+            upserts.append((str(uuid.uuid4()), text, payload))
+        elif event == "UPDATE" and text and memory_id:
+            previous = existing[memory_id].payload or {}
+            payload = {**previous, **metadata, "data": text, "hash": hashlib.md5(text.encode()).hexdigest(),
+                       "created_at": previous.get("created_at"), "updated_at": _now()}
+            upserts.append((memory_id, text, payload))
+        elif event == "DELETE" and memory_id:
+            deletes.append(memory_id)
+
+    if upserts:
+        # Facts are already embedded (and cached); only rewritten UPDATE texts cost a provider call
+        texts = [text for _, text, _ in upserts]
+        upsert_vectors = await embeddings.aembed_documents(texts)
+        await vectorstore.aadd_embeddings(
+            texts=texts,
+            embeddings=upsert_vectors,
+            metadatas=[payload for _, _, payload in upserts],
+            ids=[memory_id for memory_id, _, _ in upserts],
+        )
+    if deletes:
+        await vectorstore.adelete(deletes)
+
+    counts = {"ADD": 0, "UPDATE": 0, "DELETE": len(deletes)}
+    for memory_id, _, _ in upserts:
+        counts["UPDATE" if memory_id in existing else "ADD"] += 1
+    return counts
+
+
+async def ingest_conversations(pairs: List[Dict[str, Any]], user_id: str) -> Optional[Dict[str, int]]:
+    """
+    Store many conversation pairs (dicts with user_message / assistant_message) for one user.
+
+    Returns the number of memories added, updated and deleted, or None if ingestion failed.
+    Failures are logged, not raised, like store_conversation_async.
+    """
+    if not pairs:
+        return {"ADD": 0, "UPDATE": 0, "DELETE": 0}
+
+    user_id = str(user_id)
+    try:
+        async_memory = await get_async_memory()
+        chunks = _pack_turns(pairs, MEMORY_INGEST_TOKEN_BUDGET)
+        _, metadata = _conversation_payload("", "")
+        metadata["user_id"] = user_id
+
+        graph_tasks = []
+        if async_memory.enable_graph:
+            for chunk in chunks:
+                data = "\n".join(m["content"] for m in chunk)
+                graph_tasks.append(asyncio.to_thread(async_memory.graph.add, data, {"user_id": user_id}))
+
+        extracted, graph_results = await asyncio.gather(
+            asyncio.gather(*(_extract_facts(async_memory.llm, chunk) for chunk in chunks)),
+            asyncio.gather(*graph_tasks, return_exceptions=True),
+        )
+        for result in graph_results:
+            if isinstance(result, Exception):
+                logger.warning(f"Graph ingestion failed for archived chunk: {result}")
+
+        facts = [fact for chunk_facts in extracted for fact in chunk_facts]
+        counts = {"ADD": 0, "UPDATE": 0, "DELETE": 0}
+        if facts:
+            vectors = await embeddings.aembed_documents(facts)
+            keep = _dedupe_facts(facts, vectors, MEMORY_INGEST_DUPLICATE_SIMILARITY)
+            facts = [facts[i] for i in keep]
+            vectors = [vectors[i] for i in keep]
+
+            # Batches run in order so later decisions see earlier writes
+            for start in range(0, len(facts), MEMORY_INGEST_FACTS_PER_DECISION):
+                end = start + MEMORY_INGEST_FACTS_PER_DECISION
+                batch_counts = await _decide_and_apply(async_memory, facts[start:end], vectors[start:end], user_id, metadata)
+                for event, count in batch_counts.items():
+                    counts[event] += count
+
+        logger.info(
+            f"Ingested {len(pairs)} conversations in {len(chunks)} extraction calls: "
+            f"{len(facts)} unique facts, {counts['ADD']} added, {counts['UPDATE']} updated, {counts['DELETE']} deleted"
+        )
+        return counts
+    except Exception:
+        logger.exception("Failed to ingest archived conversations")
+        return None
+    finally:
+        await memory_context_cache.ainvalidate(user_id)
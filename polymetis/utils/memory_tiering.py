@@ -0,0 +1,146 @@
+"""
+Hot/cold tiering for long-term memories in rag.docs.
+
+Searches scoped to a user count every memory they return in rag.docs_access (buffered per
+process and flushed every MEMORY_ACCESS_FLUSH_SECONDS, so reads stay reads). This job
+uses that to move idle memories into rag.docs_cold. The cold table has a binary-quantized
+index and is searched only when the hot tier comes back short or weak (see
+Mem0CompatiblePGVectorStore._afiltered_search). Cold memories that get hit again move
+back. The hot index then tracks what is actually used rather than a user's whole history.
+
+A memory goes cold when it has been neither written nor returned for its type's idle
+period (MEMORY_TIER_IDLE_DAYS, keyed by the [TYPE] prefix). Each past access stretches
+that period by ln(1 + access_count). Episodic events fade first, while facts and rules
+that keep being retrieved stay hot.
+"""
+
+import time
+from typing import Dict, List, Set, Tuple
+
+from athena_celery import shared_task
+from athena_logging import get_logger
+from athena_settings import settings
+from sqlalchemy import text
+
+from .db import engine
+from .memory_engine import memory_context_cache
+
+logger = get_logger(__name__)
+
+MEMORY_TIER_IDLE_DAYS: Dict[str, float] = getattr(
+    settings,
+    "MEMORY_TIER_IDLE_DAYS",
+    {"EPISODIC": 30, "EVALUATIVE": 90, "PROCEDURAL": 365, "FACTUAL": 365},
+)
+MEMORY_TIER_DEFAULT_IDLE_DAYS: float = getattr(settings, "MEMORY_TIER_DEFAULT_IDLE_DAYS", 180)
+MEMORY_TIER_BATCH_SIZE: int = getattr(settings, "MEMORY_TIER_BATCH_SIZE", 1000)
+
+_HOT = "rag.docs"
+_COLD = "rag.docs_cold"
+_ACCESS = "rag.docs_access"
+_COLUMNS = "langchain_id, content, embedding, langchain_metadata, title, user_id"
+
+
+def _idle_days_sql() -> Tuple[str, Dict[str, float]]:
+    """CASE expression giving each hot memory's idle period from its leading [TYPE] tag."""
+    params: Dict[str, float] = {"default_days": float(MEMORY_TIER_DEFAULT_IDLE_DAYS)}
+    branches = []
+    for i, (memory_type, days) in enumerate(MEMORY_TIER_IDLE_DAYS.items()):
+        branches.append(f"WHEN :type_{i} THEN CAST(:days_{i} AS double precision) ")
+        params[f"type_{i}"] = memory_type.upper()
+        params[f"days_{i}"] = float(days)
+    return (
+        f"CASE upper(substring(d.content from '^\\s*\\[([A-Za-z]+)')) {''.join(branches)}"
+        f"ELSE CAST(:default_days AS double precision) END",
+        params,
+    )
+
+
+def _demote_stmt() -> Tuple[str, Dict[str, float]]:
+    idle_days, params = _idle_days_sql()
+    params["min_days"] = float(min([MEMORY_TIER_DEFAULT_IDLE_DAYS, *MEMORY_TIER_IDLE_DAYS.values()]))
+    return (
+        f"WITH idle AS ("
+        f"  SELECT d.langchain_id FROM {_HOT} d LEFT JOIN {_ACCESS} a USING (langchain_id)"
+        f"  WHERE d.langchain_metadata ? 'user_id'"
+        # Narrows the scan through docs_memory_updated_at_idx before the per-type check
+        f"    AND d.updated_at < now() - interval '1 day' * CAST(:min_days AS double precision)"
+        f"    AND GREATEST(d.updated_at, a.last_accessed_at)"
+        f"        < now() - interval '1 day' * {idle_days} * (1 + ln(1 + COALESCE(a.access_count, 0)))"
+        f"  LIMIT :batch FOR UPDATE OF d SKIP LOCKED"
+        f"), moved AS ("
+        f"  DELETE FROM {_HOT} d USING idle WHERE d.langchain_id = idle.langchain_id"
+        f"  RETURNING {', '.join('d.' + col for col in _COLUMNS.split(', '))}, d.updated_at"
+        f") "
+        f"INSERT INTO {_COLD} ({_COLUMNS}, updated_at) SELECT {_COLUMNS}, updated_at FROM moved "
+        # A leftover cold copy is older than the hot row being demoted
+        f"ON CONFLICT (langchain_id) DO UPDATE SET content = EXCLUDED.content, embedding = EXCLUDED.embedding, "
+        f"langchain_metadata = EXCLUDED.langchain_metadata, title = EXCLUDED.title, user_id = EXCLUDED.user_id, "
+        f"updated_at = EXCLUDED.updated_at, demoted_at = now() "
+        f"RETURNING langchain_metadata->>'user_id'"
+    ), params
+
+
+# A cold memory that was returned by a search since its demotion is in use again.
+# It re-enters the hot table with a fresh updated_at so consolidation re-checks it.
+_PROMOTE_STMT = (
+    f"WITH hit AS ("
+    f"  SELECT c.langchain_id FROM {_COLD} c JOIN {_ACCESS} a USING (langchain_id)"
+    f"  WHERE a.last_accessed_at > c.demoted_at AND c.user_id IS NOT NULL"
+    f"  LIMIT :batch FOR UPDATE OF c SKIP LOCKED"
+    f"), moved AS ("
+    f"  DELETE FROM {_COLD} c USING hit WHERE c.langchain_id = hit.langchain_id"
+    f"  RETURNING {', '.join('c.' + col for col in _COLUMNS.split(', '))}"
+    f") "
+    f"INSERT INTO {_HOT} ({_COLUMNS}) SELECT {_COLUMNS} FROM moved "
+    # A hot row with the same id was rewritten after the demotion and wins
+    f"ON CONFLICT (langchain_id) DO NOTHING "
+    f"RETURNING langchain_metadata->>'user_id'"
+)
+
+# Stats for memories deleted outside the vector store (e.g. by consolidation)
+_PRUNE_ACCESS_STMT = (
+    f"DELETE FROM {_ACCESS} a WHERE NOT EXISTS (SELECT 1 FROM {_HOT} d WHERE d.langchain_id = a.langchain_id) "
+    f"AND NOT EXISTS (SELECT 1 FROM {_COLD} c WHERE c.langchain_id = a.langchain_id)"
+)
+
+
+async def _move_in_batches(stmt: str, params: Dict[str, float], users: Set[str]) -> int:
+    """Run a move statement batch by batch (one transaction each) until nothing is left."""
+    moved = 0
+    while True:
+        async with engine.begin() as conn:
+            owners: List[str] = (
+                await conn.execute(text(stmt), {**params, "batch": MEMORY_TIER_BATCH_SIZE})
+            ).scalars().all()
+        moved += len(owners)
+        users.update(owner for owner in owners if owner)
+        if len(owners) < MEMORY_TIER_BATCH_SIZE:
+            return moved
+
+
+async def tier_memories() -> Dict[str, int]:
+    """Promote cold memories that were hit again, then demote idle hot ones."""
+    started = time.perf_counter()
+    users: Set[str] = set()
+
+    promoted = await _move_in_batches(_PROMOTE_STMT, {}, users)
+    demote_stmt, demote_params = _demote_stmt()
+    demoted = await _move_in_batches(demote_stmt, demote_params, users)
+    async with engine.begin() as conn:
+        pruned = (await conn.execute(text(_PRUNE_ACCESS_STMT))).rowcount
+
+    # Cached memory context was computed against the old split
+    for user_id in users:
+        await memory_context_cache.ainvalidate(user_id)
+
+    logger.info(
+        f"Memory tiering: {promoted} promoted, {demoted} demoted across {len(users)} users, "
+        f"{pruned} stale access rows pruned in {time.perf_counter() - started:.1f}s"
+    )
+    return {"promoted": promoted, "demoted": demoted, "users": len(users), "pruned": pruned}
+
+
+@shared_task(name="memory_tiering_task")
+async def memory_tiering_task(**kwargs):
+    return await tier_memories()
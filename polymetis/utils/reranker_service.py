@@ -0,0 +1,224 @@
+"""
+Host-local reranker service with dynamic batching, and the retriever-side client for it.
+
+Every prefork worker used to load its own cross-encoder and score each query alone. The
+service instead holds the only copy of the model on a host. It collects the rerank
+requests that arrive within a few milliseconds of each other (or until a pair budget is
+reached), scores them in one model call and hands each caller back its own slice of
+scores over a Unix socket.
+
+Wire format: each message is a 4-byte big-endian length followed by a JSON body. Requests
+are {"query": str, "texts": [str]} and responses {"scores": [float]} or {"error": str}.
+"""
+
+import asyncio
+import json
+import os
+import socket
+import struct
+import time
+from typing import Any, Dict, List, Optional, Protocol, Sequence, Tuple
+
+from athena_logging import get_logger
+from athena_settings import settings
+from langchain_core.callbacks import Callbacks
+from langchain_core.documents import BaseDocumentCompressor, Document
+
+logger = get_logger(__name__)
+
+RERANKER_SERVICE_SOCKET: str = getattr(settings, "RERANKER_SERVICE_SOCKET", "/tmp/athena-reranker.sock")
+RERANKER_SERVICE_MAX_WAIT_MS: float = getattr(settings, "RERANKER_SERVICE_MAX_WAIT_MS", 5.0)
+RERANKER_SERVICE_MAX_PAIRS: int = getattr(settings, "RERANKER_SERVICE_MAX_PAIRS", 256)
+RERANKER_SERVICE_TIMEOUT_SECONDS: float = getattr(settings, "RERANKER_SERVICE_TIMEOUT_SECONDS", 2.0)
+
+_HEADER = struct.Struct(">I")
+
+
+class PairScorer(Protocol):
+    def score_pairs(self, pairs: List[Tuple[str, str]]) -> Any: ...
+
+
+def _frame(payload: Dict[str, Any]) -> bytes:
+    body = json.dumps(payload).encode()
+    return _HEADER.pack(len(body)) + body
+
+
+# --- service ---------
+
+class RerankBatcher:
+    """Queues rerank requests and scores whatever arrived together in one model call."""
+
+    def __init__(self, model: PairScorer, max_wait_ms: float, max_pairs: int):
+        self.model = model
+        self.max_wait = max_wait_ms / 1000
+        self.max_pairs = max_pairs
+        self._queue: "asyncio.Queue[Tuple[str, List[str], asyncio.Future]]" = asyncio.Queue()
+
+    async def submit(self, query: str, texts: List[str]) -> List[float]:
+        if not texts:
+            return []
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((query, texts, future))
+        return await future
+
+    async def run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            pairs = len(batch[0][1])
+            deadline = loop.time() + self.max_wait
+            while pairs < self.max_pairs:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), remaining)
+                except asyncio.TimeoutError:
+                    break
+                batch.append(item)
+                pairs += len(item[1])
+            await self._score(batch, pairs)
+
+    async def _score(self, batch: List[Tuple[str, List[str], asyncio.Future]], pairs: int) -> None:
+        started = time.perf_counter()
+        try:
+            # The model call blocks; the event loop keeps accepting the next batch meanwhile
+            scores = await asyncio.to_thread(
+                self.model.score_pairs, [(query, text) for query, texts, _ in batch for text in texts]
+            )
+        except Exception as e:
+            logger.exception("Batched rerank failed")
+            for _, _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        offset = 0
+        for _, texts, future in batch:
+            if not future.done():
+                future.set_result([float(s) for s in scores[offset:offset + len(texts)]])
+            offset += len(texts)
+        logger.debug(f"Reranked {len(batch)} requests / {pairs} pairs in {(time.perf_counter() - started) * 1000:.0f}ms")
+
+
+async def _handle(batcher: RerankBatcher, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+    try:
+        while True:
+            try:
+                (size,) = _HEADER.unpack(await reader.readexactly(_HEADER.size))
+                request = json.loads(await reader.readexactly(size))
+            except asyncio.IncompleteReadError:
+                break
+            try:
+                response = {"scores": await batcher.submit(request["query"], list(request["texts"]))}
+            except Exception as e:
+                response = {"error": str(e)}
+            writer.write(_frame(response))
+            await writer.drain()
+    except Exception:
+        logger.exception("Reranker connection failed")
+    finally:
+        writer.close()
+
+
+async def serve(
+    model: PairScorer,
+    socket_path: str = RERANKER_SERVICE_SOCKET,
+    max_wait_ms: float = RERANKER_SERVICE_MAX_WAIT_MS,
+    max_pairs: int = RERANKER_SERVICE_MAX_PAIRS,
+) -> None:
+    """Serve `model` on a Unix socket until cancelled."""
+    batcher = RerankBatcher(model, max_wait_ms, max_pairs)
+    if os.path.exists(socket_path):
+        os.unlink(socket_path)  # left behind by a previous run
+
+    server = await asyncio.start_unix_server(lambda r, w: _handle(batcher, r, w), path=socket_path)
+    os.chmod(socket_path, 0o660)
+    batch_loop = asyncio.create_task(batcher.run())
+    logger.info(f"Reranker service listening on {socket_path} (max wait {max_wait_ms}ms, max {max_pairs} pairs)")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        batch_loop.cancel()
+
+
+# --- client ---------
+
+def _recv_exactly(sock: socket.socket, size: int) -> bytes:
+    chunks = []
+    while size:
+        chunk = sock.recv(size)
+        if not chunk:
+            raise ConnectionError("Reranker service closed the connection")
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b"".join(chunks)
+
+
+def _check(response: Dict[str, Any]) -> List[float]:
+    if "error" in response:
+        raise RuntimeError(f"Reranker service error: {response['error']}")
+    return response["scores"]
+
+
+def request_scores(query: str, texts: List[str], socket_path: str, timeout: float) -> List[float]:
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(timeout)
+        sock.connect(socket_path)
+        sock.sendall(_frame({"query": query, "texts": texts}))
+        (size,) = _HEADER.unpack(_recv_exactly(sock, _HEADER.size))
+        return _check(json.loads(_recv_exactly(sock, size)))
+
+
+async def arequest_scores(query: str, texts: List[str], socket_path: str, timeout: float) -> List[float]:
+    async def exchange() -> List[float]:
+        reader, writer = await asyncio.open_unix_connection(socket_path)
+        try:
+            writer.write(_frame({"query": query, "texts": texts}))
+            await writer.drain()
+            (size,) = _HEADER.unpack(await reader.readexactly(_HEADER.size))
+            return _check(json.loads(await reader.readexactly(size)))
+        finally:
+            writer.close()
+
+    return await asyncio.wait_for(exchange(), timeout)
+
+
+class RerankerServiceCompressor(BaseDocumentCompressor):
+    """Document compressor that reranks through the host's reranker service."""
+
+    socket_path: str = RERANKER_SERVICE_SOCKET
+    top_n: int = 3
+    timeout: float = RERANKER_SERVICE_TIMEOUT_SECONDS
+
+    def _rank(self, documents: Sequence[Document], scores: List[float]) -> List[Document]:
+        ranked = sorted(zip(documents, scores), key=lambda item: item[1], reverse=True)[: self.top_n]
+        return [
+            Document(id=doc.id, page_content=doc.page_content, metadata={**doc.metadata, "relevance_score": score})
+            for doc, score in ranked
+        ]
+
+    def compress_documents(
+        self, documents: Sequence[Document], query: str, callbacks: Optional[Callbacks] = None
+    ) -> Sequence[Document]:
+        if not documents:
+            return []
+        try:
+            scores = request_scores(query, [d.page_content for d in documents], self.socket_path, self.timeout)
+        except Exception as e:
+            logger.warning(f"Reranker service unavailable ({e}); keeping vector order")
+            return list(documents)[: self.top_n]
+        return self._rank(documents, scores)
+
+    async def acompress_documents(
+        self, documents: Sequence[Document], query: str, callbacks: Optional[Callbacks] = None
+    ) -> Sequence[Document]:
+        if not documents:
+            return []
+        try:
+            scores = await arequest_scores(query, [d.page_content for d in documents], self.socket_path, self.timeout)
+        except Exception as e:
+            logger.warning(f"Reranker service unavailable ({e}); keeping vector order")
+            return list(documents)[: self.top_n]
+        return self._rank(documents, scores)
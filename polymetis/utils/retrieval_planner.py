@@ -0,0 +1,226 @@
+"""
+Per-turn retrieval planner.
+
+A Telegram turn used to fetch memory context first and then let the agent call
+search_memories / search_goals / search_docs one after another, each re-embedding the
+query and searching on its own. The planner embeds the turn's text once and fans that
+vector out to every source at the same time:
+
+  memories  mem0's vector store (rag.docs, scoped to the user; goals are tagged [EVALUATIVE])
+  graph     mem0's Neo4j graph, when enabled
+  archive   the LangGraph PostgresStore the conversation archive writes to
+
+rag.docs is not searched unfiltered: it holds every user's memories, so an unscoped query
+could put another user's memories in this user's prompt. Memory hits are cached like
+get_memory_context's results, under the same per-user generation counters, so any memory
+write invalidates them in every worker.
+
+Hits are de-duplicated across sources (by id, then by normalized text), ranked together
+with one cross-encoder call (reciprocal-rank fusion when no reranker is loaded), and
+returned as a single context block. Each source runs under its own timeout, and its
+timing is kept on the result and logged.
+"""
+
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from athena_logging import get_logger
+from athena_settings import settings
+
+from .memory_context_cache import MemoryContextCache, normalize_query
+from .memory_engine import MEMORY_SEARCH_TIMEOUT_SECONDS, _memory_semaphore, get_async_memory, memory
+from .utils import embeddings, store
+
+logger = get_logger(__name__)
+
+RETRIEVAL_PLANNER_ENABLED: bool = getattr(settings, "RETRIEVAL_PLANNER_ENABLED", True)
+RETRIEVAL_PLANNER_LIMIT: int = getattr(settings, "RETRIEVAL_PLANNER_LIMIT", 8)
+# Candidates fetched per source before fusion
+RETRIEVAL_PLANNER_PER_SOURCE: int = getattr(settings, "RETRIEVAL_PLANNER_PER_SOURCE", 8)
+RETRIEVAL_PLANNER_RRF_K: float = getattr(settings, "RETRIEVAL_PLANNER_RRF_K", 60)
+
+_GOAL_TAG = "[EVALUATIVE"
+
+# Raw memory hits per (user, query); a separate instance from memory_context_cache so the
+# two never serve each other's entries, but invalidated by the same Redis generations
+_memory_hits_cache = MemoryContextCache(
+    embeddings=embeddings,
+    similarity_threshold=getattr(settings, "MEMORY_CONTEXT_CACHE_SIMILARITY", None),
+    ttl_seconds=getattr(settings, "MEMORY_CONTEXT_CACHE_TTL_SECONDS", 600),
+)
+
+
+@dataclass
+class RetrievalHit:
+    source: str
+    id: str
+    text: str
+    score: float = 0.0
+    metadata: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def label(self) -> str:
+        if self.source == "memories" and (
+            self.text.lstrip().upper().startswith(_GOAL_TAG) or self.metadata.get("category") == "evaluative"
+        ):
+            return "goal"
+        return {"memories": "memory", "archive": "archive"}.get(self.source, self.source)
+
+
+@dataclass
+class RetrievalResult:
+    hits: List[RetrievalHit] = field(default_factory=list)
+    relations: List[str] = field(default_factory=list)
+    # Wall time per source (and "embed" / "rank"), in milliseconds
+    timings: Dict[str, float] = field(default_factory=dict)
+
+    def to_context(self) -> str:
+        """The block handed to the agent as a system message ("" when nothing was found)."""
+        if not self.hits and not self.relations:
+            return ""
+        lines = ["Relevant context for this message (best first):"]
+        lines += [f"- [{hit.label}] {hit.text}" for hit in self.hits]
+        if self.relations:
+            lines.append("Known relations:")
+            lines += [f"- {relation}" for relation in self.relations]
+        lines.append(
+            "Retrieved from: " + ", ".join(f"{source} {ms:.0f}ms" for source, ms in self.timings.items())
+        )
+        return "\n".join(lines)
+
+
+# --- sources ---------
+
+async def _search_memories(query: str, embedding: List[float], user_id: str, limit: int) -> List[RetrievalHit]:
+    cached, ticket = await _memory_hits_cache.alookup(user_id, query, limit)
+    if cached is None:
+        started = time.perf_counter()
+        async_memory = await get_async_memory()
+        async with _memory_semaphore():
+            # Same search mem0 runs, minus its own embedding call
+            results = await asyncio.to_thread(
+                async_memory.vector_store.search,
+                query=query,
+                vectors=embedding,
+                limit=limit,
+                filters={"user_id": user_id},
+            )
+        cached = [
+            (str(mem.id), (mem.payload or {}).get("data", ""), mem.payload or {})
+            for mem in results
+            if (mem.payload or {}).get("data")
+        ]
+        _memory_hits_cache.store(user_id, query, limit, cached, ticket, time.perf_counter() - started)
+    # Fresh objects every time: ranking writes scores onto the hits
+    return [RetrievalHit(source="memories", id=id, text=text, metadata=dict(metadata)) for id, text, metadata in cached]
+
+
+async def _search_graph(query: str, user_id: str, limit: int) -> List[str]:
+    async_memory = await get_async_memory()
+    if not async_memory.enable_graph:
+        return []
+    async with _memory_semaphore():
+        relations = await asyncio.to_thread(async_memory.graph.search, query, {"user_id": user_id}, limit)
+    return [f"{r['source']} —{r['relationship']}→ {r['destination']}" for r in relations or []]
+
+
+async def _search_archive(query: str, namespace: str, limit: int) -> List[RetrievalHit]:
+    # The store embeds through the shared CachedEmbeddings, so the planner's vector is reused
+    items = await store.asearch(namespace, query=query, limit=limit)
+    return [
+        RetrievalHit(source="archive", id=item.key, text=item.value.get("text", ""), metadata=dict(item.value))
+        for item in items
+        if item.value.get("text")
+    ]
+
+
+async def _timed(name: str, coro, timings: Dict[str, float]) -> Any:
+    started = time.perf_counter()
+    try:
+        return await asyncio.wait_for(coro, timeout=MEMORY_SEARCH_TIMEOUT_SECONDS)
+    except asyncio.TimeoutError:
+        logger.warning(f"Retrieval source {name} timed out after {MEMORY_SEARCH_TIMEOUT_SECONDS}s")
+    except Exception:
+        logger.exception(f"Retrieval source {name} failed")
+    finally:
+        timings[name] = (time.perf_counter() - started) * 1000
+    return []
+
+
+# --- fusion ---------
+
+def _dedupe(ranked_lists: List[List[RetrievalHit]]) -> Tuple[List[RetrievalHit], Dict[int, float]]:
+    """Unique hits in first-seen order, plus each one's reciprocal-rank fusion score."""
+    unique: List[RetrievalHit] = []
+    by_key: Dict[str, int] = {}
+    fused: Dict[int, float] = {}
+    for hits in ranked_lists:
+        for rank, hit in enumerate(hits):
+            # The same text can come back as a memory and as an archived message
+            keys = (f"id:{hit.id}", f"text:{normalize_query(hit.text)}")
+            position = next((by_key[key] for key in keys if key in by_key), None)
+            if position is None:
+                position = len(unique)
+                unique.append(hit)
+            for key in keys:
+                by_key.setdefault(key, position)
+            fused[position] = fused.get(position, 0.0) + 1.0 / (RETRIEVAL_PLANNER_RRF_K + rank)
+    return unique, fused
+
+
+def _rank(query: str, hits: List[RetrievalHit], fused: Dict[int, float], limit: int) -> List[RetrievalHit]:
+    reranker = memory.reranker
+    if reranker is not None and hits:
+        try:
+            scores = reranker.score(query, [hit.text for hit in hits])
+            for hit, score in zip(hits, scores):
+                hit.score = float(score)
+            return sorted(hits, key=lambda hit: hit.score, reverse=True)[:limit]
+        except Exception:
+            logger.exception("Reranking retrieval hits failed; using rank fusion")
+    for position, hit in enumerate(hits):
+        hit.score = fused[position]
+    return sorted(hits, key=lambda hit: hit.score, reverse=True)[:limit]
+
+
+async def plan_retrieval(
+    query: str,
+    user_id: str = "1",
+    namespace: str = "telegram",
+    limit: int = RETRIEVAL_PLANNER_LIMIT,
+    per_source: int = RETRIEVAL_PLANNER_PER_SOURCE,
+) -> RetrievalResult:
+    """Embed `query` once, search every source concurrently and rank the merged hits."""
+    result = RetrievalResult()
+    if not query.strip():
+        return result
+
+    started = time.perf_counter()
+    try:
+        embedding = await embeddings.aembed_query(query)
+    except Exception:
+        logger.exception("Embedding the retrieval query failed")
+        return result
+    result.timings["embed"] = (time.perf_counter() - started) * 1000
+
+    memories, relations, archive = await asyncio.gather(
+        _timed("memories", _search_memories(query, embedding, user_id, per_source), result.timings),
+        _timed("graph", _search_graph(query, user_id, per_source), result.timings),
+        _timed("archive", _search_archive(query, namespace, per_source), result.timings),
+    )
+
+    ranking_started = time.perf_counter()
+    hits, fused = _dedupe([memories, archive])
+    # Scoring is CPU-bound; keep the loop free for the rest of the turn
+    result.hits = await asyncio.to_thread(_rank, query, hits, fused, limit)
+    result.relations = relations
+    result.timings["rank"] = (time.perf_counter() - ranking_started) * 1000
+
+    logger.info(
+        f"Retrieval plan: {len(result.hits)} hits from {len(memories) + len(archive)} candidates, "
+        f"{len(relations)} relations in {(time.perf_counter() - started) * 1000:.0f}ms "
+        f"({', '.join(f'{name} {ms:.0f}ms' for name, ms in result.timings.items())})"
+    )
+    return result
@@ -24,7 +24,9 @@ from langchain_mcp_adapters.client import MultiServerMCPClient
 from langchain_openai import ChatOpenAI
 from langchain_postgres import PGEngine, PGVector, PGVectorStore
 from .mem0_compatible_pgvectorstore import Mem0CompatiblePGVectorStore
-from langchain_postgres.v2.indexes import DistanceStrategy, HNSWIndex
+from .embedding_cache import CachedEmbeddings
+from .embedding_coalescer import CoalescingEmbeddings
+from langchain_postgres.v2.indexes import DistanceStrategy, HNSWQueryOptions
 from langgraph.checkpoint.redis import AsyncRedisSaver
 from langgraph.graph import END, StateGraph
 from langgraph.graph.message import add_messages
@@ -41,16 +43,32 @@ from utils.build_retriever import build_retriever
 logger = get_logger(__name__)
 
 # Database connection setup
-vec_options = quote('-c search_path=rag,public', safe='')
+# Session default for hnsw.ef_search (recall vs latency); pick it with scripts/manage_vector_indexes.py sweep
+VECTOR_EF_SEARCH: int = getattr(settings, "VECTOR_EF_SEARCH", 40)
+vec_options = quote(f'-c search_path=rag,public -c hnsw.ef_search={VECTOR_EF_SEARCH}', safe='')
 vec_dsn = f"{settings.DATABASE_URL}{'&' if '?' in settings.DATABASE_URL else '?'}options={vec_options}"
 _db_url_no_driver = re.sub(r'^postgresql\+[^:]+', 'postgresql', settings.DATABASE_URL)
-store_options = quote('-c search_path=graph,public', safe='')
+store_options = quote(f'-c search_path=graph,public -c hnsw.ef_search={VECTOR_EF_SEARCH}', safe='')
 store_dsn = f"{_db_url_no_driver}{'&' if '?' in _db_url_no_driver else '?'}options={store_options}"
 
-pg_engine = PGEngine.from_connection_string(vec_dsn)
+# One pooled async engine serves the vectorstore and both the sync and async mem0 clients
+pg_engine = PGEngine.from_connection_string(
+    vec_dsn,
+    pool_size=getattr(settings, "VECTOR_DB_POOL_SIZE", 10),
+    max_overflow=getattr(settings, "VECTOR_DB_MAX_OVERFLOW", 20),
+    pool_pre_ping=True,
+)
 
 # Initialize embeddings and vectorstore
-embeddings = init_embeddings(model="openai:text-embedding-3-small")
+# Shared by the vectorstore, PostgresStore and mem0, so all three hit the same cache;
+# cache misses from concurrent callers are coalesced into shared provider batches
+EMBEDDING_MODEL = "openai:text-embedding-3-small"
+EMBEDDING_DIMS = 1536
+embeddings = CachedEmbeddings(
+    CoalescingEmbeddings(init_embeddings(model=EMBEDDING_MODEL)),
+    model=EMBEDDING_MODEL,
+    dims=EMBEDDING_DIMS,
+)
 
 vectorstore: Mem0CompatiblePGVectorStore = Mem0CompatiblePGVectorStore.create_sync(
     engine=pg_engine,
@@ -58,14 +76,15 @@ vectorstore: Mem0CompatiblePGVectorStore = Mem0CompatiblePGVectorStore.create_sy
     table_name="docs",
     schema_name="rag",
     distance_strategy=DistanceStrategy.EUCLIDEAN,  # L2
+    index_query_options=HNSWQueryOptions(ef_search=VECTOR_EF_SEARCH),
 )
 
-index: HNSWIndex = HNSWIndex(distance_strategy=DistanceStrategy.EUCLIDEAN, m=16, ef_construction=64)
+# HNSW indexes themselves are built and tuned by utils/vector_indexes.py (scripts/manage_vector_indexes.py)
 
 # Initialize PostgresStore
 _store_cm = PostgresStore.from_conn_string(
     store_dsn,
-    index={"dims": 1536, "embed": embeddings, "fields": ["text"]},
+    index={"dims": EMBEDDING_DIMS, "embed": embeddings, "fields": ["text"]},
 )
 store: PostgresStore = _store_cm.__enter__()
 atexit.register(lambda: _store_cm.__exit__(None, None, None))
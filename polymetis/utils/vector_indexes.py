@@ -0,0 +1,227 @@
+"""
+HNSW index management for the vector tables (rag.docs and graph.store_vectors).
+
+Indexes are (re)built without blocking writers: the new index is built CONCURRENTLY under
+a temporary name, then swapped in for the old one. recall_sweep() measures recall@k and
+latency for a range of hnsw.ef_search values against exact (sequential) search, so the
+build and search parameters can be picked from data rather than server defaults.
+The quantized rag.docs indexes (halfvec, binary) are managed and swept the same way,
+with their candidates rescored against the full-precision column. They are opt-in: no
+migration builds them, only an explicit rebuild does.
+"""
+
+import statistics
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence
+
+from athena_logging import get_logger
+from athena_models import engine
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+logger = get_logger(__name__)
+
+
+_OPERATORS = {
+    "vector_l2_ops": "<->", "vector_cosine_ops": "<=>", "vector_ip_ops": "<#>",
+    "halfvec_l2_ops": "<->", "halfvec_cosine_ops": "<=>", "halfvec_ip_ops": "<#>",
+    "bit_hamming_ops": "<~>",
+}
+
+
+@dataclass(frozen=True)
+class HNSWIndexSpec:
+    schema: str
+    table: str
+    column: str
+    name: str
+    ops: str
+    id_column: str
+    # Quantized indexes are built on an expression of the column and queried through a
+    # matching expression of the query vector; their candidates are rescored at full precision
+    expression: Optional[str] = None
+    query_expression: Optional[str] = None
+    rescore_ops: Optional[str] = None
+    # Only built on request, never by migrations or a bare rebuild
+    opt_in: bool = False
+
+    @property
+    def qualified_table(self) -> str:
+        return f'"{self.schema}"."{self.table}"'
+
+    @property
+    def operator(self) -> str:
+        return _OPERATORS[self.ops]
+
+    @property
+    def column_ref(self) -> str:
+        return f'"{self.column}"'
+
+    @property
+    def target(self) -> str:
+        """What the index is built on: the column, or the parenthesised quantizing expression"""
+        return f"({self.expression})" if self.expression else self.column_ref
+
+    def ann_order(self) -> str:
+        query = self.query_expression or "CAST(:query AS vector)"
+        return f"{self.expression or self.column_ref} {self.operator} {query}"
+
+    def exact_order(self) -> str:
+        return f"{self.column_ref} {_OPERATORS[self.rescore_ops or self.ops]} CAST(:query AS vector)"
+
+
+VECTOR_INDEXES: Dict[str, HNSWIndexSpec] = {
+    # Mem0CompatiblePGVectorStore uses DistanceStrategy.EUCLIDEAN
+    "rag.docs": HNSWIndexSpec("rag", "docs", "embedding", "docs_emb_l2_hnsw", "vector_l2_ops", "langchain_id"),
+    # Opt-in compact first pass (VECTOR_QUANTIZATION / RETRIEVAL_QUANTIZATION)
+    "rag.docs:halfvec": HNSWIndexSpec(
+        "rag", "docs", "embedding", "docs_emb_halfvec_l2_hnsw", "halfvec_l2_ops", "langchain_id",
+        expression="embedding::halfvec(1536)",
+        query_expression="CAST(:query AS halfvec(1536))",
+        rescore_ops="vector_l2_ops",
+        opt_in=True,
+    ),
+    "rag.docs:binary": HNSWIndexSpec(
+        "rag", "docs", "embedding", "docs_emb_bit_hamming_hnsw", "bit_hamming_ops", "langchain_id",
+        expression="binary_quantize(embedding)::bit(1536)",
+        query_expression="binary_quantize(CAST(:query AS vector))",
+        rescore_ops="vector_l2_ops",
+        opt_in=True,
+    ),
+    # Cold memory tier (memory_tiering); only ever searched through the binary index
+    "rag.docs_cold": HNSWIndexSpec(
+        "rag", "docs_cold", "embedding", "docs_cold_emb_bit_hamming_hnsw", "bit_hamming_ops", "langchain_id",
+        expression="binary_quantize(embedding)::bit(1536)",
+        query_expression="binary_quantize(CAST(:query AS vector))",
+        rescore_ops="vector_l2_ops",
+    ),
+    # langgraph's PostgresStore searches by cosine distance
+    "graph.store_vectors": HNSWIndexSpec(
+        "graph", "store_vectors", "embedding", "store_vectors_emb_cosine_hnsw", "vector_cosine_ops", "id"
+    ),
+}
+
+
+# What a rebuild or sweep without explicit tables covers
+DEFAULT_INDEXES: List[str] = [key for key, spec in VECTOR_INDEXES.items() if not spec.opt_in]
+
+
+async def index_status(db: AsyncEngine = engine) -> List[Dict[str, Any]]:
+    """Validity, size and build options of each managed index."""
+    stmt = text(
+        "SELECT c.relname AS name, i.indisvalid AS valid, pg_size_pretty(pg_relation_size(c.oid)) AS size, "
+        "pg_relation_size(c.oid) AS size_bytes, c.reloptions AS options "
+        "FROM pg_class c JOIN pg_index i ON i.indexrelid = c.oid JOIN pg_namespace n ON n.oid = c.relnamespace "
+        "WHERE n.nspname = :schema AND c.relname = :name"
+    )
+    status = []
+    async with db.connect() as conn:
+        for key, spec in VECTOR_INDEXES.items():
+            row = (await conn.execute(stmt, {"schema": spec.schema, "name": spec.name})).mappings().first()
+            status.append({"table": key, "index": spec.name, **(dict(row) if row else {"valid": None})})
+    return status
+
+
+async def rebuild_index(
+    spec: HNSWIndexSpec,
+    m: int = 16,
+    ef_construction: int = 64,
+    maintenance_work_mem: Optional[str] = None,
+    parallel_workers: Optional[int] = None,
+    db: AsyncEngine = engine,
+) -> None:
+    """
+    Build a fresh HNSW index CONCURRENTLY and swap it in for the existing one.
+    Reads and writes keep working throughout; a failed build leaves the old index in place.
+    """
+    staging = f"{spec.name}_rebuild"
+    # CREATE/DROP INDEX CONCURRENTLY can't run inside a transaction block
+    async with db.connect() as conn:
+        conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+        if maintenance_work_mem:
+            await conn.execute(text(f"SET maintenance_work_mem = '{maintenance_work_mem}'"))
+        if parallel_workers is not None:
+            await conn.execute(text(f"SET max_parallel_maintenance_workers = {int(parallel_workers)}"))
+
+        # Leftover from an interrupted rebuild (an invalid index)
+        await conn.execute(text(f'DROP INDEX CONCURRENTLY IF EXISTS "{spec.schema}"."{staging}"'))
+
+        started = time.perf_counter()
+        logger.info(f"Building {staging} on {spec.qualified_table} (m={m}, ef_construction={ef_construction})")
+        await conn.execute(text(
+            f'CREATE INDEX CONCURRENTLY "{staging}" ON {spec.qualified_table} '
+            f"USING hnsw ({spec.target} {spec.ops}) WITH (m = {int(m)}, ef_construction = {int(ef_construction)})"
+        ))
+        await conn.execute(text(f'DROP INDEX CONCURRENTLY IF EXISTS "{spec.schema}"."{spec.name}"'))
+        await conn.execute(text(f'ALTER INDEX "{spec.schema}"."{staging}" RENAME TO "{spec.name}"'))
+        logger.info(f"Rebuilt {spec.name} in {time.perf_counter() - started:.1f}s")
+
+
+async def drop_index(spec: HNSWIndexSpec, db: AsyncEngine = engine) -> None:
+    """
+    Drop an index CONCURRENTLY, e.g. the float32 one once a quantized first pass serves all
+    searches, or a quantized one that is no longer used.
+    """
+    async with db.connect() as conn:
+        conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+        await conn.execute(text(f'DROP INDEX CONCURRENTLY IF EXISTS "{spec.schema}"."{spec.name}"'))
+    logger.info(f"Dropped {spec.name}")
+
+
+async def recall_sweep(
+    spec: HNSWIndexSpec,
+    ef_values: Sequence[int] = (10, 20, 40, 80, 160, 320),
+    k: int = 10,
+    samples: int = 50,
+    oversample: int = 4,
+    db: AsyncEngine = engine,
+) -> List[Dict[str, float]]:
+    """
+    recall@k and latency per hnsw.ef_search, against exact search for the same queries.
+    Queries are embeddings sampled from the table itself, so no embedding calls are made.
+    Quantized indexes fetch k * oversample candidates and rescore them at full precision.
+    """
+    table, id_column = spec.qualified_table, f'"{spec.id_column}"'
+    exact_search = text(f"SELECT {id_column} FROM {table} ORDER BY {spec.exact_order()} LIMIT :k")
+    if spec.rescore_ops:
+        search = text(
+            f"SELECT {id_column} FROM (SELECT {id_column}, {spec.column_ref} FROM {table} "
+            f"ORDER BY {spec.ann_order()} LIMIT :candidates) candidates ORDER BY {spec.exact_order()} LIMIT :k"
+        )
+    else:
+        search = exact_search
+
+    async with db.connect() as conn:
+        queries = (await conn.execute(text(
+            f"SELECT {spec.column_ref}::text AS embedding FROM {table} "
+            f"ORDER BY random() LIMIT :samples"
+        ), {"samples": samples})).scalars().all()
+        await conn.commit()
+
+        # Ground truth with the index disabled
+        exact: List[set] = []
+        async with conn.begin():
+            await conn.execute(text("SET LOCAL enable_indexscan = off"))
+            for query in queries:
+                exact.append(set((await conn.execute(exact_search, {"query": query, "k": k})).scalars().all()))
+
+        results = []
+        for ef in ef_values:
+            recalls, timings = [], []
+            async with conn.begin():
+                await conn.execute(text(f"SET LOCAL hnsw.ef_search = {int(ef)}"))
+                for query, truth in zip(queries, exact):
+                    started = time.perf_counter()
+                    params = {"query": query, "k": k, "candidates": k * oversample}
+                    found = (await conn.execute(search, params)).scalars().all()
+                    timings.append((time.perf_counter() - started) * 1000)
+                    recalls.append(len(truth.intersection(found)) / max(1, len(truth)))
+            timings.sort()
+            results.append({
+                "ef_search": ef,
+                "recall": statistics.mean(recalls) if recalls else 0.0,
+                "p50_ms": statistics.median(timings) if timings else 0.0,
+                "p95_ms": timings[max(0, int(len(timings) * 0.95) - 1)] if timings else 0.0,
+            })
+    return results
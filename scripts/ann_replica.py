@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+ANN Replica
+Keeps this host's memory-mapped replica of rag.docs fresh for the workers' candidate
+generation (ANN_REPLICA_ENABLED=true points Mem0CompatiblePGVectorStore at it)
+
+  PYTHONPATH=polymetis python scripts/ann_replica.py run
+"""
+import argparse
+import asyncio
+import logging
+import time
+
+from utils.ann_replica import ANN_REPLICA_DIR, AnnReplica, rebuild, refresh
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+async def run(directory: str, interval: float):
+    logger.info(f"🚀 Refreshing ANN replica in {directory} every {interval}s")
+    while True:
+        started = time.perf_counter()
+        try:
+            await refresh(directory)
+        except Exception:
+            logger.exception("❌ Replica refresh failed; workers fall back to the HNSW index once it goes stale")
+        await asyncio.sleep(max(0.0, interval - (time.perf_counter() - started)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("command", choices=["run", "rebuild", "refresh", "status"])
+    parser.add_argument("--dir", default=ANN_REPLICA_DIR)
+    parser.add_argument("--interval", type=float, default=5.0, help="seconds between refreshes (run)")
+    args = parser.parse_args()
+
+    if args.command == "run":
+        try:
+            asyncio.run(run(args.dir, args.interval))
+        except KeyboardInterrupt:
+            logger.info("👋 ANN replica refresher stopped")
+    elif args.command == "rebuild":
+        manifest = asyncio.run(rebuild(args.dir))
+        logger.info(f"✅ {manifest['snapshot']}: {manifest['snapshot_rows']} rows")
+    elif args.command == "refresh":
+        manifest = asyncio.run(refresh(args.dir))
+        logger.info(f"✅ {manifest['snapshot']} + {manifest['delta_rows']} delta rows")
+    else:
+        status = AnnReplica(args.dir).status
+        if status is None:
+            logger.info(f"⚠️ No replica in {args.dir}")
+            return
+        age = time.time() - status["snapshot_built_at"]
+        logger.info(
+            f"📊 {status['table']}: snapshot {status['snapshot']} ({status['snapshot_rows']} rows, {age / 3600:.1f}h old), "
+            f"delta {status['delta_rows']} rows, watermark {status['watermark']}"
+        )
+
+
+if __name__ == "__main__":
+    main()
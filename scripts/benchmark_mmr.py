@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+MMR Benchmark
+Measures candidate decoding and MMR selection latency at fetch_k 20/100/500, comparing the
+vectorized path used by the store with langchain_core's generic implementation
+
+  PYTHONPATH=polymetis python scripts/benchmark_mmr.py
+"""
+import argparse
+import json
+import logging
+import os
+import statistics
+import struct
+import time
+
+import numpy as np
+
+from utils.mmr import decode_vectors, maximal_marginal_relevance
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def synthetic_candidates(fetch_k, dims, rng):
+    """Clustered unit vectors around a query, roughly what an ANN search returns."""
+    query = rng.standard_normal(dims).astype(np.float32)
+    centres = query + rng.standard_normal((8, dims)).astype(np.float32)
+    vectors = centres[rng.integers(0, len(centres), fetch_k)] + 0.3 * rng.standard_normal((fetch_k, dims))
+    return query, vectors.astype(np.float32)
+
+
+def as_text(vectors):
+    # What the generic path gets back from pgvector: one "[x,y,...]" string per row
+    return ["[" + ",".join(f"{x:.6g}" for x in row) + "]" for row in vectors]
+
+
+def as_send(vectors):
+    # vector_send(): int16 dim, int16 unused, big-endian float4s
+    header = struct.pack(">hh", vectors.shape[1], 0)
+    return [header + row.astype(">f4").tobytes() for row in vectors]
+
+
+def timed(fn, repeats):
+    fn()  # warm-up
+    timings = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - started) * 1000)
+    timings.sort()
+    return statistics.median(timings), timings[max(0, int(len(timings) * 0.95) - 1)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", nargs="+", type=int, default=[20, 100, 500])
+    parser.add_argument("--k", type=int, default=int(os.environ.get("RETRIEVAL_K", 4)))
+    parser.add_argument("--lambda-mult", type=float, default=float(os.environ.get("RETRIEVAL_MMR_LAMBDA", 0.5)))
+    parser.add_argument("--dims", type=int, default=1536)
+    parser.add_argument("--repeats", type=int, default=50)
+    args = parser.parse_args()
+
+    try:
+        from langchain_core.vectorstores.utils import maximal_marginal_relevance as generic_mmr
+    except ImportError:
+        generic_mmr = None
+        logger.warning("⚠️ langchain_core not installed; only the vectorized path is measured")
+
+    rng = np.random.default_rng(0)
+    logger.info(f"📊 MMR, k={args.k}, lambda={args.lambda_mult}, {args.dims} dims (p50 / p95 ms)")
+    for fetch_k in args.sizes:
+        query, vectors = synthetic_candidates(fetch_k, args.dims, rng)
+        text_rows, send_rows = as_text(vectors), as_send(vectors)
+
+        def vectorized():
+            return maximal_marginal_relevance(query, decode_vectors(send_rows), k=args.k, lambda_mult=args.lambda_mult)
+
+        p50, p95 = timed(vectorized, args.repeats)
+        line = f"   • fetch_k {fetch_k:>4}: vectorized {p50:7.2f} / {p95:7.2f}"
+
+        if generic_mmr is not None:
+            def generic():
+                candidates = [json.loads(row) for row in text_rows]
+                return generic_mmr(query, candidates, k=args.k, lambda_mult=args.lambda_mult)
+
+            g50, g95 = timed(generic, max(1, args.repeats // 5))
+            same = "same picks" if list(generic()) == vectorized() else "⚠️ picks differ"
+            line += f"   generic {g50:7.2f} / {g95:7.2f}   ({g50 / p50:.1f}x, {same})"
+        logger.info(line)
+
+
+if __name__ == "__main__":
+    main()
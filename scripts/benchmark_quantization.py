@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Vector Quantization Benchmark
+Compares the full-precision, halfvec and binary (Hamming + full-precision rescore) indexes
+on rag.docs: on-disk index size, recall@k against exact search, and p50/p95 latency
+
+  PYTHONPATH=polymetis python scripts/benchmark_quantization.py
+"""
+import argparse
+import asyncio
+import logging
+
+from utils.vector_indexes import VECTOR_INDEXES, index_status, recall_sweep
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+MODES = {"none": "rag.docs", "halfvec": "rag.docs:halfvec", "binary": "rag.docs:binary"}
+
+
+async def benchmark(args):
+    sizes = {row["table"]: row for row in await index_status()}
+    for mode in args.modes:
+        key = MODES[mode]
+        size = sizes.get(key, {})
+        if size.get("valid") is None:
+            logger.warning(f"⚠️ {mode}: {VECTOR_INDEXES[key].name} missing (scripts/manage_vector_indexes.py rebuild {key})")
+            continue
+
+        logger.info(f"📊 {mode}: {VECTOR_INDEXES[key].name} {size['size']} on disk")
+        for oversample in args.oversample if mode != "none" else [1]:
+            rows = await recall_sweep(
+                VECTOR_INDEXES[key], ef_values=args.ef, k=args.k, samples=args.samples, oversample=oversample
+            )
+            for row in rows:
+                label = f"ef_search {row['ef_search']:>4}" + (f", oversample {oversample:>2}" if mode != "none" else "")
+                logger.info(
+                    f"   • {label}: recall@{args.k} {row['recall']:.3f}  "
+                    f"p50 {row['p50_ms']:7.2f}ms  p95 {row['p95_ms']:7.2f}ms"
+                )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--modes", nargs="+", choices=list(MODES), default=list(MODES))
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--samples", type=int, default=50)
+    parser.add_argument("--ef", nargs="+", type=int, default=[40, 80, 160])
+    parser.add_argument("--oversample", nargs="+", type=int, default=[2, 4, 8])
+    args = parser.parse_args()
+    asyncio.run(benchmark(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+ReAct Agent Build Benchmark
+Measures the per-turn cost of getting node_converse's agent: building and compiling it with
+create_react_agent on every turn (before) versus the per-tone-bucket cache (after)
+"""
+import argparse
+import logging
+import os
+import statistics
+import time
+from functools import lru_cache
+from typing import Literal
+
+os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")  # Nothing is sent; ChatOpenAI only checks it exists
+
+from langchain_core.tools import StructuredTool  # noqa: E402
+from langchain_openai import ChatOpenAI  # noqa: E402
+from langgraph.prebuilt import create_react_agent  # noqa: E402
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def synthetic_tools(count):
+    """Tools shaped like the MCP ones: a few typed arguments and a docstring each."""
+    def make(i):
+        def tool(query: str, limit: int = 10, mode: Literal["fast", "full"] = "fast") -> str:
+            return query
+
+        return StructuredTool.from_function(tool, name=f"tool_{i}", description=f"Synthetic tool number {i}.")
+
+    return [make(i) for i in range(count)]
+
+
+def tones(turns):
+    """Tone settings as determine_tone hands them out: a few efforts, drifting temperatures."""
+    efforts, verbosities = ["low", "medium", "high"], ["low", "medium", "high"]
+    for turn in range(turns):
+        yield 0.5 + (turn % 11) * 0.083, efforts[turn % 3], verbosities[(turn // 3) % 3]
+
+
+def timed(fn, turns):
+    timings = []
+    for temperature, effort, verbosity in tones(turns):
+        started = time.perf_counter()
+        fn(temperature, effort, verbosity)
+        timings.append((time.perf_counter() - started) * 1000)
+    timings.sort()
+    return statistics.median(timings), timings[max(0, int(len(timings) * 0.95) - 1)], sum(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tools", type=int, default=40, help="Tool count (MCP servers + RAG/memory/finance tools)")
+    parser.add_argument("--turns", type=int, default=200)
+    args = parser.parse_args()
+
+    base_model = ChatOpenAI(model="gpt-5")
+    tools = synthetic_tools(args.tools)
+
+    def build(temperature, effort, verbosity):
+        model = base_model.bind(temperature=temperature, reasoning_effort=effort, verbosity=verbosity)
+        return create_react_agent(model, tools=tools)
+
+    # Same bucketing as agents/telegram.py
+    cached = lru_cache(maxsize=64)(build)
+
+    def lookup(temperature, effort, verbosity):
+        return cached(round(temperature, 1), effort, verbosity)
+
+    logger.info(f"📊 Agent per turn, {args.tools} tools, {args.turns} turns (p50 / p95 / total ms)")
+    b50, b95, btotal = timed(build, args.turns)
+    logger.info(f"   • rebuild every turn: {b50:8.3f} / {b95:8.3f} / {btotal:9.1f}")
+    c50, c95, ctotal = timed(lookup, args.turns)
+    info = cached.cache_info()
+    logger.info(
+        f"   • cached per bucket:  {c50:8.3f} / {c95:8.3f} / {ctotal:9.1f}"
+        f"   ({info.currsize} agents built, {info.hits} hits, {btotal / ctotal:.0f}x less total)"
+    )
+
+
+if __name__ == "__main__":
+    main()
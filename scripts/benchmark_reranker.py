@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Memory Reranker Benchmark
+Measures rerank latency for 10/50/100 candidates on each available backend
+
+  PYTHONPATH=polymetis python scripts/benchmark_reranker.py
+"""
+import argparse
+import logging
+import os
+import statistics
+import time
+
+from utils.reranker import CrossEncoderReranker
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+QUERY = "What did I commit to for my morning training routine?"
+SAMPLE_MEMORIES = [
+    "[FACTUAL] Gym is closed on Sundays.",
+    "[EVALUATIVE] Shift weekly leg day to Monday mornings.",
+    "[PROCEDURAL] Work-hours rule: block Instagram.",
+    "[EPISODIC @2025-09-23] Met Dan (Acme) to review ML pipeline.",
+    "[EVALUATIVE][DEADLINE:2025-09-26] Send ML pipeline PR to Dan.",
+    "[FACTUAL] Prefers to run before 7am when the weather is dry and there is no early standup.",
+    "[PROCEDURAL] Training rule: schedule leg day on Monday morning.",
+    "[FACTUAL] Dislikes Instagram.",
+]
+
+
+def candidates(n):
+    return [{"memory": SAMPLE_MEMORIES[i % len(SAMPLE_MEMORIES)] + f" (#{i})"} for i in range(n)]
+
+
+def benchmark(reranker, sizes, repeats):
+    """Return {size: (p50_ms, p95_ms)}"""
+    results = {}
+    for size in sizes:
+        docs = candidates(size)
+        reranker.rerank(QUERY, docs)  # warm-up
+        timings = []
+        for _ in range(repeats):
+            started = time.perf_counter()
+            reranker.rerank(QUERY, docs)
+            timings.append((time.perf_counter() - started) * 1000)
+        timings.sort()
+        results[size] = (statistics.median(timings), timings[max(0, int(len(timings) * 0.95) - 1)])
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--model", default=os.environ.get("RERANKER_MODEL", "BAAI/bge-reranker-base"))
+    parser.add_argument("--device", default="auto")
+    parser.add_argument("--backends", nargs="+", default=["onnx", "torch"])
+    parser.add_argument("--onnx-file", default=None, help="e.g. onnx/model_qint8_avx512_vnni.onnx")
+    parser.add_argument("--sizes", nargs="+", type=int, default=[10, 50, 100])
+    parser.add_argument("--threads", type=int, default=min(4, os.cpu_count() or 1))
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--max-length", type=int, default=256)
+    parser.add_argument("--repeats", type=int, default=20)
+    args = parser.parse_args()
+
+    for backend in args.backends:
+        try:
+            reranker = CrossEncoderReranker(
+                model=args.model,
+                device=args.device,
+                backend=backend,
+                onnx_file=args.onnx_file,
+                threads=args.threads,
+                batch_size=args.batch_size,
+                max_length=args.max_length,
+            )
+        except Exception as e:
+            logger.error(f"❌ Could not load {backend} backend: {e}")
+            continue
+
+        logger.info(f"📊 {args.model} on {reranker.device} ({reranker.backend}, {args.threads} threads)")
+        for size, (p50, p95) in benchmark(reranker, args.sizes, args.repeats).items():
+            logger.info(f"   • {size:>4} candidates: p50 {p50:7.1f}ms  p95 {p95:7.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Vector Index Manager
+Shows, rebuilds (concurrently) and tunes the HNSW indexes on rag.docs and graph.store_vectors
+(rag.docs:halfvec / rag.docs:binary are the opt-in quantized first-pass indexes: only
+built when named, and meant to replace rag.docs once VECTOR_QUANTIZATION uses them)
+
+  status                          validity, size and build options
+  rebuild [TABLE] --m --ef-construction
+  sweep   [TABLE] --k --ef 10 20 40 80 ... --oversample   recall@k / latency vs exact search
+  drop    TABLE                   drop an index concurrently
+
+  PYTHONPATH=polymetis python scripts/manage_vector_indexes.py status
+"""
+import argparse
+import asyncio
+import logging
+
+from utils.vector_indexes import DEFAULT_INDEXES, VECTOR_INDEXES, drop_index, index_status, rebuild_index, recall_sweep
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+async def status(_args):
+    for row in await index_status():
+        if row["valid"] is None and VECTOR_INDEXES[row["table"]].opt_in:
+            logger.info(f"➖ {row['table']}: {row['index']} not built (opt-in)")
+        elif row["valid"] is None:
+            logger.warning(f"⚠️ {row['table']}: {row['index']} missing")
+        else:
+            mark = "✅" if row["valid"] else "❌"
+            logger.info(f"{mark} {row['table']}: {row['index']} {row['size']} {row['options'] or ''}")
+
+
+async def rebuild(args):
+    for table in args.tables:
+        await rebuild_index(
+            VECTOR_INDEXES[table],
+            m=args.m,
+            ef_construction=args.ef_construction,
+            maintenance_work_mem=args.maintenance_work_mem,
+            parallel_workers=args.parallel_workers,
+        )
+        logger.info(f"✅ Rebuilt {VECTOR_INDEXES[table].name}")
+
+
+async def drop(args):
+    for table in args.tables:
+        await drop_index(VECTOR_INDEXES[table])
+        logger.info(f"✅ Dropped {VECTOR_INDEXES[table].name}")
+
+
+async def sweep(args):
+    for table in args.tables:
+        logger.info(f"📊 {table}: recall@{args.k} over {args.samples} sampled queries")
+        rows = await recall_sweep(
+            VECTOR_INDEXES[table], ef_values=args.ef, k=args.k, samples=args.samples, oversample=args.oversample
+        )
+        for row in rows:
+            logger.info(
+                f"   • ef_search {row['ef_search']:>4}: recall {row['recall']:.3f}  "
+                f"p50 {row['p50_ms']:7.2f}ms  p95 {row['p95_ms']:7.2f}ms"
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    sub.add_parser("status")
+
+    p = sub.add_parser("rebuild")
+    p.add_argument("tables", nargs="*", choices=list(VECTOR_INDEXES), default=DEFAULT_INDEXES)
+    p.add_argument("--m", type=int, default=16)
+    p.add_argument("--ef-construction", type=int, default=64)
+    p.add_argument("--maintenance-work-mem", default="1GB")
+    p.add_argument("--parallel-workers", type=int, default=None)
+
+    p = sub.add_parser("drop")
+    p.add_argument("tables", nargs="+", choices=list(VECTOR_INDEXES))
+
+    p = sub.add_parser("sweep")
+    p.add_argument("tables", nargs="*", choices=list(VECTOR_INDEXES), default=DEFAULT_INDEXES)
+    p.add_argument("--k", type=int, default=10)
+    p.add_argument("--samples", type=int, default=50)
+    p.add_argument("--ef", nargs="+", type=int, default=[10, 20, 40, 80, 160, 320])
+    p.add_argument("--oversample", type=int, default=4, help="quantized indexes rescore k * oversample candidates")
+
+    args = parser.parse_args()
+    asyncio.run({"status": status, "rebuild": rebuild, "drop": drop, "sweep": sweep}[args.command](args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Reranker Service
+Runs one cross-encoder per host behind a Unix socket and scores concurrent rerank requests
+from every worker in micro-batches (RERANKER_PROVIDER=service points build_retriever at it)
+
+  PYTHONPATH=polymetis python scripts/reranker_service.py
+"""
+import argparse
+import asyncio
+import logging
+import os
+
+from utils.reranker import CrossEncoderReranker
+from utils.reranker_service import (
+    RERANKER_SERVICE_MAX_PAIRS,
+    RERANKER_SERVICE_MAX_WAIT_MS,
+    RERANKER_SERVICE_SOCKET,
+    serve,
+)
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--model", default=os.environ.get("RERANKER_MODEL", "BAAI/bge-reranker-base"))
+    parser.add_argument("--socket", default=RERANKER_SERVICE_SOCKET)
+    parser.add_argument("--device", default="auto")
+    parser.add_argument("--backend", default="auto")
+    parser.add_argument("--onnx-file", default=None, help="e.g. onnx/model_qint8_avx512_vnni.onnx")
+    parser.add_argument("--threads", type=int, default=os.cpu_count() or 1, help="the service owns the host's cores")
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--max-length", type=int, default=256)
+    parser.add_argument("--max-wait-ms", type=float, default=RERANKER_SERVICE_MAX_WAIT_MS)
+    parser.add_argument("--max-pairs", type=int, default=RERANKER_SERVICE_MAX_PAIRS)
+    args = parser.parse_args()
+
+    model = CrossEncoderReranker(
+        model=args.model,
+        device=args.device,
+        backend=args.backend,
+        onnx_file=args.onnx_file,
+        threads=args.threads,
+        batch_size=args.batch_size,
+        max_length=args.max_length,
+    )
+    logger.info(f"🚀 {args.model} on {model.device} ({model.backend}), socket {args.socket}")
+    try:
+        asyncio.run(serve(model, socket_path=args.socket, max_wait_ms=args.max_wait_ms, max_pairs=args.max_pairs))
+    except KeyboardInterrupt:
+        logger.info("👋 Reranker service stopped")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+import struct
+
+import numpy as np
+import pytest
+from langchain_core.vectorstores.utils import maximal_marginal_relevance as reference_mmr
+
+from utils.mmr import decode_vectors, maximal_marginal_relevance
+
+
+def vector_send(vector) -> bytes:
+    """pgvector's binary send format: int16 dim, int16 unused, then big-endian float4s."""
+    return struct.pack(f">hh{len(vector)}f", len(vector), 0, *vector)
+
+
+@pytest.mark.parametrize("seed", range(5))
+@pytest.mark.parametrize("fetch_k,k,lambda_mult", [(20, 4, 0.5), (50, 10, 0.3), (100, 8, 0.9), (6, 10, 0.5)])
+def test_mmr_matches_langchain_pick_order(seed, fetch_k, k, lambda_mult):
+    rng = np.random.default_rng(seed)
+    query = rng.standard_normal(64).astype(np.float32)
+    # Clustered around the query so redundancy actually changes the picks
+    centres = query + rng.standard_normal((4, 64)).astype(np.float32)
+    candidates = centres[rng.integers(0, 4, fetch_k)] + 0.3 * rng.standard_normal((fetch_k, 64)).astype(np.float32)
+
+    expected = reference_mmr(query, list(candidates), lambda_mult=lambda_mult, k=k)
+    assert maximal_marginal_relevance(query, candidates, k=k, lambda_mult=lambda_mult) == expected
+
+
+def test_mmr_without_candidates():
+    assert maximal_marginal_relevance(np.ones(4), np.zeros((0, 4)), k=4) == []
+
+
+def test_decode_vectors_round_trips_vector_send():
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((5, 1536)).astype(np.float32)
+
+    decoded = decode_vectors([vector_send(v) for v in vectors])
+
+    assert decoded.dtype == np.float32
+    assert decoded.shape == (5, 1536)
+    np.testing.assert_array_equal(decoded, vectors)
+
+
+def test_decode_vectors_accepts_memoryviews():
+    # Some drivers (psycopg2) hand bytea columns back as memoryview
+    vectors = np.arange(12, dtype=np.float32).reshape(3, 4)
+
+    decoded = decode_vectors([memoryview(vector_send(v)) for v in vectors])
+
+    np.testing.assert_array_equal(decoded, vectors)
+
+
+def test_decode_vectors_empty():
+    assert decode_vectors([]).shape == (0, 0)